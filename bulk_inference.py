@@ -0,0 +1,477 @@
+import argparse
+import json
+import os
+import queue
+import sys
+import threading
+import time
+
+import numpy as np
+
+# Reuse the exact serving pre/postprocessing and session settings
+current_dir = os.path.dirname(os.path.abspath(__file__))
+backend_dir = os.path.join(current_dir, "screwvision_app", "backend")
+sys.path.insert(0, backend_dir)
+
+import main as backend  # noqa: E402
+from preprocess import decode_image  # noqa: E402
+from session_config import SessionConfig, create_session  # noqa: E402
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".webp")
+PARQUET_PART_IMAGES = 5000
+
+# Queue sentinel: stage finished
+DONE = object()
+# Seconds between stop checks while a stage waits on a queue
+STOP_POLL_SECONDS = 0.1
+
+
+def find_images(source_dir):
+    """All images under source_dir, as sorted paths relative to it"""
+    found = []
+    for root, _, files in os.walk(source_dir):
+        for name in files:
+            if name.lower().endswith(IMAGE_EXTENSIONS):
+                found.append(os.path.relpath(os.path.join(root, name), source_dir))
+    return sorted(found)
+
+
+class StageStats:
+    """Busy time and item count for one pipeline stage (thread-safe)"""
+
+    def __init__(self, name, workers=1):
+        self.name = name
+        self.workers = workers
+        self.items = 0
+        self.busy = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, items, seconds):
+        with self._lock:
+            self.items += items
+            self.busy += seconds
+
+    def rate(self):
+        # Throughput the stage could sustain if it never waited on its neighbours
+        busy_per_worker = self.busy / self.workers
+        return self.items / busy_per_worker if busy_per_worker > 0 else 0.0
+
+
+# --- Writers (one per output format, all support resume) ---
+
+
+class YoloWriter:
+    """One YOLO label file per image: class cx cy w h [conf], normalized"""
+
+    def __init__(self, output_dir, save_conf=False):
+        self.output_dir = output_dir
+        self.save_conf = save_conf
+
+    def label_path(self, rel_path):
+        return os.path.join(self.output_dir, os.path.splitext(rel_path)[0] + ".txt")
+
+    def completed(self):
+        done = set()
+        for root, _, files in os.walk(self.output_dir):
+            for name in files:
+                if name.endswith(".txt"):
+                    rel = os.path.relpath(os.path.join(root, name), self.output_dir)
+                    done.add(os.path.splitext(rel)[0])
+        return done
+
+    def is_done(self, rel_path, completed):
+        return os.path.splitext(rel_path)[0] in completed
+
+    def write(self, rel_path, width, height, detections, error=None):
+        if error is not None:
+            return  # No label file, the image is retried on the next run
+        lines = []
+        for d in detections:
+            box = d["bbox"]
+            cx = (box["x1"] + box["x2"]) / 2 / width
+            cy = (box["y1"] + box["y2"]) / 2 / height
+            w = (box["x2"] - box["x1"]) / width
+            h = (box["y2"] - box["y1"]) / height
+            line = f"{d['class_id']} {cx:.6f} {cy:.6f} {w:.6f} {h:.6f}"
+            if self.save_conf:
+                line += f" {d['confidence']:.4f}"
+            lines.append(line)
+
+        path = self.label_path(rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write then rename, so an interrupted run never leaves a half label that counts as done
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            f.write("\n".join(lines) + ("\n" if lines else ""))
+        os.replace(tmp_path, path)
+
+    def close(self):
+        pass
+
+
+class JsonlWriter:
+    """One JSON object per image appended to a single results file"""
+
+    def __init__(self, output_path):
+        self.output_path = output_path
+        self._file = None
+
+    def completed(self):
+        if not os.path.exists(self.output_path):
+            return set()
+        # Drop a partially written last line from an interrupted run
+        with open(self.output_path, "rb+") as f:
+            data = f.read()
+            end = data.rfind(b"\n") + 1
+            if end != len(data):
+                f.truncate(end)
+        done = set()
+        for line in data[:end].splitlines():
+            record = json.loads(line)
+            if "error" not in record:
+                done.add(record["image"])
+        return done
+
+    def is_done(self, rel_path, completed):
+        return rel_path in completed
+
+    def write(self, rel_path, width, height, detections, error=None):
+        if self._file is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.output_path)), exist_ok=True)
+            self._file = open(self.output_path, "a")
+        record = {"image": rel_path, "width": width, "height": height}
+        if error is not None:
+            record["error"] = error
+        else:
+            record["detections"] = [
+                [d["class_id"], d["confidence"], *d["bbox"].values()] for d in detections
+            ]
+        self._file.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+
+
+class ParquetWriter:
+    """
+    One row per detection (images without detections get a row with class_id -1),
+    written as numbered part files so an interrupted run keeps the finished parts
+    """
+
+    def __init__(self, output_dir):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            print("Error: --format parquet requires pyarrow (pip install pyarrow)")
+            exit(1)
+        self.output_dir = output_dir
+        self._rows = []
+        self._images = 0
+
+    def _parts(self):
+        if not os.path.isdir(self.output_dir):
+            return []
+        return sorted(
+            os.path.join(self.output_dir, name)
+            for name in os.listdir(self.output_dir)
+            if name.startswith("part-") and name.endswith(".parquet")
+        )
+
+    def completed(self):
+        import pyarrow.parquet as pq
+
+        done = set()
+        for part in self._parts():
+            done.update(pq.read_table(part, columns=["image"]).column("image").to_pylist())
+        return done
+
+    def is_done(self, rel_path, completed):
+        return rel_path in completed
+
+    def write(self, rel_path, width, height, detections, error=None):
+        if error is not None:
+            return
+        if not detections:
+            self._rows.append((rel_path, width, height, -1, 0.0, 0, 0, 0, 0))
+        for d in detections:
+            box = d["bbox"]
+            self._rows.append(
+                (rel_path, width, height, d["class_id"], d["confidence"],
+                 box["x1"], box["y1"], box["x2"], box["y2"])
+            )
+        self._images += 1
+        if self._images >= PARQUET_PART_IMAGES:
+            self._flush()
+
+    def _flush(self):
+        if not self._rows:
+            return
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        columns = ["image", "width", "height", "class_id", "confidence", "x1", "y1", "x2", "y2"]
+        table = pa.table({name: list(values) for name, values in zip(columns, zip(*self._rows))})
+        os.makedirs(self.output_dir, exist_ok=True)
+        path = os.path.join(self.output_dir, f"part-{len(self._parts()):05d}.parquet")
+        pq.write_table(table, path + ".tmp")
+        os.replace(path + ".tmp", path)
+        self._rows, self._images = [], 0
+
+    def close(self):
+        self._flush()
+
+
+# --- Pipeline stages ---
+
+
+def put_unless_stopped(out_queue, item, stop):
+    """Blocking put that gives up once stop is set (the consumer may have exited)"""
+    while not stop.is_set():
+        try:
+            out_queue.put(item, timeout=STOP_POLL_SECONDS)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def decode_worker(source_dir, paths, out_queue, stats, input_size, reduced_decode, stop):
+    """
+    Read + decode + letterbox into a fresh [1, 3, S, S] tensor
+    A failing image is passed on as an error; DONE is always sent so the
+    inference stage never waits on a dead decoder
+    """
+    try:
+        while not stop.is_set():
+            try:
+                rel_path = paths.get_nowait()
+            except queue.Empty:
+                break
+            start = time.perf_counter()
+            item = (rel_path, None, None, "decode failed")
+            try:
+                with open(os.path.join(source_dir, rel_path), "rb") as f:
+                    data = f.read()
+                image, original_size = decode_image(data, input_size if reduced_decode else None)
+                if image is not None:
+                    tensor, scale, pad_w, pad_h, w, h = backend.preprocess_image(
+                        image, input_size, None, original_size
+                    )
+                    item = (rel_path, tensor, (scale, pad_w, pad_h, w, h), None)
+            except Exception as e:
+                # OSError, cv2.error on empty / truncated files, ...
+                item = (rel_path, None, None, f"decode failed: {e}")
+            stats.add(1, time.perf_counter() - start)
+            put_unless_stopped(out_queue, item, stop)
+    finally:
+        put_unless_stopped(out_queue, DONE, stop)
+
+
+def inference_worker(session, in_queue, out_queue, stats, batch_size, decode_workers, stop):
+    """
+    Collect up to batch_size tensors, run them as one batch, pass rows on
+    A failed batch is reported per image; DONE is always sent to the writer
+    """
+    try:
+        _run_batches(session, in_queue, out_queue, stats, batch_size, decode_workers, stop)
+    finally:
+        put_unless_stopped(out_queue, DONE, stop)
+
+
+def _run_batches(session, in_queue, out_queue, stats, batch_size, decode_workers, stop):
+    input_name = session.get_inputs()[0].name
+    batch_dim = session.get_inputs()[0].shape[0]
+    if isinstance(batch_dim, int) and batch_dim > 0:
+        batch_size = min(batch_size, batch_dim)
+    finished = 0
+
+    while finished < decode_workers and not stop.is_set():
+        batch = []
+        while len(batch) < batch_size and finished < decode_workers:
+            # Wait for the first item only, then take whatever is already decoded
+            try:
+                item = in_queue.get(timeout=STOP_POLL_SECONDS if not batch else 0.005)
+            except queue.Empty:
+                break
+            if item is DONE:
+                finished += 1
+                continue
+            if item[1] is None:
+                put_unless_stopped(out_queue, (item[0], None, None, item[3]), stop)
+                continue
+            batch.append(item)
+
+        if not batch:
+            continue
+
+        start = time.perf_counter()
+        try:
+            tensors = np.concatenate([item[1] for item in batch], axis=0)
+            outputs = session.run(None, {input_name: tensors})
+        except Exception as e:
+            for rel_path, _, _, _ in batch:
+                put_unless_stopped(out_queue, (rel_path, None, None, f"inference failed: {e}"), stop)
+            continue
+        stats.add(len(batch), time.perf_counter() - start)
+
+        for i, (rel_path, _, meta, _) in enumerate(batch):
+            put_unless_stopped(
+                out_queue, (rel_path, [output[i : i + 1] for output in outputs], meta, None), stop
+            )
+
+
+def writer_worker(writer, in_queue, stats, confidence, iou, counters, stop):
+    """
+    Postprocess + write results
+    The only thread that calls writer.write; once stop is set it returns after the
+    current item, so the caller can join it before closing the writer
+    """
+    while not stop.is_set():
+        try:
+            item = in_queue.get(timeout=STOP_POLL_SECONDS)
+        except queue.Empty:
+            continue
+        if item is DONE:
+            break
+        rel_path, outputs, meta, error = item
+        start = time.perf_counter()
+        if error is None:
+            scale, pad_w, pad_h, w, h = meta
+            try:
+                detections = backend.postprocess_detections(
+                    outputs, scale, pad_w, pad_h, w, h, confidence, iou
+                )
+            except Exception as e:
+                error = f"postprocess failed: {e}"
+        if error is not None:
+            writer.write(rel_path, None, None, None, error)
+            counters["failed"] += 1
+        else:
+            writer.write(rel_path, w, h, detections)
+            counters["detections"] += len(detections)
+        stats.add(1, time.perf_counter() - start)
+        counters["written"] += 1
+
+
+def print_progress(stages, counters, total, started):
+    elapsed = time.perf_counter() - started
+    rates = ", ".join(f"{s.name} {s.rate():.1f}" for s in stages)
+    print(
+        f"  {counters['written']}/{total} images | {counters['written'] / elapsed:.1f} img/s "
+        f"| stage capacity img/s: {rates}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run best.onnx over an image folder")
+    parser.add_argument("source", help="Image directory (searched recursively)")
+    parser.add_argument("--output", required=True, help="Label dir (yolo/parquet) or .jsonl file")
+    parser.add_argument("--format", choices=["yolo", "jsonl", "parquet"], default="yolo")
+    parser.add_argument("--model", default=backend.MODEL_PATH)
+    parser.add_argument("--confidence", type=float, default=0.25)
+    parser.add_argument("--iou", type=float, default=0.45)
+    parser.add_argument("--batch", type=int, default=8)
+    parser.add_argument("--decode-workers", type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    parser.add_argument("--queue-size", type=int, default=32, help="Max items between stages")
+    parser.add_argument("--save-conf", action="store_true", help="Append confidence to YOLO labels")
+    parser.add_argument("--no-resume", action="store_true", help="Process every image again")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.source):
+        print(f"Error: Directory not found at {args.source}")
+        exit(1)
+    if not os.path.exists(args.model):
+        print(f"Error: File not found at {args.model}")
+        exit(1)
+
+    if args.format == "yolo":
+        writer = YoloWriter(args.output, args.save_conf)
+    elif args.format == "jsonl":
+        writer = JsonlWriter(args.output)
+    else:
+        writer = ParquetWriter(args.output)
+
+    images = find_images(args.source)
+    if not args.no_resume:
+        completed = writer.completed()
+        skipped = len(images)
+        images = [p for p in images if not writer.is_done(p, completed)]
+        skipped -= len(images)
+        if skipped:
+            print(f"Resuming: {skipped} images already done")
+    if not images:
+        print("Nothing to do.")
+        return
+
+    # Decoders get their own cores, ORT gets the rest
+    inference_threads = max(1, (os.cpu_count() or 1) - args.decode_workers)
+    config = SessionConfig.from_env({"intra_op_threads": inference_threads})
+    session, _ = create_session(args.model, config)
+    print(f"Model: {args.model} ({', '.join(session.get_providers())}, {inference_threads} threads)")
+    print(f"Images: {len(images)}, batch: {args.batch}, decode workers: {args.decode_workers}")
+
+    paths = queue.Queue()
+    for rel_path in images:
+        paths.put(rel_path)
+    decoded = queue.Queue(maxsize=args.queue_size)
+    inferred = queue.Queue(maxsize=args.queue_size)
+
+    decode_stats = StageStats("decode", args.decode_workers)
+    infer_stats = StageStats("infer")
+    write_stats = StageStats("write")
+    stages = [decode_stats, infer_stats, write_stats]
+    counters = {"written": 0, "failed": 0, "detections": 0}
+    stop = threading.Event()
+
+    threads = [
+        threading.Thread(
+            target=decode_worker,
+            args=(args.source, paths, decoded, decode_stats, backend.INPUT_SIZE, backend.REDUCED_DECODE, stop),
+            daemon=True,
+        )
+        for _ in range(args.decode_workers)
+    ]
+    threads.append(
+        threading.Thread(
+            target=inference_worker,
+            args=(session, decoded, inferred, infer_stats, args.batch, args.decode_workers, stop),
+            daemon=True,
+        )
+    )
+    writer_thread = threading.Thread(
+        target=writer_worker,
+        args=(writer, inferred, write_stats, args.confidence, args.iou, counters, stop),
+        daemon=True,
+    )
+    threads.append(writer_thread)
+
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    try:
+        while writer_thread.is_alive():
+            writer_thread.join(timeout=5)
+            print_progress(stages, counters, len(images), started)
+    except KeyboardInterrupt:
+        print("Interrupted, finished images are kept; run again to resume.")
+    finally:
+        # Stop every stage and wait for all of them (the writer last touches its files,
+        # inference may be inside session.run) before closing the output
+        stop.set()
+        for t in threads:
+            t.join()
+        writer.close()
+
+    elapsed = time.perf_counter() - started
+    print(f"\nDone: {counters['written']} images in {elapsed:.1f}s ({counters['written'] / elapsed:.1f} img/s)")
+    print(f"Detections: {counters['detections']}, failed images: {counters['failed']}")
+    print("Stage capacity (img/s if never waiting on other stages):")
+    for s in stages:
+        print(f"  {s.name:>7}: {s.rate():8.1f}  ({s.workers} worker{'s' if s.workers > 1 else ''})")
+    bottleneck = min(stages, key=lambda s: s.rate() or float("inf"))
+    print(f"Bottleneck: {bottleneck.name}")
+
+
+if __name__ == '__main__':
+    main()
@@ -6,15 +6,29 @@ import os
 current_dir = os.path.dirname(os.path.abspath(__file__))
 pt_path = os.path.join(current_dir, "screwVision_model", "runs", "train", "screwvision_v2_augmented", "weights", "best.pt")
 
-if not os.path.exists(pt_path):
-    print(f"Error: File not found at {pt_path}")
-    exit(1)
 
-print(f"Loading model from {pt_path}...")
-model = YOLO(pt_path)
+def export_onnx(pt_path=pt_path, opset=12, dynamic=True, **options):
+    """
+    Export weights to ONNX next to the .pt file and return the .onnx path.
+    The defaults are the serving export; sweep.py passes other opsets / imgsz / half.
+    """
+    if not os.path.exists(pt_path):
+        raise FileNotFoundError(f"File not found at {pt_path}")
 
-print("Exporting to ONNX with opset=18 for compatibility...")
-# Export with opset=12 (highly compatible standard)
-path = model.export(format="onnx", opset=12, dynamic=False)
+    print(f"Loading model from {pt_path}...")
+    model = YOLO(pt_path)
 
-print(f"Export Success: {path}")
+    print(f"Exporting to ONNX with opset={opset}, dynamic={dynamic}...")
+    # Default opset=12 is the widely supported serving export; sweep.py may pass others
+    # dynamic=True: batch axis is dynamic so the backend can micro-batch concurrent requests
+    path = model.export(format="onnx", opset=opset, dynamic=dynamic, **options)
+
+    print(f"Export Success: {path}")
+    return path
+
+
+if __name__ == "__main__":
+    if not os.path.exists(pt_path):
+        print(f"Error: File not found at {pt_path}")
+        exit(1)
+    export_onnx()
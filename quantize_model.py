@@ -0,0 +1,145 @@
+import argparse
+import glob
+import os
+import sys
+
+import cv2
+import onnx
+import onnx.version_converter
+from onnxruntime.quantization import (
+    CalibrationDataReader,
+    CalibrationMethod,
+    QuantFormat,
+    QuantType,
+    quantize_static,
+)
+from onnxruntime.quantization.shape_inference import quant_pre_process
+from onnxruntime.transformers.float16 import convert_float_to_float16
+
+# Reuse the exact serving preprocessing for calibration
+current_dir = os.path.dirname(os.path.abspath(__file__))
+backend_dir = os.path.join(current_dir, "screwvision_app", "backend")
+sys.path.insert(0, backend_dir)
+
+from preprocess import letterbox_into, new_input_tensor  # noqa: E402
+
+model_dir = os.path.join(backend_dir, "models")
+calib_dir = os.path.join(current_dir, "screwVision_data", "valid", "images")
+INPUT_SIZE = 640
+
+
+class ValidationCalibrationReader(CalibrationDataReader):
+    """Feeds letterboxed validation images to the INT8 calibrator one at a time."""
+
+    def __init__(self, input_name, image_paths):
+        self.input_name = input_name
+        self.image_paths = list(image_paths)
+        self.index = 0
+
+    def get_next(self):
+        while self.index < len(self.image_paths):
+            image = cv2.imread(self.image_paths[self.index])
+            self.index += 1
+            if image is None:
+                continue
+            tensor = new_input_tensor(INPUT_SIZE)
+            letterbox_into(image, tensor, INPUT_SIZE)
+            return {self.input_name: tensor}
+        return None
+
+    def rewind(self):
+        self.index = 0
+
+
+def head_nodes_to_exclude(model):
+    """
+    Keep the detection head's box decoding (DFL softmax, concat, sigmoid, arithmetic)
+    in float. Quantizing it costs a lot of box accuracy for almost no speed;
+    the head convolutions are still quantized.
+    """
+    head_prefix = "/model.22/"
+    return [
+        node.name
+        for node in model.graph.node
+        if node.name.startswith(head_prefix) and node.op_type != "Conv"
+    ]
+
+
+def build_fp16(src_path, dst_path):
+    print(f"Building FP16 model -> {dst_path}")
+    model = onnx.load(src_path)
+    # keep_io_types: the backend keeps feeding float32 tensors
+    model_fp16 = convert_float_to_float16(model, keep_io_types=True)
+    onnx.save(model_fp16, dst_path)
+
+
+def build_int8(src_path, dst_path, calib_images, calib_limit):
+    print(f"Building INT8 model (static, {calib_limit} calibration images) -> {dst_path}")
+    prepared_path = dst_path.replace(".onnx", "_prep.onnx")
+
+    # Per-channel QDQ needs opset >= 13 (export_fix.py exports opset 12)
+    model = onnx.load(src_path)
+    opset = next(o.version for o in model.opset_import if o.domain in ("", "ai.onnx"))
+    if opset < 13:
+        model = onnx.version_converter.convert_version(model, 13)
+    onnx.save(model, prepared_path)
+
+    try:
+        quant_pre_process(prepared_path, prepared_path, skip_symbolic_shape=True)
+
+        model = onnx.load(prepared_path)
+        input_name = model.graph.input[0].name
+        reader = ValidationCalibrationReader(input_name, calib_images[:calib_limit])
+
+        quantize_static(
+            prepared_path,
+            dst_path,
+            reader,
+            quant_format=QuantFormat.QDQ,
+            per_channel=True,
+            activation_type=QuantType.QUInt8,
+            weight_type=QuantType.QInt8,
+            calibrate_method=CalibrationMethod.MinMax,
+            nodes_to_exclude=head_nodes_to_exclude(model),
+        )
+    finally:
+        os.remove(prepared_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build FP16 / INT8 variants of best.onnx")
+    parser.add_argument("--model", default=os.path.join(model_dir, "best.onnx"))
+    parser.add_argument("--variants", default="fp16,int8")
+    parser.add_argument("--calib-limit", type=int, default=200)
+    args = parser.parse_args()
+
+    if not os.path.exists(args.model):
+        print(f"Error: File not found at {args.model}")
+        exit(1)
+
+    out_dir = os.path.dirname(os.path.abspath(args.model))
+    variants = args.variants.split(",")
+
+    if "fp16" in variants:
+        build_fp16(args.model, os.path.join(out_dir, "best_fp16.onnx"))
+
+    if "int8" in variants:
+        calib_images = sorted(glob.glob(os.path.join(calib_dir, "*.jpg")))
+        if not calib_images:
+            print(f"Error: No calibration images in {calib_dir}")
+            exit(1)
+        # Sample evenly so every source image (and its augmented copies) is represented
+        step = max(1, len(calib_images) // args.calib_limit)
+        build_int8(
+            args.model,
+            os.path.join(out_dir, "best_int8.onnx"),
+            calib_images[::step],
+            args.calib_limit,
+        )
+
+    print("Quantization Completed.")
+    print("Select a variant in the backend with SCREWVISION_MODEL_VARIANT=fp32|fp16|int8")
+
+
+if __name__ == '__main__':
+    main()
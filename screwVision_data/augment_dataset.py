@@ -2,13 +2,24 @@
 import os
 import cv2
 import albumentations as A
+import argparse
 import glob
-import shutil
+import hashlib
+import json
+import random
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
 # Dataset Paths
-DATASET_DIR = "/Users/omeredebal/Desktop/4. sınıf projeler/screwVison/screwVision_data"
+DATASET_DIR = os.path.dirname(os.path.abspath(__file__))
 SETS = ['train', 'valid', 'test']
 
+# Augmented copies go to a separate tree so source images/ folders are never re-globbed
+OUTPUT_DIR = os.path.join(DATASET_DIR, "augmented")
+MANIFEST_NAME = "manifest.json"
+SEED = 42
+
 # Augmentation Pipeline
 # We want to create robust variations:
 # 1. Rotations (critical for screws)
@@ -110,62 +121,257 @@ def save_yolo_label(output_path, bboxes, class_labels):
             h = max(0, min(1, h))
             f.write(f"{cls} {x_c:.6f} {y_c:.6f} {w:.6f} {h:.6f}\n")
 
-def process_dataset():
-    pipelines = get_augmentations()
-    
-    total_generated = 0
-    
+def pipeline_suffixes():
+    return [suffix for _, suffix in get_augmentations()]
+
+def pipeline_fingerprints():
+    """Hash of each pipeline's serialized config; editing a pipeline re-runs only its jobs"""
+    fingerprints = {}
+    for aug, suffix in get_augmentations():
+        config = json.dumps(A.to_dict(aug), sort_keys=True, default=str)
+        fingerprints[suffix] = hashlib.blake2b(config.encode(), digest_size=8).hexdigest()
+    return fingerprints
+
+def source_digest(img_path, label_path):
+    """Hash of the image bytes + label bytes"""
+    h = hashlib.blake2b(digest_size=16)
+    with open(img_path, 'rb') as f:
+        h.update(f.read())
+    h.update(b"\0")
+    if os.path.exists(label_path):
+        with open(label_path, 'rb') as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+def job_seed(base_seed, source_hash, suffix):
+    """Per-job seed: same source + pipeline + base seed -> same output, whatever the worker order"""
+    digest = hashlib.blake2b(f"{base_seed}|{source_hash}|{suffix}".encode(), digest_size=4).digest()
+    return int.from_bytes(digest, 'little')
+
+def source_images(img_dir, suffixes):
+    """Original images only: skip outputs an older in-place run left in images/"""
+    image_files = glob.glob(os.path.join(img_dir, "*.jpg")) + \
+                  glob.glob(os.path.join(img_dir, "*.png")) + \
+                  glob.glob(os.path.join(img_dir, "*.jpeg"))
+    sources = []
+    for img_path in sorted(image_files):
+        basename = os.path.splitext(os.path.basename(img_path))[0]
+        if not any(basename.endswith(suffix) for suffix in suffixes):
+            sources.append(img_path)
+    return sources
+
+def load_manifest(path):
+    if os.path.exists(path):
+        with open(path, 'r') as f:
+            return json.load(f)
+    return {"jobs": {}}
+
+def save_manifest(path, manifest):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+def write_data_yaml(dataset_dir, output_dir, splits):
+    """data.yaml that trains on the originals + augmented copies"""
+    names = ['allen', 'duz', 'phillips', 'pozidriv', 'torx']
+    keys = {'train': 'train', 'valid': 'val', 'test': 'test'}
+    lines = []
     for split in SETS:
-        img_dir = os.path.join(DATASET_DIR, split, "images")
-        lbl_dir = os.path.join(DATASET_DIR, split, "labels")
-        
+        paths = [os.path.abspath(os.path.join(dataset_dir, split, "images"))]
+        augmented_dir = os.path.abspath(os.path.join(output_dir, split, "images"))
+        if split in splits and os.path.isdir(augmented_dir):
+            paths.append(augmented_dir)
+        lines.append(f"{keys[split]}: {json.dumps(paths)}")
+    lines += ["", f"nc: {len(names)}", f"names: {names}"]
+    with open(os.path.join(output_dir, "data.yaml"), 'w') as f:
+        f.write("\n".join(lines) + "\n")
+
+# Worker process state: pipelines are built once per process, not pickled per job
+_worker_pipelines = None
+
+def _init_worker():
+    global _worker_pipelines
+    cv2.setNumThreads(1)  # Parallelism comes from the process pool
+    _worker_pipelines = {suffix: aug for aug, suffix in get_augmentations()}
+
+def augment_job(job):
+    """Run one (image, pipeline) job; returns timings so the parent can report them"""
+    t0 = time.perf_counter()
+    image = cv2.imread(job["img_path"])
+    if image is None:
+        return {**job, "error": "could not read image"}
+    bboxes, class_labels = read_yolo_label(job["label_path"])
+    t1 = time.perf_counter()
+
+    # Albumentations draws from both RNGs
+    random.seed(job["seed"])
+    np.random.seed(job["seed"])
+    try:
+        augmented = _worker_pipelines[job["suffix"]](
+            image=image, bboxes=bboxes, class_labels=class_labels
+        )
+    except Exception as e:
+        return {**job, "error": str(e)}
+    t2 = time.perf_counter()
+
+    try:
+        if not cv2.imwrite(job["out_img"], augmented['image']):
+            return {**job, "error": f"could not write {job['out_img']}"}
+        save_yolo_label(job["out_lbl"], augmented['bboxes'], augmented['class_labels'])
+    except (cv2.error, OSError) as e:
+        return {**job, "error": f"write failed: {e}"}
+    t3 = time.perf_counter()
+
+    return {**job, "read": t1 - t0, "augment": t2 - t1, "write": t3 - t2}
+
+def print_timing_report(results, wall, skipped, removed, workers):
+    done = [r for r in results if "error" not in r]
+    failed = [r for r in results if "error" in r]
+    print("\n--- Timing report ---")
+    print(f"Workers: {workers}, wall time: {wall:.1f}s")
+    print(f"Jobs: {len(done)} done, {skipped} up to date (skipped), {len(failed)} failed, {removed} stale removed")
+    if done:
+        print(f"Throughput: {len(done) / wall:.1f} images/s")
+        for stage in ("read", "augment", "write"):
+            total = sum(r[stage] for r in done)
+            print(f"  {stage:>8}: {total:7.1f}s CPU total, {total / len(done) * 1000:6.1f} ms/job")
+        print("Per pipeline (mean augment ms):")
+        per_pipeline = {}
+        for r in done:
+            per_pipeline.setdefault(r["suffix"], []).append(r["augment"] * 1000)
+        for suffix, times in sorted(per_pipeline.items(), key=lambda kv: -np.mean(kv[1])):
+            print(f"  {suffix:>16}: {np.mean(times):6.1f} ms ({len(times)} jobs)")
+    for r in failed[:10]:
+        print(f"Error augmenting {os.path.basename(r['img_path'])} ({r['suffix']}): {r['error']}")
+
+def process_dataset(dataset_dir=DATASET_DIR, output_dir=OUTPUT_DIR, splits=SETS,
+                    workers=None, seed=SEED, force=False):
+    workers = workers or os.cpu_count() or 1
+    suffixes = pipeline_suffixes()
+    fingerprints = pipeline_fingerprints()
+
+    manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+    manifest = load_manifest(manifest_path)
+    entries = manifest["jobs"]
+
+    # Plan: one job per (source image, pipeline) whose manifest entry is missing or out of date
+    jobs = []
+    wanted = set()
+    skipped = 0
+    for split in splits:
+        img_dir = os.path.join(dataset_dir, split, "images")
+        lbl_dir = os.path.join(dataset_dir, split, "labels")
+
         if not os.path.exists(img_dir):
             continue
-            
-        print(f"Processing {split} set...")
-        
-        # Get all images
-        image_files = glob.glob(os.path.join(img_dir, "*.jpg")) + \
-                      glob.glob(os.path.join(img_dir, "*.png")) + \
-                      glob.glob(os.path.join(img_dir, "*.jpeg"))
-                      
-        for img_path in image_files:
-            basename = os.path.splitext(os.path.basename(img_path))[0]
-            ext = os.path.splitext(os.path.basename(img_path))[1]
+
+        out_img_dir = os.path.join(output_dir, split, "images")
+        out_lbl_dir = os.path.join(output_dir, split, "labels")
+        os.makedirs(out_img_dir, exist_ok=True)
+        os.makedirs(out_lbl_dir, exist_ok=True)
+
+        sources = source_images(img_dir, suffixes)
+        print(f"Scanning {split} set: {len(sources)} source images")
+
+        for img_path in sources:
+            basename, ext = os.path.splitext(os.path.basename(img_path))
             label_path = os.path.join(lbl_dir, basename + ".txt")
-            
-            # Read Image
-            image = cv2.imread(img_path)
-            if image is None:
-                continue
-                
-            # Read Label
-            bboxes, class_labels = read_yolo_label(label_path)
-            
-            # Apply pipelines
-            for aug, suffix in pipelines:
-                try:
-                    augmented = aug(image=image, bboxes=bboxes, class_labels=class_labels)
-                    aug_img = augmented['image']
-                    aug_bboxes = augmented['bboxes']
-                    aug_labels = augmented['class_labels']
-                    
-                    # Generate new filenames
-                    new_basename = basename + suffix
-                    new_img_path = os.path.join(img_dir, new_basename + ext)
-                    new_lbl_path = os.path.join(lbl_dir, new_basename + ".txt")
-                    
-                    # Save Image
-                    cv2.imwrite(new_img_path, aug_img)
-                    
-                    # Save Label
-                    save_yolo_label(new_lbl_path, aug_bboxes, aug_labels)
-                    
-                    total_generated += 1
-                except Exception as e:
-                    print(f"Error augmenting {basename}: {e}")
-                    
-    print(f"Done! Generated {total_generated} new images.")
+            source_hash = source_digest(img_path, label_path)
+
+            for suffix in suffixes:
+                key = f"{split}/{basename}{suffix}"
+                wanted.add(key)
+                out_img = os.path.join(out_img_dir, basename + suffix + ext)
+                out_lbl = os.path.join(out_lbl_dir, basename + suffix + ".txt")
+
+                entry = entries.get(key)
+                if (not force and entry is not None
+                        and entry["source_hash"] == source_hash
+                        and entry["pipeline"] == fingerprints[suffix]
+                        and entry["seed"] == seed
+                        and os.path.exists(out_img) and os.path.exists(out_lbl)):
+                    skipped += 1
+                    continue
+
+                jobs.append({
+                    "key": key,
+                    "img_path": img_path,
+                    "label_path": label_path,
+                    "suffix": suffix,
+                    "source_hash": source_hash,
+                    "seed": job_seed(seed, source_hash, suffix),
+                    "out_img": out_img,
+                    "out_lbl": out_lbl,
+                })
+
+    # Outputs whose source image (or pipeline) no longer exists
+    removed = 0
+    for key in list(entries):
+        if key.split("/", 1)[0] in splits and key not in wanted:
+            for path in entries[key]["outputs"]:
+                if os.path.exists(path):
+                    os.remove(path)
+            del entries[key]
+            removed += 1
+
+    print(f"{len(jobs)} jobs to run, {skipped} up to date")
+
+    start = time.perf_counter()
+    results = []
+    os.makedirs(output_dir, exist_ok=True)
+    try:
+        if jobs:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+                futures = {pool.submit(augment_job, job): job for job in jobs}
+                for i, future in enumerate(as_completed(futures), 1):
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        # A crashed worker fails its job, not the whole run
+                        result = {**futures[future], "error": f"worker failed: {e!r}"}
+                    results.append(result)
+                    if "error" not in result:
+                        entries[result["key"]] = {
+                            "source_hash": result["source_hash"],
+                            "pipeline": fingerprints[result["suffix"]],
+                            "seed": seed,
+                            "outputs": [result["out_img"], result["out_lbl"]],
+                        }
+                    else:
+                        # Outputs may be partial: drop them so the next run redoes the job
+                        entries.pop(result["key"], None)
+                        for path in (result["out_img"], result["out_lbl"]):
+                            if os.path.isfile(path):
+                                os.remove(path)
+                    # Checkpoint so an interrupted run keeps its progress
+                    if i % 200 == 0:
+                        save_manifest(manifest_path, manifest)
+                        print(f"  {i}/{len(jobs)}")
+    finally:
+        save_manifest(manifest_path, manifest)
+    wall = time.perf_counter() - start
+
+    write_data_yaml(dataset_dir, output_dir, splits)
+
+    print_timing_report(results, wall, skipped, removed, workers)
+    print(f"Done! Outputs in {output_dir}, train with {os.path.join(output_dir, 'data.yaml')}")
 
 if __name__ == "__main__":
-    process_dataset()
+    parser = argparse.ArgumentParser(description="Augment the dataset in parallel, only re-running changed jobs")
+    parser.add_argument("--dataset-dir", default=DATASET_DIR)
+    parser.add_argument("--output-dir", default=None, help="Default: <dataset-dir>/augmented")
+    parser.add_argument("--splits", default=",".join(SETS))
+    parser.add_argument("--workers", type=int, default=None, help="Default: all cores")
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--force", action="store_true", help="Ignore the manifest and redo every job")
+    args = parser.parse_args()
+
+    process_dataset(
+        dataset_dir=args.dataset_dir,
+        output_dir=args.output_dir or os.path.join(args.dataset_dir, "augmented"),
+        splits=args.splits.split(","),
+        workers=args.workers,
+        seed=args.seed,
+        force=args.force,
+    )
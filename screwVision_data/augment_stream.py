@@ -0,0 +1,218 @@
+import os
+import random
+import cv2
+import numpy as np
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from augment_dataset import DATASET_DIR, SEED, get_augmentations, read_yolo_label, source_images, pipeline_suffixes
+
+# On-the-fly augmentation: the get_augmentations() variants are produced at load time
+# instead of being written to disk by augment_dataset.py. Every epoch sees each source
+# image once as-is and once through every pipeline (the same mix as the materialized
+# dataset), but with fresh random parameters each time.
+
+VARIANTS = 1 + len(pipeline_suffixes())  # 0 = original, i = pipeline i - 1
+
+
+def augment_sample(image, bboxes, class_labels, variant, pipelines):
+    """Apply variant (0 = none) to one sample; bboxes are normalized YOLO xywh"""
+    if variant == 0:
+        return image, bboxes, class_labels
+    aug, _ = pipelines[variant - 1]
+    augmented = aug(image=image, bboxes=bboxes, class_labels=class_labels)
+    return augmented['image'], augmented['bboxes'], augmented['class_labels']
+
+
+def sample_seed(base_seed, epoch, index):
+    return (base_seed * 1000003 + epoch * 9973 + index) % (2 ** 32)
+
+
+def write_sources_data_yaml(dataset_dir=DATASET_DIR, output_path=None):
+    """
+    data.yaml whose train split lists only source images (a .txt file of paths), so
+    variants an older augment_dataset.py run left in train/images are not trained on twice
+    """
+    output_path = output_path or os.path.join(dataset_dir, "data_online.yaml")
+    list_path = os.path.join(os.path.dirname(output_path), "train_sources.txt")
+    sources = source_images(os.path.join(dataset_dir, "train", "images"), pipeline_suffixes())
+    with open(list_path, 'w') as f:
+        f.write("\n".join(os.path.abspath(p) for p in sources) + "\n")
+
+    names = ['allen', 'duz', 'phillips', 'pozidriv', 'torx']
+    with open(output_path, 'w') as f:
+        f.write(f"train: {os.path.abspath(list_path)}\n")
+        f.write(f"val: {os.path.abspath(os.path.join(dataset_dir, 'valid', 'images'))}\n")
+        f.write(f"test: {os.path.abspath(os.path.join(dataset_dir, 'test', 'images'))}\n\n")
+        f.write(f"nc: {len(names)}\nnames: {names}\n")
+    print(f"On-the-fly augmentation: {len(sources)} source images x {VARIANTS} variants per epoch")
+    return output_path
+
+
+# --- Standalone streaming loader (process pool + bounded prefetch) ---
+
+_worker_pipelines = None
+
+
+def _init_worker():
+    global _worker_pipelines
+    cv2.setNumThreads(1)
+    _worker_pipelines = get_augmentations()
+
+
+def _load_sample(job):
+    img_path, label_path, variant, seed = job
+    image = cv2.imread(img_path)
+    if image is None:
+        return None
+    bboxes, class_labels = read_yolo_label(label_path)
+    random.seed(seed)
+    np.random.seed(seed)
+    image, bboxes, class_labels = augment_sample(image, bboxes, class_labels, variant, _worker_pipelines)
+    return {
+        "path": img_path,
+        "variant": variant,
+        "image": image,
+        "bboxes": np.asarray(bboxes, dtype=np.float32).reshape(-1, 4),
+        "class_labels": np.asarray(class_labels, dtype=np.int64),
+    }
+
+
+class AugmentedStream:
+    """
+    Yields one epoch of augmented samples (dicts with image, bboxes, class_labels).
+    Samples are produced by a process pool; at most `prefetch` are in flight or
+    buffered, so memory stays bounded however large the epoch is. Sample i of
+    epoch e always gets the same seed, so an epoch is reproducible.
+    """
+
+    def __init__(self, image_paths, workers=None, prefetch=32, seed=SEED, shuffle=True):
+        self.image_paths = list(image_paths)
+        self.label_paths = [
+            os.path.join(os.path.dirname(os.path.dirname(p)), "labels", os.path.splitext(os.path.basename(p))[0] + ".txt")
+            for p in self.image_paths
+        ]
+        self.prefetch = max(1, prefetch)
+        self.seed = seed
+        self.shuffle = shuffle
+        self._pool = ProcessPoolExecutor(max_workers=workers or os.cpu_count(), initializer=_init_worker)
+
+    def __len__(self):
+        return len(self.image_paths) * VARIANTS
+
+    def epoch(self, epoch=0):
+        order = np.arange(len(self))
+        if self.shuffle:
+            np.random.default_rng(self.seed + epoch).shuffle(order)
+
+        n = len(self.image_paths)
+        pending = deque()
+        for index in order:
+            source, variant = index % n, index // n
+            job = (self.image_paths[source], self.label_paths[source], variant, sample_seed(self.seed, epoch, int(index)))
+            pending.append(self._pool.submit(_load_sample, job))
+            if len(pending) >= self.prefetch:
+                sample = pending.popleft().result()
+                if sample is not None:
+                    yield sample
+        while pending:
+            sample = pending.popleft().result()
+            if sample is not None:
+                yield sample
+
+    def close(self):
+        self._pool.shutdown(cancel_futures=True)
+
+
+# --- Ultralytics integration (train_model.py) ---
+
+
+def enable_online_augmentation(dataset):
+    """
+    Turn an Ultralytics YOLODataset into an on-the-fly augmented one: its length
+    becomes sources x VARIANTS and index // sources picks the variant. The variant
+    is applied to the image as Ultralytics' load_image returns it (long side resized
+    to imgsz, not padded) and to the normalized labels, before Ultralytics' own
+    transforms (mosaic, letterbox etc.). Parallelism and the bounded prefetch buffer come
+    from the training DataLoader (workers, prefetch_factor); each worker process
+    has its own dataset copy, so the per-call variant attribute is not shared.
+    """
+    base = type(dataset)
+
+    class OnTheFlyDataset(base):
+        def __len__(self):
+            return len(self.labels) * VARIANTS
+
+        def get_image_and_label(self, index):
+            n = len(self.labels)
+            self._variant = index // n % VARIANTS
+            return super().get_image_and_label(index % n)
+
+        def update_labels_info(self, label):
+            variant = getattr(self, "_variant", 0)
+            if variant and len(label['bboxes']):
+                try:
+                    image, bboxes, classes = augment_sample(
+                        label['img'], label['bboxes'].tolist(), label['cls'].reshape(-1).tolist(),
+                        variant, self.online_pipelines,
+                    )
+                    label['img'] = np.ascontiguousarray(image)
+                    label['bboxes'] = np.asarray(bboxes, dtype=np.float32).reshape(-1, 4)
+                    label['cls'] = np.asarray(classes, dtype=np.float32).reshape(-1, 1)
+                except ValueError as e:
+                    # albumentations rejects some boxes (e.g. degenerate after clipping):
+                    # keep the original sample, but report it
+                    self.augment_skipped += 1
+                    if self.augment_skipped == 1 or self.augment_skipped % 100 == 0:
+                        print(
+                            f"Warning: augmentation skipped for {self.augment_skipped} samples "
+                            f"in this worker (last: {label.get('im_file')}, variant {variant}: {e})"
+                        )
+            return super().update_labels_info(label)
+
+    dataset.__class__ = OnTheFlyDataset
+    dataset.online_pipelines = get_augmentations()
+    dataset.augment_skipped = 0
+    return dataset
+
+
+def detection_trainer():
+    """DetectionTrainer subclass whose training dataset is augmented on the fly"""
+    try:
+        from ultralytics.models.yolo.detect import DetectionTrainer
+    except ImportError:  # ultralytics < 8.0.100
+        from ultralytics.yolo.v8.detect import DetectionTrainer
+
+    class OnTheFlyTrainer(DetectionTrainer):
+        def build_dataset(self, img_path, mode='train', batch=None):
+            dataset = super().build_dataset(img_path, mode, batch)
+            if mode == 'train':
+                enable_online_augmentation(dataset)
+            return dataset
+
+    return OnTheFlyTrainer
+
+
+if __name__ == "__main__":
+    # Throughput check: one epoch over the train sources
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Stream one epoch of on-the-fly augmented samples")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--prefetch", type=int, default=32)
+    parser.add_argument("--limit", type=int, default=0, help="Use only the first N source images")
+    args = parser.parse_args()
+
+    paths = source_images(os.path.join(DATASET_DIR, "train", "images"), pipeline_suffixes())
+    if args.limit:
+        paths = paths[:args.limit]
+    stream = AugmentedStream(paths, args.workers, args.prefetch)
+    start = time.perf_counter()
+    count = boxes = 0
+    for sample in stream.epoch(0):
+        count += 1
+        boxes += len(sample["bboxes"])
+    elapsed = time.perf_counter() - start
+    stream.close()
+    print(f"{count} samples ({boxes} boxes) in {elapsed:.1f}s: {count / elapsed:.1f} samples/s, 0 bytes written")
@@ -0,0 +1,198 @@
+import os
+import sys
+import argparse
+import glob
+import json
+import time
+import cv2
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+
+from augment_dataset import DATASET_DIR, SETS, pipeline_suffixes, source_images
+
+# Letterbox with the exact serving code, so packed pixels match what the backend feeds the model
+backend_dir = os.path.join(os.path.dirname(DATASET_DIR), "screwvision_app", "backend")
+sys.path.insert(0, backend_dir)
+
+from preprocess import PAD_VALUE, letterbox_canvas  # noqa: E402
+
+# Packed dataset cache: every split becomes a handful of .npy files that are opened
+# with mmap, so loaders read random samples as zero-copy views with no JPEG decode
+# and no label parsing.
+#
+#   packed/{split}/images.npy   uint8 [N, S, S, 3]  BGR, letterboxed (same geometry as the backend)
+#   packed/{split}/labels.npy   float32 [M, 5]      class, x, y, w, h (YOLO, normalized to the source image)
+#   packed/{split}/offsets.npy  int64 [N + 1]       labels of sample i are labels[offsets[i]:offsets[i + 1]]
+#   packed/{split}/meta.npy     float32 [N, 5]      original_w, original_h, scale, pad_w, pad_h
+#   packed/{split}/index.json   names, image size and source file signatures (size, mtime) for staleness checks
+
+PACKED_DIR = os.path.join(DATASET_DIR, "packed")
+IMAGE_SIZE = 640
+INDEX_NAME = "index.json"
+
+
+def split_images(dataset_dir, split, sources_only=False):
+    img_dir = os.path.join(dataset_dir, split, "images")
+    if sources_only:
+        return source_images(img_dir, pipeline_suffixes())
+    return sorted(p for ext in ("*.jpg", "*.jpeg", "*.png") for p in glob.glob(os.path.join(img_dir, ext)))
+
+
+def label_path(img_path):
+    split_dir = os.path.dirname(os.path.dirname(img_path))
+    return os.path.join(split_dir, "labels", os.path.splitext(os.path.basename(img_path))[0] + ".txt")
+
+
+def read_label_rows(path):
+    """[K, 5] float32 (class, x, y, w, h); np.loadtxt also accepts the '1.0' class ids older runs wrote"""
+    if not os.path.exists(path):
+        return np.zeros((0, 5), dtype=np.float32)
+    rows = np.loadtxt(path, ndmin=2, dtype=np.float32)
+    return rows[:, :5] if rows.size else np.zeros((0, 5), dtype=np.float32)
+
+
+def file_signature(path):
+    try:
+        st = os.stat(path)
+        return [st.st_size, st.st_mtime_ns]
+    except OSError:
+        return None
+
+
+def source_signatures(image_paths):
+    return {
+        os.path.basename(p): [file_signature(p), file_signature(label_path(p))]
+        for p in image_paths
+    }
+
+
+def pack_split(dataset_dir, split, output_dir=PACKED_DIR, size=IMAGE_SIZE, sources_only=False, workers=None, force=False):
+    image_paths = split_images(dataset_dir, split, sources_only)
+    split_dir = os.path.join(output_dir, split)
+    index_path = os.path.join(split_dir, INDEX_NAME)
+    signatures = source_signatures(image_paths)
+
+    if not force and os.path.exists(index_path):
+        with open(index_path, 'r') as f:
+            index = json.load(f)
+        if (index.get("image_size") == size and index.get("sources_only", False) == sources_only
+                and index.get("sources") == signatures):
+            print(f"{split}: up to date ({len(image_paths)} images)")
+            return index_path
+
+    if not image_paths:
+        print(f"{split}: no images, skipped")
+        return None
+
+    os.makedirs(split_dir, exist_ok=True)
+    start = time.perf_counter()
+    n = len(image_paths)
+    # Written under a temporary name and renamed, so readers never see a half-written cache
+    tmp_images = os.path.join(split_dir, "images.tmp.npy")
+    images = np.lib.format.open_memmap(tmp_images, mode='w+', dtype=np.uint8, shape=(n, size, size, 3))
+    meta = np.zeros((n, 5), dtype=np.float32)
+    labels = [None] * n
+
+    def pack_one(i):
+        image = cv2.imread(image_paths[i])
+        if image is None:
+            images[i] = PAD_VALUE
+            labels[i] = np.zeros((0, 5), dtype=np.float32)
+            return False
+        scale, pad_w, pad_h = letterbox_canvas(image, images[i], size)
+        meta[i] = (image.shape[1], image.shape[0], scale, pad_w, pad_h)
+        labels[i] = read_label_rows(label_path(image_paths[i]))
+        return True
+
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        failed = [image_paths[i] for i, ok in enumerate(pool.map(pack_one, range(n))) if not ok]
+    images.flush()
+    del images
+
+    offsets = np.zeros(n + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(l) for l in labels])
+    np.save(os.path.join(split_dir, "labels.npy"), np.concatenate(labels).astype(np.float32))
+    np.save(os.path.join(split_dir, "offsets.npy"), offsets)
+    np.save(os.path.join(split_dir, "meta.npy"), meta)
+    os.replace(tmp_images, os.path.join(split_dir, "images.npy"))
+
+    with open(index_path, 'w') as f:
+        json.dump({
+            "split": split,
+            "image_size": size,
+            "names": [os.path.basename(p) for p in image_paths],
+            "unreadable": [os.path.basename(p) for p in failed],
+            "sources_only": sources_only,
+            "sources": signatures,
+        }, f)
+
+    mb = n * size * size * 3 / 1e6
+    print(f"{split}: packed {n} images, {offsets[-1]} boxes ({mb:.0f} MB) in {time.perf_counter() - start:.1f}s")
+    for path in failed:
+        print(f"  Warning: could not read {path}")
+    return index_path
+
+
+class PackedDataset:
+    """
+    Read-only view of a packed split. Arrays are memory-mapped: indexing returns
+    views into the page cache, nothing is decoded or copied until the caller
+    writes to them.
+    """
+
+    def __init__(self, split, packed_dir=PACKED_DIR):
+        split_dir = os.path.join(packed_dir, split)
+        with open(os.path.join(split_dir, INDEX_NAME), 'r') as f:
+            index = json.load(f)
+        self.split = split
+        self.index = index
+        self.names = index["names"]
+        self.image_size = index["image_size"]
+        self.images = np.load(os.path.join(split_dir, "images.npy"), mmap_mode='r')
+        self.labels = np.load(os.path.join(split_dir, "labels.npy"), mmap_mode='r')
+        self.offsets = np.load(os.path.join(split_dir, "offsets.npy"))
+        self.meta = np.load(os.path.join(split_dir, "meta.npy"))
+
+    def __len__(self):
+        return len(self.names)
+
+    def is_current(self, dataset_dir=DATASET_DIR):
+        """True if no source image or label changed, appeared or disappeared since packing"""
+        paths = split_images(dataset_dir, self.split, self.index.get("sources_only", False))
+        return self.index.get("sources") == source_signatures(paths)
+
+    def __getitem__(self, i):
+        """(letterboxed BGR image view, [K, 5] label view)"""
+        return self.images[i], self.labels[self.offsets[i]:self.offsets[i + 1]]
+
+    def letterboxed_boxes(self, i):
+        """Labels of sample i as [K, 5] (class, x1, y1, x2, y2) in letterboxed pixels"""
+        rows = np.asarray(self.labels[self.offsets[i]:self.offsets[i + 1]], dtype=np.float32)
+        original_w, original_h, scale, pad_w, pad_h = self.meta[i]
+        out = np.empty_like(rows)
+        out[:, 0] = rows[:, 0]
+        cx, cy = rows[:, 1] * original_w, rows[:, 2] * original_h
+        half_w, half_h = rows[:, 3] * original_w / 2, rows[:, 4] * original_h / 2
+        out[:, 1] = (cx - half_w) * scale + pad_w
+        out[:, 2] = (cy - half_h) * scale + pad_h
+        out[:, 3] = (cx + half_w) * scale + pad_w
+        out[:, 4] = (cy + half_h) * scale + pad_h
+        return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pack dataset splits into memory-mapped .npy caches")
+    parser.add_argument("--splits", nargs='+', default=SETS, choices=SETS)
+    parser.add_argument("--output", default=PACKED_DIR)
+    parser.add_argument("--size", type=int, default=IMAGE_SIZE, help="Letterbox size (model input size)")
+    parser.add_argument("--sources-only", action='store_true', help="Skip augmented copies left in images/ folders")
+    parser.add_argument("--workers", type=int, default=None, help="Decode threads (default: all cores)")
+    parser.add_argument("--force", action='store_true', help="Repack even if the cache is up to date")
+    args = parser.parse_args()
+
+    for split in args.splits:
+        pack_split(DATASET_DIR, split, args.output, args.size, args.sources_only, args.workers, args.force)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+ScrewVision - Sunucu tarafinda isaretlenmis goruntu
+Goruntu istek basina bir kez, cizim cozunurlugunde decode edilir; tespit ve
+cizim ayni diziyi kullanir.
+Sinif etiketleri ve rakamlar olcek basina bir kez renkli zeminle onceden
+cizilip onbellekte tutulur; her tespit icin sadece yamalar kopyalanir.
+"""
+
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+# Hershey fontlari sadece ASCII cizer
+_ASCII = str.maketrans("çğıöşüÇĞİÖŞÜ", "cgiosuCGIOSU")
+
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+TEXT_COLOR = (255, 255, 255)
+DEFAULT_COLOR = (255, 255, 255)
+
+# format -> (uzanti, kalite bayragi, media type)
+IMAGE_FORMATS = {
+    "jpeg": (".jpg", cv2.IMWRITE_JPEG_QUALITY, "image/jpeg"),
+    "webp": (".webp", cv2.IMWRITE_WEBP_QUALITY, "image/webp"),
+}
+
+# Guven yuzdesinde gecen karakterler
+_CHARS = "0123456789%"
+
+
+class GlyphCache:
+    """
+    Sinif etiketi ("Phillips (PH) ") ve rakam yamalari, sinif rengi zeminde
+    Anahtar: (sinif, olcek); olcek 0.1 adimlarla yuvarlandigi icin az sayida kalir
+    """
+
+    def __init__(self, labels: List[str], colors: List[Tuple[int, int, int]]):
+        self.labels = [label.translate(_ASCII) for label in labels]
+        self.colors = [tuple(int(c) for c in color) for color in colors]
+        self._patches: Dict[tuple, np.ndarray] = {}
+
+    def color(self, class_id: int) -> Tuple[int, int, int]:
+        return self.colors[class_id] if 0 <= class_id < len(self.colors) else DEFAULT_COLOR
+
+    @staticmethod
+    def font_scale(width: int, height: int) -> float:
+        """Cikti boyutuna gore yazi olcegi (1000 px kisa kenarda 1.0)"""
+        return max(0.4, round(min(width, height) / 1000.0, 1))
+
+    def prerender(self, scales):
+        """Verilen olceklerde tum sinif / karakter yamalarini onceden ciz"""
+        for scale in scales:
+            for class_id in range(len(self.labels)):
+                for kind in ("label", "end", *_CHARS):
+                    self._patch(class_id, kind, scale)
+
+    def text_patch(self, class_id: int, confidence: float, scale: float) -> np.ndarray:
+        """"<etiket> <yuzde>%" yamasi; parcalar onbellekten birlestirilir"""
+        parts = [self._patch(class_id, "label", scale)]
+        parts.extend(
+            self._patch(class_id, char, scale) for char in f"{round(confidence * 100)}%"
+        )
+        parts.append(self._patch(class_id, "end", scale))
+        return np.hstack(parts)
+
+    def _patch(self, class_id: int, kind: str, scale: float) -> np.ndarray:
+        key = (class_id, kind, scale)
+        patch = self._patches.get(key)
+        if patch is None:
+            patch = self._patches[key] = self._render(class_id, kind, scale)
+        return patch
+
+    def _render(self, class_id: int, kind: str, scale: float) -> np.ndarray:
+        thickness = max(1, round(scale * 2))
+        pad = max(2, round(scale * 4))
+        # Tum yamalar ayni yukseklikte ve ayni taban cizgisinde
+        (_, text_h), baseline = cv2.getTextSize("0%Hgj()", FONT, scale, thickness)
+        height = text_h + baseline + 2 * pad
+
+        if kind == "end":
+            text, left, width = "", 0, pad
+        else:
+            if kind == "label":
+                name = (
+                    self.labels[class_id]
+                    if 0 <= class_id < len(self.labels)
+                    else f"class_{class_id}"
+                )
+                text, left = f"{name} ", pad
+            else:
+                text, left = kind, 0
+            width = left + cv2.getTextSize(text, FONT, scale, thickness)[0][0]
+
+        patch = np.empty((height, width, 3), dtype=np.uint8)
+        patch[:] = self.color(class_id)
+        if text:
+            cv2.putText(
+                patch, text, (left, pad + text_h), FONT, scale, TEXT_COLOR, thickness, cv2.LINE_AA
+            )
+        return patch
+
+
+def draw_detections(
+    image: np.ndarray,
+    detections: List[Dict],
+    original_size: Optional[Tuple[int, int]],
+    max_dim: int,
+    glyphs: GlyphCache,
+) -> np.ndarray:
+    """
+    Tespitleri ciz; uzun kenar max_dim'i asarsa once kucultulur (0 = boyut korunur)
+    image kucultulmezse yerinde cizilir. Kutular original_size (kaynak w, h)
+    koordinatlarindadir.
+    """
+    h, w = image.shape[:2]
+    if max_dim and max(w, h) > max_dim:
+        scale = max_dim / max(w, h)
+        canvas = cv2.resize(
+            image, (max(1, round(w * scale)), max(1, round(h * scale))), interpolation=cv2.INTER_AREA
+        )
+    else:
+        canvas = image
+    out_h, out_w = canvas.shape[:2]
+    factor = out_w / (original_size[0] if original_size else w)
+
+    font_scale = glyphs.font_scale(out_w, out_h)
+    thickness = max(2, round(font_scale * 3))
+
+    boxes = []
+    for d in detections:
+        b = d["bbox"]
+        x1, y1 = int(b["x1"] * factor), int(b["y1"] * factor)
+        x2, y2 = int(b["x2"] * factor), int(b["y2"] * factor)
+        cv2.rectangle(canvas, (x1, y1), (x2, y2), glyphs.color(d["class_id"]), thickness)
+        boxes.append((x1, y1))
+
+    # Etiketler kutularin ustunde kalsin diye ikinci turda
+    for d, (x1, y1) in zip(detections, boxes):
+        patch = glyphs.text_patch(d["class_id"], d["confidence"], font_scale)
+        ph, pw = patch.shape[:2]
+        # Kutunun ustune, yer yoksa kutunun icine
+        top = y1 - ph if y1 >= ph else max(y1, 0)
+        left = min(max(x1, 0), max(out_w - pw, 0))
+        visible = canvas[top : top + ph, left : left + pw]
+        visible[...] = patch[: visible.shape[0], : visible.shape[1]]
+
+    return canvas
+
+
+def encode_image(image: np.ndarray, fmt: str = "jpeg", quality: int = 85) -> np.ndarray:
+    """Goruntuyu JPEG / WebP olarak kodla (cv2.imencode tamponu)"""
+    ext, flag, _ = IMAGE_FORMATS[fmt]
+    ok, buf = cv2.imencode(ext, image, [flag, int(quality)])
+    if not ok:
+        raise RuntimeError(f"{fmt} kodlanamadi")
+    return buf
+
+
+def iter_chunks(buf: np.ndarray, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+    """Kodlanmis tamponu parca parca gonder (tam kopyasi olusturulmaz)"""
+    view = memoryview(buf).cast("B")
+    for start in range(0, len(view), chunk_size):
+        yield bytes(view[start : start + chunk_size])
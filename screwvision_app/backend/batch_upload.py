@@ -0,0 +1,69 @@
+"""
+ScrewVision - Toplu yukleme kaynaklari
+Cok dosyali yuklemelerden ve zip / tar arsivlerinden goruntuleri tek tek
+okur; arsiv icerigi bellege toplu alinmaz, uyeler sirayla acilir
+"""
+
+import os
+import tarfile
+import zipfile
+from typing import BinaryIO, Iterator, Optional, Tuple
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".webp")
+ARCHIVE_EXTENSIONS = (".zip", ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tar.xz")
+ARCHIVE_CONTENT_TYPES = (
+    "application/zip",
+    "application/x-zip-compressed",
+    "application/x-tar",
+    "application/gzip",
+    "application/x-gzip",
+    "application/x-bzip2",
+    "application/x-xz",
+)
+
+
+def is_image_name(name: str) -> bool:
+    return name.lower().endswith(IMAGE_EXTENSIONS)
+
+
+def is_archive(filename: Optional[str], content_type: Optional[str]) -> bool:
+    name = (filename or "").lower()
+    return name.endswith(ARCHIVE_EXTENSIONS) or (content_type or "") in ARCHIVE_CONTENT_TYPES
+
+
+def _skip_member(name: str) -> bool:
+    # Dizinler, gizli dosyalar ve macOS arsiv artiklari
+    base = os.path.basename(name)
+    return not base or base.startswith(".") or "__MACOSX/" in name or not is_image_name(name)
+
+
+def iter_archive_images(fileobj: BinaryIO, max_member_bytes: int) -> Iterator[Tuple[str, bytes]]:
+    """
+    Arsivdeki goruntuleri (ad, bayt) olarak sirayla dondur
+    Bloklar - havuzdaki bir thread'den cagrilmali. max_member_bytes'i asan
+    uyeler icin bayt yerine None doner.
+    """
+    fileobj.seek(0)
+    if zipfile.is_zipfile(fileobj):
+        fileobj.seek(0)
+        with zipfile.ZipFile(fileobj) as archive:
+            for info in archive.infolist():
+                if info.is_dir() or _skip_member(info.filename):
+                    continue
+                if info.file_size > max_member_bytes:
+                    yield info.filename, None
+                    continue
+                yield info.filename, archive.read(info)
+        return
+
+    fileobj.seek(0)
+    # Sirali okuma: tar uyeleri baslik baslik ilerler, tum arsiv acilmaz
+    with tarfile.open(fileobj=fileobj, mode="r|*") as archive:
+        for member in archive:
+            if not member.isfile() or _skip_member(member.name):
+                continue
+            if member.size > max_member_bytes:
+                yield member.name, None
+                continue
+            handle = archive.extractfile(member)
+            yield member.name, handle.read() if handle is not None else None
@@ -0,0 +1,202 @@
+"""
+ScrewVision - Dinamik mikro-batch inference zamanlayicisi
+Eszamanli istekleri tek bir NCHW batch'te toplayip ONNX session'i bir kez calistirir
+"""
+
+import asyncio
+import threading
+import time
+from typing import Callable, List, Optional
+
+import numpy as np
+
+
+class BatchScheduler:
+    """
+    Arka planda calisan batch toplayici
+
+    submit() ile gelen [1, 3, H, W] tensorleri kuyruga alinir. Zamanlayici ilk
+    istekten sonra en fazla max_wait_ms bekler ya da max_batch_size dolana kadar
+    toplar, session.run'i tek seferde cagirir ve her sonucu kendi future'ina yollar.
+    """
+
+    def __init__(
+        self,
+        session_getter: Callable,
+        max_batch_size: int = 8,
+        max_wait_ms: float = 5.0,
+        executor=None,
+        max_concurrent_batches: int = 1,
+        on_batch: Optional[Callable[[int, float, List[float]], None]] = None,
+    ):
+        self.session_getter = session_getter
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait_ms = max(0.0, float(max_wait_ms))
+        self.executor = executor
+        self.max_concurrent_batches = max(1, int(max_concurrent_batches))
+        # Metrik kancasi: on_batch(batch boyutu, model suresi sn, kuyrukta bekleme sureleri sn)
+        self.on_batch = on_batch
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._dispatching = set()
+        self._local = threading.local()
+
+        # Basit istatistikler (/health icin)
+        self.batches_run = 0
+        self.items_run = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    @property
+    def mean_batch_size(self) -> float:
+        return self.items_run / self.batches_run if self.batches_run else 0.0
+
+    async def start(self):
+        """Zamanlayici gorevini baslat"""
+        if self.running:
+            return
+        self._queue = asyncio.Queue()
+        self._slots = asyncio.Semaphore(self.max_concurrent_batches)
+        self._task = asyncio.get_running_loop().create_task(self._run_loop())
+
+    async def stop(self):
+        """Zamanlayiciyi durdur, bekleyen istekleri iptal et"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        while self._queue is not None and not self._queue.empty():
+            _, future, _ = self._queue.get_nowait()
+            if not future.done():
+                future.cancel()
+
+    async def submit(self, input_tensor: np.ndarray) -> List[np.ndarray]:
+        """
+        Tek goruntuluk tensoru kuyruga ekle ve model ciktisini bekle
+        Donus: session.run ile ayni yapida, batch boyutu 1 olan cikti listesi
+        """
+        if not self.running:
+            await self.start()
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((input_tensor, future, time.perf_counter()))
+        return await future
+
+    def session_batch_limit(self, session) -> int:
+        """Model sabit batch boyutuyla export edildiyse onu kullan"""
+        batch_dim = session.get_inputs()[0].shape[0]
+        if isinstance(batch_dim, int) and batch_dim > 0:
+            return min(self.max_batch_size, batch_dim)
+        return self.max_batch_size
+
+    async def _collect(self, first, limit: int) -> list:
+        """Ilk istekten sonra limit veya sure dolana kadar topla"""
+        batch = [first]
+        deadline = time.perf_counter() + self.max_wait_ms / 1000.0
+
+        while len(batch) < limit:
+            # Zaten bekleyenleri beklemeden al
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+
+        # Istemcisi vazgecmis istekleri at
+        return [item for item in batch if not item[1].done()]
+
+    def _batch_buffer(self, sample: np.ndarray, size: int) -> np.ndarray:
+        """Is parcacigina ozel, yeniden kullanilan NCHW batch tamponu"""
+        shape = (self.max_batch_size,) + sample.shape[1:]
+        buffer = getattr(self._local, "buffer", None)
+        if buffer is None or buffer.shape != shape or buffer.dtype != sample.dtype:
+            buffer = self._local.buffer = np.empty(shape, dtype=sample.dtype)
+        return buffer[:size]
+
+    def _run_batch(self, session, tensors: List[np.ndarray]) -> List[np.ndarray]:
+        # Surec havuzu tensorleri birlestirmeden kendi paylasimli bellegine alir
+        run_tensors = getattr(session, "run_tensors", None)
+        if run_tensors is not None:
+            return run_tensors(tensors)
+        input_name = session.get_inputs()[0].name
+        if len(tensors) == 1:
+            batch = tensors[0]
+        else:
+            batch = np.concatenate(
+                tensors, axis=0, out=self._batch_buffer(tensors[0], len(tensors))
+            )
+        return session.run(None, {input_name: batch})
+
+    async def _dispatch(self, session, batch: list):
+        """Batch'i executor'da calistir ve sonuclari dagit"""
+        loop = asyncio.get_running_loop()
+        tensors = [tensor for tensor, _, _ in batch]
+        dispatched = time.perf_counter()
+        try:
+            outputs = await loop.run_in_executor(
+                self.executor, self._run_batch, session, tensors
+            )
+        except Exception as e:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            self._slots.release()
+
+        self.batches_run += 1
+        self.items_run += len(batch)
+        if self.on_batch is not None:
+            self.on_batch(
+                len(batch),
+                time.perf_counter() - dispatched,
+                [dispatched - enqueued for _, _, enqueued in batch],
+            )
+
+        # Her istege kendi satirini gonder
+        for i, (_, future, _) in enumerate(batch):
+            if not future.done():
+                future.set_result([output[i : i + 1] for output in outputs])
+
+    async def _run_loop(self):
+        loop = asyncio.get_running_loop()
+
+        while True:
+            # Bos calisma yuvasi yokken istekler kuyrukta birikir, batch'ler dolar
+            await self._slots.acquire()
+            first = await self._queue.get()
+            try:
+                session = self.session_getter()
+            except Exception as e:
+                self._slots.release()
+                if not first[1].done():
+                    first[1].set_exception(e)
+                continue
+
+            batch = await self._collect(first, self.session_batch_limit(session))
+            if not batch:
+                self._slots.release()
+                continue
+
+            # Referansi tut, calisan gorev toplanmasin
+            task = loop.create_task(self._dispatch(session, batch))
+            self._dispatching.add(task)
+            task.add_done_callback(self._dispatching.discard)
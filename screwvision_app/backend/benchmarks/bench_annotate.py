@@ -0,0 +1,166 @@
+"""
+Isaretlenmis goruntu benchmark: decode + cizim + kodlama maliyeti
+
+Eski yol: tespit icin indirgenmis decode, sonra istemcideki gibi JPEG'i tam
+cozunurlukte yeniden decode et, her tespit icin rectangle + getTextSize + putText,
+sonra kucult ve kodla
+Yeni yol (/detect/annotated): tek decode (max_dim cozunurlugunde), tespit ve cizim
+ayni diziyi kullanir; sinif etiketleri ve rakamlar onbellekten yama olarak kopyalanir
+
+Telefon cozunurluklerinde (4032x3024, 1920x1080, 1280x720), JPEG / WebP ve
+farkli max_dim degerleri icin istek basina decode sayisi (cv2.imdecode cagrisi),
+decode + cizim, kodlama ve toplam sure (p50) ile cikti boyutunu yazar.
+
+Kullanim (screwvision_app/backend dizininden):
+    python benchmarks/bench_annotate.py --repeat 20 --detections 20
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import main  # noqa: E402
+from annotate import FONT, GlyphCache, draw_detections, encode_image  # noqa: E402
+from bench_preprocess import RESOLUTIONS, sample_jpeg  # noqa: E402
+
+
+def synthetic_detections(width, height, count, seed=0):
+    """Goruntuye dagilmis rastgele sinif / guven / kutu"""
+    rng = np.random.default_rng(seed)
+    detections = []
+    for _ in range(count):
+        bw, bh = rng.uniform(0.05, 0.2) * width, rng.uniform(0.05, 0.2) * height
+        x1, y1 = rng.uniform(0, width - bw), rng.uniform(0, height - bh)
+        detections.append(
+            {
+                "class_id": int(rng.integers(len(main.CLASS_NAMES))),
+                "confidence": round(float(rng.uniform(0.25, 1.0)), 3),
+                "bbox": {"x1": x1, "y1": y1, "x2": x1 + bw, "y2": y1 + bh},
+            }
+        )
+    return detections
+
+
+def legacy_render(data, detections, max_dim):
+    """Yeniden decode + tam cozunurlukte tespit basina putText, sonra kucultme"""
+    image = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+    h, w = image.shape[:2]
+    font_scale = GlyphCache.font_scale(w, h)
+    thickness = max(2, round(font_scale * 3))
+    for d in detections:
+        name = main.CLASS_NAMES[d["class_id"]]
+        color = main.CLASS_COLORS[name]
+        b = d["bbox"]
+        x1, y1, x2, y2 = int(b["x1"]), int(b["y1"]), int(b["x2"]), int(b["y2"])
+        cv2.rectangle(image, (x1, y1), (x2, y2), color, thickness)
+        text = f"{main.CLASS_LABELS_TR[name]} {round(d['confidence'] * 100)}%"
+        (tw, th), baseline = cv2.getTextSize(text, FONT, font_scale, thickness)
+        cv2.rectangle(image, (x1, y1 - th - baseline), (x1 + tw, y1), color, -1)
+        cv2.putText(image, text, (x1, y1 - baseline), FONT, font_scale, (255, 255, 255), thickness)
+    if max_dim and max(w, h) > max_dim:
+        scale = max_dim / max(w, h)
+        image = cv2.resize(image, (round(w * scale), round(h * scale)), interpolation=cv2.INTER_AREA)
+    return image
+
+
+class DecodeCounter:
+    """cv2.imdecode cagrilarini sayar (preprocess.decode_image da ayni modulu kullanir)"""
+
+    def __init__(self):
+        self.calls = 0
+        self._imdecode = cv2.imdecode
+
+    def __enter__(self):
+        def counted(*args, **kwargs):
+            self.calls += 1
+            return self._imdecode(*args, **kwargs)
+
+        cv2.imdecode = counted
+        return self
+
+    def __exit__(self, *exc):
+        cv2.imdecode = self._imdecode
+
+
+def measure(render, encode, repeat):
+    """(istek basina decode, cizim p50 ms, kodlama p50 ms, toplam p50 ms, cikti KB)"""
+    render_ms, encode_ms, total_ms = [], [], []
+    size = 0
+    with DecodeCounter() as decodes:
+        for i in range(repeat + 1):
+            start = time.perf_counter()
+            image = render()
+            mid = time.perf_counter()
+            size = len(encode(image))
+            end = time.perf_counter()
+            if i:  # ilk tur isinma
+                render_ms.append((mid - start) * 1000)
+                encode_ms.append((end - mid) * 1000)
+                total_ms.append((end - start) * 1000)
+    per_request = decodes.calls / (repeat + 1)
+    return per_request, np.median(render_ms), np.median(encode_ms), np.median(total_ms), size / 1024
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--detections", type=int, default=20)
+    parser.add_argument("--max-dims", type=int, nargs="+", default=[1280, 0])
+    parser.add_argument("--formats", nargs="+", default=["jpeg", "webp"])
+    parser.add_argument("--quality", type=int, default=main.ANNOTATE_QUALITY)
+    args = parser.parse_args()
+
+    print(
+        f"{'cozunurluk':>12} | {'max_dim':>7} | {'format':>6} | {'yol':>4} | {'decode':>6} | "
+        f"{'decode+cizim ms':>15} | {'kodlama ms':>10} | {'toplam ms':>9} | {'KB':>7}"
+    )
+    for width, height in RESOLUTIONS:
+        data = sample_jpeg(width, height)
+        detections = synthetic_detections(width, height, args.detections)
+        for max_dim in args.max_dims:
+            target = max(main.INPUT_SIZE, max_dim) if max_dim and main.REDUCED_DECODE else None
+            detect_target = main.INPUT_SIZE if main.REDUCED_DECODE else None
+            glyphs = GlyphCache(
+                [main.CLASS_LABELS_TR[n] for n in main.CLASS_NAMES],
+                [main.CLASS_COLORS[n] for n in main.CLASS_NAMES],
+            )
+
+            def legacy():
+                # Tespit icin decode, sonra cizim icin tam cozunurlukte yeniden
+                main.decode_image(data, detect_target)
+                return legacy_render(data, detections, max_dim)
+
+            def fresh_render():
+                # Sunucudaki tek decode: tespit ve cizim ayni diziyi kullanir
+                decoded, original_size = main.decode_image(data, target)
+                return draw_detections(decoded, detections, original_size, max_dim, glyphs)
+
+            for fmt in args.formats:
+
+                def encode(image):
+                    return encode_image(image, fmt, args.quality)
+
+                for label, render in (
+                    ("eski", legacy),
+                    ("yeni", fresh_render),
+                ):
+                    decodes, render_ms, encode_ms, total_ms, kb = measure(
+                        render, encode, args.repeat
+                    )
+                    print(
+                        f"{width}x{height:<7} | {max_dim or 'kaynak':>7} | {fmt:>6} | {label:>4} | "
+                        f"{decodes:6.0f} | "
+                        f"{render_ms:15.2f} | {encode_ms:10.2f} | {total_ms:9.2f} | {kb:7.1f}"
+                    )
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,133 @@
+"""
+Paketli (memmap) veri onbellegi ile ham klasor karsilastirmasi
+
+Ham: her ornek icin JPEG decode + letterbox + etiket dosyasi ayristirma
+Paketli: screwVision_data/pack_dataset.py ciktisi; ornekler memmap gorunumleri
+
+Iki olcum:
+  epoch 0  - veri setini acip tum ornekleri bir kez okuma (dosyalar once sayfa
+             onbelleginden cikarilir, posix_fadvise destekleniyorsa)
+  kararli  - isinmis onbellekle rastgele sirada ornek/s
+Her iki yukleyici de ornegi bir batch tamponuna kopyalar (egitim/eval'in yaptigi gibi).
+
+Kullanim (screwvision_app/backend dizininden; once pack_dataset.py calistirilmali):
+    python benchmarks/bench_dataset_cache.py --split train --passes 3
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(BACKEND_DIR)), "screwVision_data")
+sys.path.insert(0, DATA_DIR)
+sys.path.insert(0, BACKEND_DIR)
+
+import cv2  # noqa: E402
+from pack_dataset import (  # noqa: E402
+    PACKED_DIR,
+    PackedDataset,
+    label_path,
+    read_label_rows,
+    split_images,
+)
+from preprocess import letterbox_canvas  # noqa: E402
+
+
+def drop_page_cache(paths):
+    """Dosyalari sayfa onbelleginden cikarmayi dene (Linux); desteklenmiyorsa sessizce gec"""
+    if not hasattr(os, "posix_fadvise"):
+        return False
+    for path in paths:
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except OSError:
+            continue
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        finally:
+            os.close(fd)
+    return True
+
+
+class RawFolder:
+    """Paketlenmemis klasor: her erisimde decode + letterbox + etiket okuma"""
+
+    def __init__(self, split, size):
+        self.paths = split_images(DATA_DIR, split)
+        self.size = size
+        self._canvas = np.empty((size, size, 3), dtype=np.uint8)
+
+    def __len__(self):
+        return len(self.paths)
+
+    def __getitem__(self, i):
+        image = cv2.imread(self.paths[i])
+        letterbox_canvas(image, self._canvas, self.size)
+        return self._canvas, read_label_rows(label_path(self.paths[i]))
+
+
+def run_epoch(dataset, order, batch):
+    """Ornekleri batch tamponuna kopyalayarak bir tur; (sure sn, kutu sayisi)"""
+    image, _ = dataset[int(order[0])]
+    buffer = np.empty((batch,) + image.shape, dtype=np.uint8)
+    boxes = 0
+    start = time.perf_counter()
+    for j, i in enumerate(order):
+        image, labels = dataset[int(i)]
+        buffer[j % batch] = image
+        boxes += len(labels)
+    return time.perf_counter() - start, boxes
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--split", default="train")
+    parser.add_argument("--packed", default=PACKED_DIR)
+    parser.add_argument("--passes", type=int, default=3, help="Kararli durum tur sayisi")
+    parser.add_argument("--batch", type=int, default=16)
+    args = parser.parse_args()
+
+    split_dir = os.path.join(args.packed, args.split)
+    if not os.path.exists(os.path.join(split_dir, "index.json")):
+        sys.exit(f"[HATA] Paket bulunamadi: {split_dir} (once screwVision_data/pack_dataset.py)")
+
+    raw_files = split_images(DATA_DIR, args.split)
+    raw_files += [label_path(p) for p in raw_files]
+    packed_files = glob.glob(os.path.join(split_dir, "*.npy"))
+    rng = np.random.default_rng(0)
+
+    print(f"Bolum: {args.split}, batch tamponu: {args.batch}, kararli tur: {args.passes}\n")
+    print(f"{'kaynak':>8} | {'epoch 0 sn':>10} | {'epoch 0 ornek/s':>15} | {'kararli ornek/s':>15}")
+
+    results = {}
+    for name, open_dataset, files in (
+        ("ham", lambda: RawFolder(args.split, PackedDataset(args.split, args.packed).image_size), raw_files),
+        ("paketli", lambda: PackedDataset(args.split, args.packed), packed_files),
+    ):
+        cold = drop_page_cache(files)
+        start = time.perf_counter()
+        dataset = open_dataset()
+        run_epoch(dataset, np.arange(len(dataset)), args.batch)
+        epoch0 = time.perf_counter() - start
+
+        rates = []
+        for _ in range(args.passes):
+            seconds, _ = run_epoch(dataset, rng.permutation(len(dataset)), args.batch)
+            rates.append(len(dataset) / seconds)
+        steady = float(np.median(rates))
+        results[name] = (epoch0, steady)
+        print(f"{name:>8} | {epoch0:10.2f} | {len(dataset) / epoch0:15.1f} | {steady:15.1f}")
+
+    raw, packed = results["ham"], results["paketli"]
+    print(f"\nHizlanma: epoch 0 {raw[0] / packed[0]:.1f}x, kararli {packed[1] / raw[1]:.1f}x")
+    if not cold:
+        print("[UYARI] Sayfa onbellegi bosaltilamadi; epoch 0 sicak onbellekle olculdu")
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,102 @@
+"""
+Kabul asamasi benchmark: istek basina decode suresi ve tepe bellek
+
+Eski yol: yuklemenin tamami + tam cozunurlukte cv2.imdecode (base64'te once
+tum metin cozulur)
+Yeni yol: ilk parcada bicim / boyut kontrolu + INPUT_SIZE'i kapsayan en kucuk
+IMREAD_REDUCED olcekte decode
+
+Telefon cozunurluklerinde (4032x3024, 1920x1080, 1280x720) multipart ve base64
+yollari icin ortalama/p50 sure ve tracemalloc tepe bellegi yazar. Son satir,
+piksel siniri asan bir PNG'nin (varsayilan 9000x6000) decode edilmeden
+reddedilmesini tam decode ile karsilastirir.
+
+Kullanim (screwvision_app/backend dizininden):
+    python benchmarks/bench_ingest.py --repeat 20
+"""
+
+import argparse
+import base64
+import os
+import sys
+
+import cv2
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import main  # noqa: E402
+from bench_preprocess import RESOLUTIONS, measure, sample_jpeg  # noqa: E402
+from ingest import PROBE_BYTES, RejectedImage, probe_base64, probe_image  # noqa: E402
+from preprocess import decode_image  # noqa: E402
+
+
+def legacy_decode(data):
+    return cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+
+
+def ingest_decode(data):
+    probe_image(data[:PROBE_BYTES], main.MAX_IMAGE_PIXELS)
+    return decode_image(data, main.INPUT_SIZE)
+
+
+def legacy_base64(text):
+    return legacy_decode(base64.b64decode(text))
+
+
+def ingest_base64(text):
+    probe_base64(text, main.MAX_UPLOAD_BYTES, main.MAX_IMAGE_PIXELS)
+    return decode_image(base64.b64decode(text), main.INPUT_SIZE)
+
+
+def rejecting(fn):
+    def run(data):
+        try:
+            fn(data)
+        except RejectedImage:
+            pass
+
+    return run
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--bomb", type=int, nargs=2, default=[9000, 6000], metavar=("W", "H"))
+    args = parser.parse_args()
+
+    print(
+        f"{'cozunurluk':>12} | {'giris':>9} | {'yol':>4} | {'ort ms':>8} | "
+        f"{'p50 ms':>8} | {'tepe MB':>8}"
+    )
+
+    def row(name, kind, label, fn, data):
+        mean_ms, p50_ms, peak_mb = measure(fn, data, args.repeat)
+        print(
+            f"{name:>12} | {kind:>9} | {label:>4} | {mean_ms:8.2f} | "
+            f"{p50_ms:8.2f} | {peak_mb:8.2f}"
+        )
+
+    for width, height in RESOLUTIONS:
+        data = sample_jpeg(width, height)
+        text = base64.b64encode(data).decode()
+        name = f"{width}x{height}"
+        row(name, "multipart", "eski", legacy_decode, data)
+        row(name, "multipart", "yeni", ingest_decode, data)
+        row(name, "base64", "eski", legacy_base64, text)
+        row(name, "base64", "yeni", ingest_base64, text)
+
+    # Duz renkli PNG kucuk sikisir, decode edilince W*H*3 bayt acar
+    width, height = args.bomb
+    ok, png = cv2.imencode(".png", np.zeros((height, width, 3), dtype=np.uint8))
+    png = png.tobytes()
+    name = f"{width}x{height}"
+    print(f"\nPNG {name} ({len(png) / 1024:.0f} KB), piksel siniri {main.MAX_IMAGE_PIXELS}")
+    row(name, "png", "eski", legacy_decode, png)
+    row(name, "png", "ret", rejecting(ingest_decode), png)
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,156 @@
+"""
+postprocess_detections mikro-benchmark ve parite kontrolu
+
+Eski satir-satir dongu (legacy) ile vektorel yolun ayni tespitleri
+urettigini dogrular ve cagri basina gecikmeyi karsilastirir.
+
+Kullanim (screwvision_app/backend dizininden):
+    python benchmarks/bench_postprocess.py
+    python benchmarks/bench_postprocess.py --model models/best.onnx --split valid
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+import main  # noqa: E402
+
+DATA_DIR = os.path.join(BACKEND_DIR, "..", "..", "screwVision_data")
+
+
+def legacy_postprocess(
+    outputs, scale, pad_w, pad_h, original_w, original_h,
+    confidence_threshold=0.25, iou_threshold=0.45,
+):
+    """Onceki surumdeki satir-satir postprocess (referans)"""
+    output = outputs[0]
+    if len(output.shape) == 3:
+        output = output[0]
+    if output.shape[0] < output.shape[1]:
+        output = output.T
+
+    boxes, scores, class_ids = [], [], []
+    for detection in output:
+        x_center, y_center, w, h = detection[:4]
+        class_scores = detection[4:]
+        class_id = np.argmax(class_scores)
+        confidence = class_scores[class_id]
+        if confidence < confidence_threshold:
+            continue
+
+        x1 = (x_center - w / 2 - pad_w) / scale
+        y1 = (y_center - h / 2 - pad_h) / scale
+        x2 = (x_center + w / 2 - pad_w) / scale
+        y2 = (y_center + h / 2 - pad_h) / scale
+
+        boxes.append([
+            max(0, min(x1, original_w)), max(0, min(y1, original_h)),
+            max(0, min(x2, original_w)), max(0, min(y2, original_h)),
+        ])
+        scores.append(float(confidence))
+        class_ids.append(int(class_id))
+
+    detections = []
+    if boxes:
+        # NMSBoxes [x, y, w, h] bekler
+        rects = [[x1, y1, x2 - x1, y2 - y1] for x1, y1, x2, y2 in boxes]
+        indices = cv2.dnn.NMSBoxes(
+            rects, scores, confidence_threshold, iou_threshold
+        )
+        for idx in np.asarray(indices).flatten():
+            x1, y1, x2, y2 = boxes[idx]
+            class_id = class_ids[idx]
+            detections.append({
+                "class_id": class_id,
+                "confidence": round(scores[idx], 3),
+                "bbox": {"x1": int(x1), "y1": int(y1), "x2": int(x2), "y2": int(y2)},
+            })
+    return detections
+
+
+def strip(detections):
+    """Karsilastirma icin sadece sayisal alanlari tut"""
+    return [
+        (d["class_id"], d["confidence"], tuple(d["bbox"].values()))
+        for d in detections
+    ]
+
+
+def model_cases(model_path, split, limit):
+    """Gercek model ciktilari (dogrulama goruntuleri uzerinde)"""
+    main.MODEL_PATH = model_path
+    session = main.load_model()
+    input_name = session.get_inputs()[0].name
+
+    paths = sorted(glob.glob(os.path.join(DATA_DIR, split, "images", "*.jpg")))
+    for path in paths[:limit]:
+        image = cv2.imread(path)
+        if image is None:
+            continue
+        tensor, *meta = main.preprocess_image(image)
+        yield os.path.basename(path), session.run(None, {input_name: tensor}), meta
+
+
+def synthetic_cases(count, num_classes=5, anchors=8400):
+    """Model yoksa rastgele YOLOv8 benzeri ciktilar"""
+    rng = np.random.default_rng(0)
+    for i in range(count):
+        out = np.empty((1, 4 + num_classes, anchors), dtype=np.float32)
+        out[0, :2] = rng.uniform(0, 640, (2, anchors))
+        out[0, 2:4] = rng.uniform(5, 200, (2, anchors))
+        out[0, 4:] = rng.beta(0.3, 6.0, (num_classes, anchors))
+        yield f"synthetic_{i}", [out], (0.5, 0, 80, 1280, 960)
+
+
+def time_call(fn, args, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(*args)
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--model", default=main.MODEL_PATH)
+    parser.add_argument("--split", default="valid")
+    parser.add_argument("--limit", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--confidence", type=float, default=0.25)
+    args = parser.parse_args()
+
+    if os.path.exists(args.model):
+        cases = list(model_cases(args.model, args.split, args.limit))
+    else:
+        print(f"[UYARI] Model bulunamadi ({args.model}), sentetik cikti kullaniliyor")
+        cases = list(synthetic_cases(min(args.limit, 50)))
+
+    mismatches = 0
+    legacy_ms, vector_ms = [], []
+    for name, outputs, meta in cases:
+        call = (outputs, *meta, args.confidence)
+        expected = strip(legacy_postprocess(*call))
+        actual = strip(main.postprocess_detections(*call))
+        if expected != actual:
+            mismatches += 1
+            print(f"[FARK] {name}: legacy={len(expected)} vektorel={len(actual)}")
+        legacy_ms.append(time_call(legacy_postprocess, call, args.repeat))
+        vector_ms.append(time_call(main.postprocess_detections, call, args.repeat))
+
+    print(f"Goruntu sayisi : {len(cases)}")
+    print(f"Parite         : {len(cases) - mismatches}/{len(cases)} ayni")
+    print(f"Legacy         : {np.mean(legacy_ms):8.3f} ms/cagri (p50 {np.median(legacy_ms):.3f})")
+    print(f"Vektorel       : {np.mean(vector_ms):8.3f} ms/cagri (p50 {np.median(vector_ms):.3f})")
+    print(f"Hizlanma       : {np.mean(legacy_ms) / np.mean(vector_ms):.1f}x")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
@@ -0,0 +1,118 @@
+"""
+Decode + preprocess benchmark (kare basina gecikme ve bellek)
+
+Eski yol: tam cozunurlukte cv2.imdecode + her cagride yeni tamponlar
+Yeni yol: IMREAD_REDUCED_* decode + tek tuvale resize + tek gecisli NCHW donusumu
+
+Telefon cozunurluklerinde (4032x3024, 1920x1080, 1280x720) kare basina
+ortalama/p50 gecikmeyi ve tracemalloc ile olculen tepe bellek kullanimini yazar.
+
+Kullanim (screwvision_app/backend dizininden):
+    python benchmarks/bench_preprocess.py --repeat 30
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+import main  # noqa: E402
+from preprocess import TensorPool, decode_image  # noqa: E402
+
+DATA_DIR = os.path.join(BACKEND_DIR, "..", "..", "screwVision_data")
+RESOLUTIONS = [(4032, 3024), (1920, 1080), (1280, 720)]
+
+
+def legacy_preprocess(image: np.ndarray, input_size: int = main.INPUT_SIZE):
+    """Onceki surumdeki preprocess_image (referans)"""
+    original_h, original_w = image.shape[:2]
+    scale = min(input_size / original_w, input_size / original_h)
+    new_w = int(original_w * scale)
+    new_h = int(original_h * scale)
+    resized = cv2.resize(image, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+    pad_w = (input_size - new_w) // 2
+    pad_h = (input_size - new_h) // 2
+    padded = np.full((input_size, input_size, 3), 114, dtype=np.uint8)
+    padded[pad_h : pad_h + new_h, pad_w : pad_w + new_w] = resized
+    rgb = cv2.cvtColor(padded, cv2.COLOR_BGR2RGB)
+    normalized = rgb.astype(np.float32) / 255.0
+    transposed = np.transpose(normalized, (2, 0, 1))
+    return np.expand_dims(transposed, axis=0), scale, pad_w, pad_h, original_w, original_h
+
+
+def legacy_path(data: bytes):
+    image = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+    return legacy_preprocess(image)
+
+
+def make_fused_path(pool: TensorPool):
+    def fused_path(data: bytes):
+        image, original_size = decode_image(data, main.INPUT_SIZE)
+        tensor = pool.acquire()
+        try:
+            return main.preprocess_image(image, main.INPUT_SIZE, tensor, original_size)
+        finally:
+            pool.release(tensor)
+
+    return fused_path
+
+
+def sample_jpeg(width: int, height: int, quality: int = 90) -> bytes:
+    """Veri setinden bir goruntuyu telefon cozunurlugune buyutup JPEG'e cevir"""
+    paths = sorted(glob.glob(os.path.join(DATA_DIR, "valid", "images", "*.jpg")))
+    if paths:
+        image = cv2.resize(cv2.imread(paths[0]), (width, height))
+    else:
+        rng = np.random.default_rng(0)
+        image = cv2.GaussianBlur(
+            rng.integers(0, 255, (height, width, 3), dtype=np.uint8), (9, 9), 0
+        )
+    ok, buf = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    return buf.tobytes()
+
+
+def measure(fn, data: bytes, repeat: int) -> tuple:
+    fn(data)  # Isinma (tamponlar ayrilsin)
+
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(data)
+        times.append((time.perf_counter() - start) * 1000)
+
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    fn(data)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return np.mean(times), np.median(times), peak / 1024 / 1024
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=30)
+    args = parser.parse_args()
+
+    fused_path = make_fused_path(TensorPool(main.INPUT_SIZE))
+    print(f"{'cozunurluk':>12} | {'yol':>6} | {'ort ms':>8} | {'p50 ms':>8} | {'tepe MB':>8}")
+    for width, height in RESOLUTIONS:
+        data = sample_jpeg(width, height)
+        for label, fn in (("eski", legacy_path), ("yeni", fused_path)):
+            mean_ms, p50_ms, peak_mb = measure(fn, data, args.repeat)
+            print(
+                f"{width}x{height:<7} | {label:>6} | {mean_ms:8.2f} | "
+                f"{p50_ms:8.2f} | {peak_mb:8.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main_cli()
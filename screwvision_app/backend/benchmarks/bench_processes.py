@@ -0,0 +1,103 @@
+"""
+Cok surecli inference olcekleme benchmark'i (sadece CPU)
+
+Referans: tek surec, tek session (intra_op = tum cekirdekler), eszamanli thread'ler
+Surec modu: 1, 2, 4, ... tum cekirdekler kadar inference sureci; her biri kendi
+cekirdek dilimine sabitli, tensorler paylasimli bellekten gecer.
+
+Her yapilandirma icin goruntu/s, referansa gore hizlanma ve batch gecikmesini yazar.
+
+Kullanim (screwvision_app/backend dizininden):
+    python benchmarks/bench_processes.py --seconds 10 --batch 1
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+import main  # noqa: E402
+from process_pool import ProcessInferencePool, available_cores  # noqa: E402
+from session_config import SessionConfig, SessionRunner, create_session  # noqa: E402
+
+
+def drive(runner, clients: int, batch: int, seconds: float) -> tuple:
+    """clients thread'i sure dolana kadar runner.run cagirir; (goruntu/s, p50 ms, p99 ms)"""
+    tensor = np.random.default_rng(0).random(
+        (batch, 3, main.INPUT_SIZE, main.INPUT_SIZE), dtype=np.float32
+    )
+    input_name = runner.get_inputs()[0].name
+    latencies = [[] for _ in range(clients)]
+    deadline = time.perf_counter() + seconds
+
+    def client(i):
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            runner.run(None, {input_name: tensor})
+            latencies[i].append((time.perf_counter() - start) * 1000)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    flat = np.concatenate([np.asarray(l) for l in latencies if l])
+    return len(flat) * batch / elapsed, np.percentile(flat, 50), np.percentile(flat, 99)
+
+
+def process_counts(cores: int) -> list:
+    counts, n = [], 1
+    while n < cores:
+        counts.append(n)
+        n *= 2
+    return counts + [cores]
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--batch", type=int, default=1)
+    parser.add_argument("--model", default=main.MODEL_PATH)
+    args = parser.parse_args()
+
+    cores = available_cores()
+    config_values = main.SESSION_CONFIG.describe()
+    print(f"Model: {args.model}")
+    print(f"Cekirdek: {len(cores)}, batch: {args.batch}, sure: {args.seconds:g} sn\n")
+    print(f"{'mod':>14} | {'goruntu/s':>10} | {'hizlanma':>8} | {'p50 ms':>8} | {'p99 ms':>8}")
+
+    # Referans: tek session, tum cekirdekler, cekirdek sayisi kadar eszamanli istemci
+    config = SessionConfig(
+        **{**config_values, "intra_op_threads": len(cores), "inter_op_threads": 1}
+    )
+    session, _ = create_session(args.model, config)
+    runner = SessionRunner(session, config.io_binding)
+    runner.warmup(main.INPUT_SIZE, (args.batch,))
+    base, p50, p99 = drive(runner, len(cores), args.batch, args.seconds)
+    print(f"{'tek surec':>14} | {base:10.1f} | {1.0:7.2f}x | {p50:8.2f} | {p99:8.2f}")
+    del runner, session
+
+    for n in process_counts(len(cores)):
+        pool = ProcessInferencePool(
+            args.model, n, main.INPUT_SIZE, args.batch, config_values, cores
+        ).start()
+        try:
+            # Her surec icin iki istemci: biri beklerken digeri tamponu doldurur
+            rate, p50, p99 = drive(pool, 2 * n, args.batch, args.seconds)
+        finally:
+            pool.close()
+        label = f"{n} surec"
+        print(f"{label:>14} | {rate:10.1f} | {rate / base:7.2f}x | {p50:8.2f} | {p99:8.2f}")
+
+
+if __name__ == "__main__":
+    main_cli()
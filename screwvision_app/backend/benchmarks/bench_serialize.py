@@ -0,0 +1,92 @@
+"""
+Yanit formati benchmark: govde boyutu ve serilestirme suresi
+
+Ayni /detect yaniti her formatta kodlanir:
+  json          varsayilan yol (FastAPI jsonable_encoder + JSONResponse)
+  json dumps    ayni dict, dogrudan json.dumps
+  kisa json     websocket satirlari ([class_id, confidence, x1, y1, x2, y2])
+  paketli       application/vnd.screwvision.detections (12 bayt baslik + 12 bayt kayit)
+  msgpack       application/msgpack (msgpack kuruluysa)
+Kalabalik tepsileri temsil etmek icin farkli tespit sayilarinda bayt ve p50 sure yazar.
+
+Kullanim (screwvision_app/backend dizininden):
+    python benchmarks/bench_serialize.py --counts 5 25 100 --repeat 2000
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+import main  # noqa: E402
+from packing import msgpack  # noqa: E402
+
+
+def sample_response(count, seed=0):
+    """format_detections ile uretilmis, 4032x3024 goruntuye dagilmis tespitler"""
+    rng = np.random.default_rng(seed)
+    xy = rng.uniform(0, [3800, 2800], (count, 2))
+    wh = rng.uniform(40, 230, (count, 2))
+    boxes = np.hstack([xy, xy + wh]).astype(np.float32)
+    scores = rng.uniform(0.25, 1.0, count).astype(np.float32)
+    class_ids = rng.integers(0, len(main.CLASS_NAMES), count)
+    detections = main.format_detections(boxes, scores, class_ids)
+    response = main.detection_response(detections, 4032, 3024, input_size=main.INPUT_SIZE)
+    response["request_id"] = "0" * 32
+    return response
+
+
+def encoders():
+    modes = [
+        ("json", lambda r: JSONResponse(jsonable_encoder(r)).body),
+        ("json dumps", lambda r: json.dumps(r).encode()),
+        (
+            "kisa json",
+            lambda r: json.dumps(
+                main.compact_detections(r["detections"]), separators=(",", ":")
+            ).encode(),
+        ),
+        ("paketli", lambda r: main.encode_detection_response(r, "packed")[0]),
+    ]
+    if msgpack is not None:
+        modes.append(("msgpack", lambda r: main.encode_detection_response(r, "msgpack")[0]))
+    else:
+        print("[UYARI] msgpack kurulu degil, MessagePack olculmedi (pip install msgpack)\n")
+    return modes
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--counts", type=int, nargs="+", default=[5, 25, 100])
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    modes = encoders()
+    print(f"{'tespit':>6} | {'format':>10} | {'bayt':>7} | {'oran':>6} | {'p50 us':>8}")
+    for count in args.counts:
+        response = sample_response(count)
+        baseline = None
+        for name, encode in modes:
+            size = len(encode(response))
+            baseline = baseline or size
+            times = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                encode(response)
+                times.append((time.perf_counter() - start) * 1e6)
+            print(
+                f"{count:>6} | {name:>10} | {size:7d} | {size / baseline:6.1%} | "
+                f"{np.median(times):8.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,135 @@
+"""
+Dilimli (tiled) inference benchmark: dogruluk ve gecikme
+
+Test goruntulerinden telefon cozunurlugunde mozaikler olusturulur (varsayilan
+4x3 hucre x 1008 px = 4032x3024); vidalar tek 640 letterbox'ta birkac on piksele
+kuculur. Uc mod karsilastirilir:
+  tek gecis       /detect yolu (kucultulmus decode + tek letterbox)
+  dilimli         tum kareler + tum goruntu tek batch'te
+  dilimli+atlama  once tum goruntu, sadece aday iceren kareler calisir
+Her mod icin mAP@0.5, mAP@0.5:0.95, p50 / p95 gecikme ve calisan kare sayisi.
+
+Kullanim (screwvision_app/backend dizininden):
+    python benchmarks/bench_tiling.py --mosaics 8
+    SCREWVISION_TILE_SIZE=960 python benchmarks/bench_tiling.py --cols 4 --rows 3 --cell 1008
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import main  # noqa: E402
+from metrics import (  # noqa: E402
+    DetectionEvaluator,
+    detections_to_arrays,
+    label_path_for,
+    percentiles,
+    read_ground_truth,
+    split_image_paths,
+)
+
+DATA_DIR = os.path.join(BACKEND_DIR, "..", "..", "screwVision_data")
+
+
+def build_mosaics(paths, count, cols, rows, cell):
+    """(JPEG baytlari, [M, 5] etiket) mozaikleri; hucreler kare olarak yeniden boyutlanir"""
+    mosaics = []
+    per_mosaic = cols * rows
+    for m in range(count):
+        canvas = np.empty((rows * cell, cols * cell, 3), dtype=np.uint8)
+        labels = []
+        for k in range(per_mosaic):
+            path = paths[(m * per_mosaic + k) % len(paths)]
+            x0, y0 = (k % cols) * cell, (k // cols) * cell
+            canvas[y0 : y0 + cell, x0 : x0 + cell] = cv2.resize(cv2.imread(path), (cell, cell))
+            gt = read_ground_truth(label_path_for(path), cell, cell)
+            gt[:, 1:] += (x0, y0, x0, y0)
+            labels.append(gt)
+        ok, encoded = cv2.imencode(".jpg", canvas, [cv2.IMWRITE_JPEG_QUALITY, 90])
+        mosaics.append((encoded.tobytes(), np.concatenate(labels)))
+    return mosaics
+
+
+def single_pass(data, confidence):
+    """/detect ile ayni adimlar (batch zamanlayici olmadan)"""
+    image, original_size = main.decode_image_bytes(data)
+    tensor, scale, pad_w, pad_h, w, h = main.preprocess_image(
+        image, main.INPUT_SIZE, None, original_size
+    )
+    runner = main.get_session_runner()
+    outputs = runner.run(None, {runner.get_inputs()[0].name: tensor})
+    return main.postprocess_detections(outputs, scale, pad_w, pad_h, w, h, confidence), 0
+
+
+def tiled(skip_empty):
+    def run(data, confidence):
+        detections, _, _, info = asyncio.run(
+            main.detect_tiled(data, confidence, main.TILE_OVERLAP, skip_empty)
+        )
+        return detections, info["run"]
+
+    return run
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--split", default="test")
+    parser.add_argument("--mosaics", type=int, default=8)
+    parser.add_argument("--cols", type=int, default=4)
+    parser.add_argument("--rows", type=int, default=3)
+    parser.add_argument("--cell", type=int, default=1008, help="Hucre kenari (px)")
+    parser.add_argument("--confidence", type=float, default=0.001, help="mAP icin esik")
+    parser.add_argument("--repeat", type=int, default=3, help="Gecikme icin tekrar")
+    args = parser.parse_args()
+
+    paths = split_image_paths(DATA_DIR, args.split)
+    if not paths:
+        sys.exit(f"[HATA] {args.split} bolumunde goruntu yok")
+    mosaics = build_mosaics(paths, args.mosaics, args.cols, args.rows, args.cell)
+    main.load_model()
+
+    print(
+        f"{args.mosaics} mozaik, {args.cols * args.cell}x{args.rows * args.cell}, "
+        f"kare {main.TILE_SIZE} px, ortusme {main.TILE_OVERLAP:g}, "
+        f"atlama esigi {main.TILE_GATE_CONFIDENCE:g}\n"
+    )
+    print(
+        f"{'mod':>15} | {'mAP50':>6} | {'mAP50-95':>8} | {'p50 ms':>8} | "
+        f"{'p95 ms':>8} | {'kare/goruntu':>12}"
+    )
+    modes = (
+        ("tek gecis", single_pass),
+        ("dilimli", tiled(False)),
+        ("dilimli+atlama", tiled(True)),
+    )
+    for name, detect in modes:
+        detect(mosaics[0][0], args.confidence)  # isinma
+        evaluator = DetectionEvaluator(main.CLASS_NAMES)
+        latencies, tiles_run = [], []
+        for data, gt in mosaics:
+            detections, runs = detect(data, args.confidence)
+            evaluator.add(detections_to_arrays(detections), gt)
+            tiles_run.append(runs)
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                detect(data, args.confidence)
+                latencies.append((time.perf_counter() - start) * 1000)
+        result = evaluator.compute()
+        lat = percentiles(latencies)
+        print(
+            f"{name:>15} | {result['map50']:6.4f} | {result['map50_95']:8.4f} | "
+            f"{lat['p50']:8.1f} | {lat['p95']:8.1f} | {np.mean(tiles_run):12.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,135 @@
+"""
+Izleme modu benchmark: kare basina maliyet ve kutu kalitesi
+
+Test goruntulerinden yavas kaydirilan (kamera titremesi / kayma) sentetik
+akislar olusturulur. Iki mod ayni karelerde calisir:
+  tam         her karede decode + preprocess + model + postprocess (/ws/detect)
+  izleme      anahtar karede dedektor, arada gri decode + optik akis (track=true)
+Kare basina ortalama sure tek cekirdekte saniyede islenebilecek kareyi, bunun
+30 fps'e bolumu cekirdek basina akis sayisini verir. Kutu kalitesi: izleme
+kutularinin ayni karedeki tam tespit kutulariyla IoU eslesmesi (ortalama IoU ve
+IoU >= 0.5 ile eslesen tam tespit orani).
+
+Kullanim (screwvision_app/backend dizininden; tek thread ile cekirdek basina olcum):
+    SCREWVISION_ORT_INTRA_OP_THREADS=1 python benchmarks/bench_tracking.py --streams 4 --frames 60
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import main  # noqa: E402
+from metrics import box_iou, split_image_paths  # noqa: E402
+from tracking import decode_gray  # noqa: E402
+
+DATA_DIR = os.path.join(BACKEND_DIR, "..", "..", "screwVision_data")
+STREAM_FPS = 30
+
+
+def synthetic_stream(path, frames, margin=48, seed=0):
+    """Goruntu uzerinde rastgele yuruyen (adim <= 2 px) kirpma penceresi; JPEG kareler"""
+    rng = np.random.default_rng(seed)
+    image = cv2.imread(path)
+    h, w = image.shape[:2]
+    padded = cv2.copyMakeBorder(image, margin, margin, margin, margin, cv2.BORDER_REFLECT)
+    x = y = float(margin)
+    encoded = []
+    for _ in range(frames):
+        x = float(np.clip(x + rng.uniform(-2, 2), 0, 2 * margin))
+        y = float(np.clip(y + rng.uniform(-2, 2), 0, 2 * margin))
+        crop = padded[int(y) : int(y) + h, int(x) : int(x) + w]
+        ok, data = cv2.imencode(".jpg", crop, [cv2.IMWRITE_JPEG_QUALITY, 50])
+        encoded.append(data.tobytes())
+    return encoded
+
+
+def full_detect(data, confidence):
+    """/ws/detect ile ayni adimlar (batch zamanlayici olmadan)"""
+    image, original_size = main.decode_image_bytes(data)
+    tensor, scale, pad_w, pad_h, w, h = main.preprocess_image(
+        image, main.INPUT_SIZE, None, original_size
+    )
+    runner = main.get_session_runner()
+    outputs = runner.run(None, {runner.get_inputs()[0].name: tensor})
+    return main.postprocess_detections(outputs, scale, pad_w, pad_h, w, h, confidence)
+
+
+def tracked_detect(tracker, data, confidence):
+    gray, size = decode_gray(data, main.TRACK_SIZE)
+    if tracker.needs_keyframe(gray, size):
+        return tracker.keyframe(gray, size, full_detect(data, confidence)), True
+    return tracker.propagate(gray), False
+
+
+def boxes_of(detections):
+    if not detections:
+        return np.zeros((0, 4))
+    return np.array([[d["bbox"][k] for k in ("x1", "y1", "x2", "y2")] for d in detections], float)
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--split", default="test")
+    parser.add_argument("--streams", type=int, default=4)
+    parser.add_argument("--frames", type=int, default=60)
+    parser.add_argument("--confidence", type=float, default=0.25)
+    args = parser.parse_args()
+
+    paths = split_image_paths(DATA_DIR, args.split, args.streams)
+    if not paths:
+        sys.exit(f"[HATA] {args.split} bolumunde goruntu yok")
+    streams = [synthetic_stream(p, args.frames, seed=i) for i, p in enumerate(paths)]
+    main.load_model()
+    full_detect(streams[0][0], args.confidence)  # isinma
+
+    full_ms, track_ms, ious, recalls = [], [], [], []
+    keyframes = 0
+    for frames in streams:
+        tracker = main.tracker_registry.new_tracker()
+        for data in frames:
+            start = time.perf_counter()
+            reference = full_detect(data, args.confidence)
+            full_ms.append((time.perf_counter() - start) * 1000)
+
+            start = time.perf_counter()
+            tracked, keyframe = tracked_detect(tracker, data, args.confidence)
+            track_ms.append((time.perf_counter() - start) * 1000)
+            keyframes += keyframe
+
+            ref, got = boxes_of(reference), boxes_of(tracked)
+            if len(ref) and len(got):
+                best = box_iou(ref, got).max(axis=1)
+                ious.extend(best.tolist())
+                recalls.append(float((best >= 0.5).mean()))
+            elif len(ref):
+                ious.extend([0.0] * len(ref))
+                recalls.append(0.0)
+
+    total = len(full_ms)
+    full_mean, track_mean = np.mean(full_ms), np.mean(track_ms)
+    print(
+        f"{len(streams)} akis x {args.frames} kare, anahtar kare araligi "
+        f"{main.TRACK_KEYFRAME_INTERVAL}, sahne esigi {main.TRACK_SCENE_THRESHOLD:g}, "
+        f"izleme boyutu {main.TRACK_SIZE} px\n"
+    )
+    print(f"{'mod':>8} | {'ms/kare':>8} | {'kare/s':>8} | {'akis/cekirdek @30fps':>20}")
+    for name, ms in (("tam", full_mean), ("izleme", track_mean)):
+        print(f"{name:>8} | {ms:8.2f} | {1000 / ms:8.1f} | {1000 / ms / STREAM_FPS:20.2f}")
+    print(f"\nHizlanma: {full_mean / track_mean:.1f}x, anahtar kare orani {keyframes / total:.1%}")
+    if ious:
+        print(
+            f"Kutu kalitesi (tam tespite gore): ortalama IoU {np.mean(ious):.3f}, "
+            f"IoU>=0.5 eslesme {np.mean(recalls):.1%}"
+        )
+
+
+if __name__ == "__main__":
+    main_cli()
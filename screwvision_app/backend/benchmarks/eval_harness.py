@@ -0,0 +1,464 @@
+"""
+Uretim ONNX yolunun uctan uca dogruluk + gecikme degerlendirmesi
+
+Sunucunun kullandigi fonksiyonlar birebir calistirilir:
+  decode      main.decode_image_bytes (kucultulmus JPEG decode dahil)
+  preprocess  main.preprocess_image (letterbox, yeniden kullanilan tensor)
+  infer       main.load_model() ile olusan SessionRunner (SCREWVISION_ORT_* ayarlari)
+  postprocess main.postprocess_detections (esik + NMS)
+
+Her bolum icin mAP@0.5, mAP@0.5:0.95, sinif bazli AP ve asama basina gecikme
+(ort / p50 / p95 / p99) JSON raporuna yazilir. mAP dusuk esikle (--confidence)
+hesaplanir; postprocess gecikmesi sunucunun varsayilan esigiyle (--serve-confidence)
+olculur.
+
+--sizes ile ayni bolumler ek giris boyutlarinda da calistirilir (best_320.onnx gibi
+boyuta ozel export veya dinamik H/W'li model); dogruluk / gecikme dengesi tablosu
+yazdirilir ve "resolutions" altinda saklanir (auto modunun boyut listesini secmek icin).
+
+--packed ile varsayilan boyuttaki bolumler screwVision_data/pack_dataset.py onbelleginden
+okunur: JPEG decode ve etiket ayristirma atlanir, letterbox'lu pikseller memmap'ten
+dogrudan tensore cevrilir (decode asamasi sadece memmap erisimidir). Paket yoksa,
+boyutu farkliysa veya kaynaklar degistiyse o bolum dosyalardan okunur.
+
+--baseline ile onceki raporla karsilastirilir; esik asilirsa cikis kodu 1 olur.
+Iki kayitli raporu calistirmadan karsilastirmak icin --compare ESKI YENI.
+
+Kullanim (screwvision_app/backend dizininden):
+    python benchmarks/eval_harness.py --json reports/best_v2.json
+    python benchmarks/eval_harness.py --baseline reports/best_v2.json --json reports/best_v3.json
+    python benchmarks/eval_harness.py --compare reports/best_v2.json reports/best_v3.json
+    python benchmarks/eval_harness.py --sizes 320 416 --splits valid
+    python benchmarks/eval_harness.py --packed --splits valid test
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime, timezone
+
+import cv2
+import numpy as np
+import onnxruntime as ort
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import main  # noqa: E402
+from preprocess import canvas_to_tensor  # noqa: E402
+from resolution import accepts_input_size, size_model_path  # noqa: E402
+from metrics import (  # noqa: E402
+    DetectionEvaluator,
+    detections_to_arrays,
+    label_path_for,
+    percentiles,
+    read_ground_truth,
+    split_image_paths,
+    yolo_rows_to_boxes,
+)
+
+DATA_DIR = os.path.join(BACKEND_DIR, "..", "..", "screwVision_data")
+STAGES = ("decode", "preprocess", "infer", "postprocess", "total")
+
+# Varsayilan regresyon esikleri
+MAX_MAP_DROP = 0.01  # mAP50 / mAP50-95 mutlak dusus
+MAX_CLASS_AP_DROP = 0.05  # sinif bazli AP50-95 mutlak dusus
+MAX_LATENCY_INCREASE = 0.15  # p50 gecikmede goreli artis
+LATENCY_FLOOR_MS = 0.5  # bundan kucuk mutlak artislar gurultu sayilir
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def serve_image(runner, data: bytes, tensor, input_size: int, serve_confidence: float):
+    """
+    Tek goruntuyu sunucu yolundan gecir (postprocess servis esigiyle)
+    Donus: (asama sureleri ms, model ciktisi, letterbox meta) veya decode edilemezse None
+    """
+    t0 = time.perf_counter()
+    image, original_size = main.decode_image_bytes(data, input_size)
+    t1 = time.perf_counter()
+    if image is None:
+        return None
+    input_tensor, scale, pad_w, pad_h, w, h = main.preprocess_image(
+        image, input_size, tensor, original_size
+    )
+    t2 = time.perf_counter()
+    outputs = runner.run(None, {runner.get_inputs()[0].name: input_tensor})
+    t3 = time.perf_counter()
+    main.postprocess_detections(outputs, scale, pad_w, pad_h, w, h, serve_confidence)
+    t4 = time.perf_counter()
+
+    stages = [ms * 1000 for ms in (t1 - t0, t2 - t1, t3 - t2, t4 - t3, t4 - t0)]
+    return stages, outputs, (scale, pad_w, pad_h, w, h)
+
+
+def measure_latency(
+    runner, image_paths: list, serve_confidence: float, input_size: int = main.INPUT_SIZE
+) -> dict:
+    """Sadece servis yolu (dogruluk cagrisi yok); asama basina gecikme yuzdelikleri"""
+    tensor = main.new_input_tensor(input_size)
+    timings = {stage: [] for stage in STAGES}
+    for path in image_paths:
+        with open(path, "rb") as f:
+            served = serve_image(runner, f.read(), tensor, input_size, serve_confidence)
+        if served is not None:
+            for stage, ms in zip(STAGES, served[0]):
+                timings[stage].append(ms)
+    return {stage: percentiles(v) for stage, v in timings.items()}
+
+
+def evaluate_split(
+    runner,
+    image_paths: list,
+    confidence: float,
+    serve_confidence: float,
+    input_size: int = main.INPUT_SIZE,
+) -> dict:
+    """Bir bolumu backend yolundan gecir; dogruluk ve asama gecikmeleri"""
+    tensor = main.new_input_tensor(input_size)
+    evaluator = DetectionEvaluator(main.CLASS_NAMES)
+    timings = {stage: [] for stage in STAGES}
+    skipped = []
+
+    for path in image_paths:
+        with open(path, "rb") as f:
+            served = serve_image(runner, f.read(), tensor, input_size, serve_confidence)
+        if served is None:
+            skipped.append(os.path.basename(path))
+            continue
+        stages, outputs, (scale, pad_w, pad_h, w, h) = served
+        for stage, ms in zip(STAGES, stages):
+            timings[stage].append(ms)
+
+        # Dogruluk icin dusuk esikli ayri cagri (zamanlanmaz)
+        detections = main.postprocess_detections(
+            outputs, scale, pad_w, pad_h, w, h, confidence
+        )
+        evaluator.add(
+            detections_to_arrays(detections),
+            read_ground_truth(label_path_for(path), w, h),
+        )
+
+    return split_result(evaluator, timings, len(image_paths) - len(skipped), skipped)
+
+
+def evaluate_packed_split(
+    runner, dataset, confidence: float, serve_confidence: float, limit: int = 0
+) -> dict:
+    """evaluate_split ile ayni, ornekler paketli onbellekten (decode ve letterbox yok)"""
+    input_name = runner.get_inputs()[0].name
+    tensor = main.new_input_tensor(dataset.image_size)
+    evaluator = DetectionEvaluator(main.CLASS_NAMES)
+    timings = {stage: [] for stage in STAGES}
+    names = dataset.names[:limit] if limit else dataset.names
+    unreadable = set(dataset.index.get("unreadable", []))
+    skipped = [name for name in names if name in unreadable]
+
+    for i, name in enumerate(names):
+        if name in unreadable:
+            continue
+        t0 = time.perf_counter()
+        canvas, rows = dataset[i]
+        w, h, scale, pad_w, pad_h = (float(v) for v in dataset.meta[i])
+        t1 = time.perf_counter()
+        canvas_to_tensor(canvas, tensor)
+        t2 = time.perf_counter()
+        outputs = runner.run(None, {input_name: tensor})
+        t3 = time.perf_counter()
+        main.postprocess_detections(
+            outputs, scale, int(pad_w), int(pad_h), int(w), int(h), serve_confidence
+        )
+        t4 = time.perf_counter()
+
+        for stage, ms in zip(STAGES, (t1 - t0, t2 - t1, t3 - t2, t4 - t3, t4 - t0)):
+            timings[stage].append(ms * 1000)
+
+        detections = main.postprocess_detections(
+            outputs, scale, int(pad_w), int(pad_h), int(w), int(h), confidence
+        )
+        evaluator.add(detections_to_arrays(detections), yolo_rows_to_boxes(rows, w, h))
+
+    return split_result(evaluator, timings, len(names) - len(skipped), skipped)
+
+
+def split_result(evaluator, timings: dict, images: int, skipped: list) -> dict:
+    result = evaluator.compute()
+    # Ornegi olmayan siniflar da raporda yer alsin (raporlar arasi fark icin)
+    result["per_class"] = {
+        name: result["per_class"].get(
+            name, {"instances": 0, "ap50": None, "ap50_95": None}
+        )
+        for name in main.CLASS_NAMES
+    }
+    result["images"] = images
+    result["skipped"] = skipped
+    result["latency_ms"] = {stage: percentiles(v) for stage, v in timings.items()}
+    return result
+
+
+def open_packed_split(split: str):
+    """Kullanilabilir paketli bolum veya None (yok / boyut farkli / kaynak degismis)"""
+    # pack_dataset albumentations'li augment_dataset'i ice aktarir; sadece --packed ile yuklenir
+    sys.path.insert(0, DATA_DIR)
+    from pack_dataset import PACKED_DIR, PackedDataset
+
+    try:
+        dataset = PackedDataset(split, PACKED_DIR)
+    except FileNotFoundError:
+        print(f"[UYARI] {split} paketi yok, dosyalardan okunuyor")
+        return None
+    if dataset.image_size != main.INPUT_SIZE:
+        print(f"[UYARI] {split} paketi {dataset.image_size}px (beklenen {main.INPUT_SIZE}), dosyalardan okunuyor")
+        return None
+    if not dataset.is_current(DATA_DIR):
+        print(f"[UYARI] {split} paketi eski (pack_dataset.py ile yenileyin), dosyalardan okunuyor")
+        return None
+    return dataset
+
+
+def run_evaluation(args) -> dict:
+    if args.model:
+        main.MODEL_PATH = args.model
+    main.ort_session = None
+    main.load_model()
+    runner = main.session_runner
+    runner.warmup(main.INPUT_SIZE, (1,), repeat=args.warmup)
+
+    report = {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "model": {
+            "path": os.path.abspath(main.MODEL_PATH),
+            "variant": main.MODEL_VARIANT,
+            "bytes": os.path.getsize(main.MODEL_PATH),
+            "sha256": file_sha256(main.MODEL_PATH),
+        },
+        "session": main.SESSION_CONFIG.describe(),
+        "settings": {
+            "input_size": main.INPUT_SIZE,
+            "confidence": args.confidence,
+            "serve_confidence": args.serve_confidence,
+            "reduced_decode": main.REDUCED_DECODE,
+            "packed_splits": [],
+        },
+        "environment": {
+            "python": platform.python_version(),
+            "onnxruntime": ort.__version__,
+            "opencv": cv2.__version__,
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "splits": {},
+    }
+
+    split_paths = {}
+    for split in args.splits:
+        image_paths = split_image_paths(DATA_DIR, split, args.limit)
+        if not image_paths:
+            print(f"[UYARI] {split} bolumunde goruntu yok, atlandi")
+            continue
+        split_paths[split] = image_paths
+        dataset = open_packed_split(split) if args.packed else None
+        if dataset is not None:
+            report["settings"]["packed_splits"].append(split)
+            report["splits"][split] = evaluate_packed_split(
+                runner, dataset, args.confidence, args.serve_confidence, args.limit
+            )
+            continue
+        report["splits"][split] = evaluate_split(
+            runner, image_paths, args.confidence, args.serve_confidence
+        )
+
+    sizes = sorted(set(args.sizes) - {main.INPUT_SIZE})
+    if sizes:
+        report["resolutions"] = {str(main.INPUT_SIZE): report["splits"]}
+    for size in sizes:
+        path = size_model_path(main.MODEL_PATH, size)
+        session, size_runner = main.build_session(path)
+        if not accepts_input_size(session, size):
+            print(f"[UYARI] {size}px atlandi: {path} giris boyutu {session.get_inputs()[0].shape}")
+            continue
+        size_runner.warmup(size, (1,), repeat=args.warmup)
+        report["resolutions"][str(size)] = {
+            split: evaluate_split(
+                size_runner, image_paths, args.confidence, args.serve_confidence, size
+            )
+            for split, image_paths in split_paths.items()
+        }
+    return report
+
+
+def print_resolutions(report: dict):
+    """Giris boyutuna gore dogruluk / gecikme dengesi"""
+    resolutions = report.get("resolutions")
+    if not resolutions:
+        return
+    print(f"\nGiris boyutu dengesi (varsayilan {report['settings']['input_size']}px):")
+    print(
+        f"{'bolum':>6} | {'boyut':>5} | {'mAP50':>6} | {'mAP50-95':>8} | "
+        f"{'infer p50':>9} | {'toplam p50':>10} | {'toplam p95':>10}"
+    )
+    sizes = sorted(resolutions, key=int)
+    for split in report["splits"]:
+        for size in sizes:
+            r = resolutions[size].get(split)
+            if r is None:
+                continue
+            lat = r["latency_ms"]
+            print(
+                f"{split:>6} | {size:>5} | {r['map50']:6.4f} | {r['map50_95']:8.4f} | "
+                f"{lat['infer']['p50']:9.2f} | {lat['total']['p50']:10.2f} | "
+                f"{lat['total']['p95']:10.2f}"
+            )
+
+
+def print_report(report: dict):
+    model = report["model"]
+    print(f"\nModel: {model['path']} ({model['variant']}, {model['bytes'] / 1e6:.2f} MB)")
+    for split, r in report["splits"].items():
+        print(
+            f"\n{split}: {r['images']} goruntu, mAP50 {r['map50']:.4f}, "
+            f"mAP50-95 {r['map50_95']:.4f}"
+        )
+        print(f"{'sinif':>10} | {'ornek':>5} | {'AP50':>6} | {'AP50-95':>7}")
+        for name, c in r["per_class"].items():
+            ap50 = "-" if c["ap50"] is None else f"{c['ap50']:.4f}"
+            ap = "-" if c["ap50_95"] is None else f"{c['ap50_95']:.4f}"
+            print(f"{name:>10} | {c['instances']:5d} | {ap50:>6} | {ap:>7}")
+        print(f"{'asama':>11} | {'ort ms':>7} | {'p50 ms':>7} | {'p95 ms':>7} | {'p99 ms':>7}")
+        for stage, lat in r["latency_ms"].items():
+            print(
+                f"{stage:>11} | {lat['mean']:7.2f} | {lat['p50']:7.2f} | "
+                f"{lat['p95']:7.2f} | {lat['p99']:7.2f}"
+            )
+        if r["skipped"]:
+            print(f"[UYARI] Decode edilemedi: {', '.join(r['skipped'])}")
+
+
+def compare_reports(baseline: dict, current: dict, thresholds: dict) -> list:
+    """Iki raporu karsilastirip tabloyu yazdir; esigi asan regresyonlarin listesi"""
+    failures = []
+    print(f"\nKarsilastirma: {baseline['model']['path']} -> {current['model']['path']}")
+    for split, new in current["splits"].items():
+        old = baseline["splits"].get(split)
+        if old is None:
+            print(f"[UYARI] {split} referans raporda yok")
+            continue
+        print(f"\n{split}:")
+        print(f"{'metrik':>24} | {'onceki':>9} | {'simdiki':>9} | {'fark':>9}")
+
+        for key in ("map50", "map50_95"):
+            diff = new[key] - old[key]
+            flag = diff < -thresholds["map_drop"]
+            print(f"{key:>24} | {old[key]:9.4f} | {new[key]:9.4f} | {diff:+9.4f}{' <' if flag else ''}")
+            if flag:
+                failures.append(f"{split} {key} {old[key]:.4f} -> {new[key]:.4f}")
+
+        for name, c in new["per_class"].items():
+            prev = old["per_class"].get(name, {}).get("ap50_95")
+            if c["ap50_95"] is None or prev is None:
+                continue
+            diff = c["ap50_95"] - prev
+            flag = diff < -thresholds["class_ap_drop"]
+            label = f"{name} AP50-95"
+            print(f"{label:>24} | {prev:9.4f} | {c['ap50_95']:9.4f} | {diff:+9.4f}{' <' if flag else ''}")
+            if flag:
+                failures.append(f"{split} {label} {prev:.4f} -> {c['ap50_95']:.4f}")
+
+        for stage in STAGES:
+            before = old["latency_ms"].get(stage, {}).get("p50")
+            after = new["latency_ms"][stage]["p50"]
+            if not before:
+                continue
+            ratio = after / before - 1
+            flag = (
+                ratio > thresholds["latency_increase"]
+                and after - before > thresholds["latency_floor_ms"]
+            )
+            label = f"{stage} p50 ms"
+            print(f"{label:>24} | {before:9.2f} | {after:9.2f} | {ratio:+8.1%}{' <' if flag else ''}")
+            if flag:
+                failures.append(f"{split} {label} {before:.2f} -> {after:.2f} ({ratio:+.1%})")
+
+    packed = (
+        baseline["settings"].get("packed_splits", []),
+        current["settings"].get("packed_splits", []),
+    )
+    if packed[0] != packed[1]:
+        print("[UYARI] Paketli okunan bolumler farkli; decode / preprocess gecikmeleri karsilastirilamaz")
+    if baseline["environment"].get("platform") != current["environment"].get("platform"):
+        print("[UYARI] Raporlar farkli makinelerde uretilmis; gecikme farklari karsilastirilamaz")
+    return failures
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--model", default=None, help="Varsayilan: SCREWVISION_MODEL_PATH / varyant")
+    parser.add_argument("--splits", nargs="+", default=["valid", "test"])
+    parser.add_argument("--limit", type=int, default=0)
+    parser.add_argument("--confidence", type=float, default=0.001)
+    parser.add_argument("--serve-confidence", type=float, default=0.25)
+    parser.add_argument("--warmup", type=int, default=5, help="Olcum oncesi isinma cagrisi")
+    parser.add_argument(
+        "--packed", action="store_true", help="Bolumleri paketli onbellekten oku (pack_dataset.py)"
+    )
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[], help="Ek giris boyutlari (ornegin 320 416)"
+    )
+    parser.add_argument("--json", default=None, help="Raporu JSON olarak kaydet")
+    parser.add_argument("--baseline", default=None, help="Karsilastirilacak onceki rapor")
+    parser.add_argument("--compare", nargs=2, metavar=("ESKI", "YENI"), default=None)
+    parser.add_argument("--max-map-drop", type=float, default=MAX_MAP_DROP)
+    parser.add_argument("--max-class-ap-drop", type=float, default=MAX_CLASS_AP_DROP)
+    parser.add_argument("--max-latency-increase", type=float, default=MAX_LATENCY_INCREASE)
+    parser.add_argument("--latency-floor-ms", type=float, default=LATENCY_FLOOR_MS)
+    args = parser.parse_args()
+
+    thresholds = {
+        "map_drop": args.max_map_drop,
+        "class_ap_drop": args.max_class_ap_drop,
+        "latency_increase": args.max_latency_increase,
+        "latency_floor_ms": args.latency_floor_ms,
+    }
+
+    if args.compare:
+        with open(args.compare[0]) as f:
+            baseline = json.load(f)
+        with open(args.compare[1]) as f:
+            current = json.load(f)
+    else:
+        current = run_evaluation(args)
+        print_report(current)
+        print_resolutions(current)
+        if args.json:
+            os.makedirs(os.path.dirname(os.path.abspath(args.json)), exist_ok=True)
+            with open(args.json, "w") as f:
+                json.dump(current, f, indent=2)
+            print(f"\nRapor kaydedildi: {args.json}")
+        if not args.baseline:
+            return
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    failures = compare_reports(baseline, current, thresholds)
+    if failures:
+        print("\n[HATA] Regresyon:")
+        for failure in failures:
+            print(f"    {failure}")
+        sys.exit(1)
+    print("\n[OK] Esik asan regresyon yok")
+
+
+if __name__ == "__main__":
+    main_cli()
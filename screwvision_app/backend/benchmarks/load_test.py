@@ -0,0 +1,153 @@
+"""
+Mikro-batch zamanlayici yuk testi
+
+Her max batch boyutu (varsayilan 1, 4, 8, 16) icin ayni sayida eszamanli
+istegi BatchScheduler uzerinden gonderir; verim (istek/s) ile p50/p99
+gecikmeyi raporlar. --url verilirse calisan sunucuya /detect/base64 ile
+HTTP yuku uygular (batch boyutu sunucu ayarindan gelir).
+
+Kullanim (screwvision_app/backend dizininden):
+    python benchmarks/load_test.py --requests 256 --concurrency 32
+    python benchmarks/load_test.py --url http://localhost:8000 --concurrency 16
+"""
+
+import argparse
+import asyncio
+import base64
+import glob
+import json
+import os
+import sys
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+import main  # noqa: E402
+from batching import BatchScheduler  # noqa: E402
+
+DATA_DIR = os.path.join(BACKEND_DIR, "..", "..", "screwVision_data")
+
+
+def load_images(split: str, limit: int) -> list:
+    paths = sorted(glob.glob(os.path.join(DATA_DIR, split, "images", "*.jpg")))
+    images = [cv2.imread(p) for p in paths[:limit]]
+    return [img for img in images if img is not None]
+
+
+def summarize(label: str, latencies_ms: list, elapsed_s: float):
+    lat = np.asarray(latencies_ms)
+    print(
+        f"{label:>12} | {len(lat) / elapsed_s:8.1f} istek/s | "
+        f"p50 {np.percentile(lat, 50):8.1f} ms | p99 {np.percentile(lat, 99):8.1f} ms"
+    )
+
+
+async def run_scheduler_load(
+    tensors: list, batch_size: int, wait_ms: float, requests: int, concurrency: int
+):
+    scheduler = BatchScheduler(main.load_model, batch_size, wait_ms)
+    await scheduler.start()
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(i: int):
+        async with semaphore:
+            start = time.perf_counter()
+            await scheduler.submit(tensors[i % len(tensors)])
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    # Isinma
+    await asyncio.gather(*(one(i) for i in range(min(concurrency, requests))))
+    latencies.clear()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - start
+    await scheduler.stop()
+
+    summarize(f"batch={batch_size}", latencies, elapsed)
+    print(f"{'':>12} | ortalama gercek batch: {scheduler.mean_batch_size:.2f}")
+
+
+def run_http_load(url: str, images: list, requests: int, concurrency: int):
+    payloads = []
+    for img in images:
+        ok, buf = cv2.imencode(".jpg", img)
+        body = {"image": base64.b64encode(buf.tobytes()).decode(), "confidence": 0.25}
+        payloads.append(json.dumps(body).encode())
+
+    def one(i: int):
+        req = urllib.request.Request(
+            url.rstrip("/") + "/detect/base64",
+            data=payloads[i % len(payloads)],
+            headers={"Content-Type": "application/json"},
+        )
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(req) as resp:
+                resp.read()
+        except urllib.error.HTTPError as e:
+            # 503 = kabul kuyrugu dolu, sunucu yuku reddetti
+            if e.code != 503:
+                raise
+            return None
+        return (time.perf_counter() - start) * 1000
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(concurrency)))  # Isinma
+        start = time.perf_counter()
+        results = list(pool.map(one, range(requests)))
+        elapsed = time.perf_counter() - start
+
+    latencies = [r for r in results if r is not None]
+    if latencies:
+        summarize("http", latencies, elapsed)
+    print(f"{'':>12} | reddedilen (503): {len(results) - len(latencies)}/{len(results)}")
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--model", default=main.MODEL_PATH)
+    parser.add_argument("--url", default=None)
+    parser.add_argument("--split", default="valid")
+    parser.add_argument("--images", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=256)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--batch-sizes", default="1,4,8,16")
+    parser.add_argument("--wait-ms", type=float, default=main.MAX_BATCH_WAIT_MS)
+    args = parser.parse_args()
+
+    images = load_images(args.split, args.images)
+    if not images:
+        print(f"[HATA] Goruntu bulunamadi: {args.split}")
+        return 1
+
+    if args.url:
+        run_http_load(args.url, images, args.requests, args.concurrency)
+        return 0
+
+    main.MODEL_PATH = args.model
+    session = main.load_model()
+    if isinstance(session.get_inputs()[0].shape[0], int):
+        print("[UYARI] Model sabit batch boyutlu; dynamic=True ile yeniden export edin")
+
+    tensors = [main.preprocess_image(img)[0] for img in images]
+    print(f"{args.requests} istek, eszamanlilik {args.concurrency}, bekleme {args.wait_ms} ms")
+    for batch_size in [int(b) for b in args.batch_sizes.split(",")]:
+        asyncio.run(
+            run_scheduler_load(
+                tensors, batch_size, args.wait_ms, args.requests, args.concurrency
+            )
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
@@ -0,0 +1,191 @@
+"""
+Tespit dogrulugu metrikleri (mAP@0.5, mAP@0.5:0.95, sinif bazli AP)
+
+Ultralytics ile ayni yaklasim: sinif bazli acgozlu eslestirme, 101 noktali
+interpolasyonla AP. Benchmark ve rapor betikleri tarafindan ortak kullanilir.
+"""
+
+import glob
+import os
+from typing import Dict, List
+
+import numpy as np
+
+IOU_THRESHOLDS = np.linspace(0.5, 0.95, 10)
+
+
+def split_image_paths(data_dir: str, split: str, limit: int = 0) -> List[str]:
+    """Bir veri bolumundeki goruntu yollari (sirali)"""
+    image_dir = os.path.join(data_dir, split, "images")
+    paths = sorted(
+        p
+        for ext in ("*.jpg", "*.jpeg", "*.png")
+        for p in glob.glob(os.path.join(image_dir, ext))
+    )
+    return paths[:limit] if limit else paths
+
+
+def label_path_for(image_path: str) -> str:
+    """.../split/images/x.jpg -> .../split/labels/x.txt"""
+    image_dir, name = os.path.split(image_path)
+    label_dir = os.path.join(os.path.dirname(image_dir), "labels")
+    return os.path.join(label_dir, os.path.splitext(name)[0] + ".txt")
+
+
+def read_ground_truth(label_path: str, width: int, height: int) -> np.ndarray:
+    """YOLO etiketini piksel koordinatli [M, 5] (class, x1, y1, x2, y2) diziye cevir"""
+    if not os.path.exists(label_path):
+        return np.zeros((0, 5), dtype=np.float64)
+
+    rows = np.loadtxt(label_path, ndmin=2, dtype=np.float64)
+    if rows.size == 0:
+        return np.zeros((0, 5), dtype=np.float64)
+    return yolo_rows_to_boxes(rows, width, height)
+
+
+def yolo_rows_to_boxes(rows: np.ndarray, width: int, height: int) -> np.ndarray:
+    """[M, 5+] (class, cx, cy, w, h; normalize) -> [M, 5] (class, x1, y1, x2, y2) piksel"""
+    rows = np.asarray(rows, dtype=np.float64)[:, :5]
+    cx, cy = rows[:, 1] * width, rows[:, 2] * height
+    w, h = rows[:, 3] * width, rows[:, 4] * height
+    return np.stack([rows[:, 0], cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2], 1)
+
+
+def detections_to_arrays(detections: List[Dict]) -> np.ndarray:
+    """API tespit listesini [N, 6] (class, conf, x1, y1, x2, y2) diziye cevir"""
+    if not detections:
+        return np.zeros((0, 6), dtype=np.float64)
+    return np.array(
+        [
+            [
+                d["class_id"],
+                d["confidence"],
+                d["bbox"]["x1"],
+                d["bbox"]["y1"],
+                d["bbox"]["x2"],
+                d["bbox"]["y2"],
+            ]
+            for d in detections
+        ],
+        dtype=np.float64,
+    )
+
+
+def box_iou(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """[N, 4] ve [M, 4] xyxy kutular arasi [N, M] IoU"""
+    tl = np.maximum(a[:, None, :2], b[None, :, :2])
+    br = np.minimum(a[:, None, 2:], b[None, :, 2:])
+    inter = np.clip(br - tl, 0, None).prod(axis=2)
+    area_a = (a[:, 2:] - a[:, :2]).prod(axis=1)
+    area_b = (b[:, 2:] - b[:, :2]).prod(axis=1)
+    return inter / np.maximum(area_a[:, None] + area_b[None, :] - inter, 1e-9)
+
+
+def match_predictions(pred: np.ndarray, gt: np.ndarray) -> np.ndarray:
+    """
+    Her tahmin icin her IoU esiginde dogru pozitif mi: [N, len(IOU_THRESHOLDS)]
+    Tahminler skora gore islenir, her gercek kutu en fazla bir kez eslesir
+    """
+    correct = np.zeros((len(pred), len(IOU_THRESHOLDS)), dtype=bool)
+    if len(pred) == 0 or len(gt) == 0:
+        return correct
+
+    iou = box_iou(pred[:, 2:6], gt[:, 1:5])
+    iou[pred[:, 0][:, None] != gt[:, 0][None, :]] = 0.0
+    order = np.argsort(-pred[:, 1], kind="stable")
+
+    for t, threshold in enumerate(IOU_THRESHOLDS):
+        taken = np.zeros(len(gt), dtype=bool)
+        for i in order:
+            candidates = np.where(~taken & (iou[i] >= threshold))[0]
+            if len(candidates):
+                j = candidates[np.argmax(iou[i, candidates])]
+                taken[j] = True
+                correct[i, t] = True
+    return correct
+
+
+def compute_ap(recall: np.ndarray, precision: np.ndarray) -> float:
+    """101 noktali interpolasyonla AP (COCO / Ultralytics)"""
+    mrec = np.concatenate(([0.0], recall, [1.0]))
+    mpre = np.concatenate(([1.0], precision, [0.0]))
+    mpre = np.flip(np.maximum.accumulate(np.flip(mpre)))
+    x = np.linspace(0, 1, 101)
+    return float(np.trapz(np.interp(x, mrec, mpre), x))
+
+
+class DetectionEvaluator:
+    """Goruntu goruntu tahmin/gercek biriktirip mAP hesaplar"""
+
+    def __init__(self, class_names: List[str]):
+        self.class_names = class_names
+        self._correct = []
+        self._conf = []
+        self._pred_cls = []
+        self._gt_cls = []
+
+    def add(self, pred: np.ndarray, gt: np.ndarray):
+        """pred: [N, 6] (class, conf, x1, y1, x2, y2), gt: [M, 5] (class, x1, y1, x2, y2)"""
+        self._correct.append(match_predictions(pred, gt))
+        self._conf.append(pred[:, 1])
+        self._pred_cls.append(pred[:, 0])
+        self._gt_cls.append(gt[:, 0])
+
+    def compute(self) -> Dict:
+        if self._correct:
+            correct = np.concatenate(self._correct)
+        else:
+            correct = np.zeros((0, len(IOU_THRESHOLDS)), dtype=bool)
+        conf = np.concatenate(self._conf) if self._conf else np.zeros(0)
+        pred_cls = np.concatenate(self._pred_cls) if self._pred_cls else np.zeros(0)
+        gt_cls = np.concatenate(self._gt_cls) if self._gt_cls else np.zeros(0)
+
+        order = np.argsort(-conf, kind="stable")
+        correct, pred_cls = correct[order], pred_cls[order]
+
+        per_class = {}
+        ap_matrix = []
+        for class_id, name in enumerate(self.class_names):
+            n_gt = int((gt_cls == class_id).sum())
+            mask = pred_cls == class_id
+            if n_gt == 0:
+                continue
+
+            tp = np.cumsum(correct[mask], axis=0)
+            fp = np.cumsum(~correct[mask], axis=0)
+            aps = []
+            for t in range(len(IOU_THRESHOLDS)):
+                if mask.sum() == 0:
+                    aps.append(0.0)
+                    continue
+                recall = tp[:, t] / n_gt
+                precision = tp[:, t] / np.maximum(tp[:, t] + fp[:, t], 1e-9)
+                aps.append(compute_ap(recall, precision))
+
+            ap_matrix.append(aps)
+            per_class[name] = {
+                "instances": n_gt,
+                "ap50": round(aps[0], 4),
+                "ap50_95": round(float(np.mean(aps)), 4),
+            }
+
+        ap = np.array(ap_matrix) if ap_matrix else np.zeros((1, len(IOU_THRESHOLDS)))
+        return {
+            "map50": round(float(ap[:, 0].mean()), 4),
+            "map50_95": round(float(ap.mean()), 4),
+            "per_class": per_class,
+        }
+
+
+def percentiles(values_ms: List[float]) -> Dict[str, float]:
+    """Gecikme ozeti (ms)"""
+    if not values_ms:
+        return {"mean": 0.0, "p50": 0.0, "p95": 0.0, "p99": 0.0}
+    v = np.asarray(values_ms)
+    return {
+        "mean": round(float(v.mean()), 3),
+        "p50": round(float(np.percentile(v, 50)), 3),
+        "p95": round(float(np.percentile(v, 95)), 3),
+        "p99": round(float(np.percentile(v, 99)), 3),
+    }
+
@@ -0,0 +1,116 @@
+"""
+Model varyantlari (fp32 / fp16 / int8) icin dogruluk - gecikme raporu
+
+Her varyanti dogrulama bolumunde backend'in kendi yoluyla
+(preprocess_image -> session.run -> postprocess_detections) calistirir;
+mAP@0.5, mAP@0.5:0.95 ve CPU inference gecikmesini karsilastirir.
+
+Kullanim (screwvision_app/backend dizininden):
+    python ../../quantize_model.py
+    python benchmarks/quantization_report.py --json quant_report.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import cv2
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import main  # noqa: E402
+from metrics import (  # noqa: E402
+    DetectionEvaluator,
+    detections_to_arrays,
+    label_path_for,
+    percentiles,
+    read_ground_truth,
+    split_image_paths,
+)
+
+DATA_DIR = os.path.join(BACKEND_DIR, "..", "..", "screwVision_data")
+
+
+def evaluate_variant(
+    variant: str, model_path: str, image_paths: list, confidence: float
+) -> dict:
+    # Her varyant icin yeni session
+    main.ort_session = None
+    main.MODEL_VARIANT = variant
+    main.MODEL_PATH = model_path
+    session = main.load_model()
+    input_name = session.get_inputs()[0].name
+
+    evaluator = DetectionEvaluator(main.CLASS_NAMES)
+    infer_ms = []
+
+    for path in image_paths:
+        image = cv2.imread(path)
+        if image is None:
+            continue
+        input_tensor, scale, pad_w, pad_h, w, h = main.preprocess_image(image)
+
+        start = time.perf_counter()
+        outputs = session.run(None, {input_name: input_tensor})
+        infer_ms.append((time.perf_counter() - start) * 1000)
+
+        detections = main.postprocess_detections(
+            outputs, scale, pad_w, pad_h, w, h, confidence
+        )
+        evaluator.add(
+            detections_to_arrays(detections),
+            read_ground_truth(label_path_for(path), w, h),
+        )
+
+    result = evaluator.compute()
+    result["latency_ms"] = percentiles(infer_ms[1:])  # Ilk cagri isinma
+    result["model_bytes"] = os.path.getsize(model_path)
+    return result
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--split", default="valid")
+    parser.add_argument("--limit", type=int, default=0)
+    parser.add_argument("--confidence", type=float, default=0.001)
+    parser.add_argument("--variants", default=",".join(main.MODEL_VARIANTS))
+    parser.add_argument("--json", default=None, help="Raporu JSON olarak kaydet")
+    args = parser.parse_args()
+
+    image_paths = split_image_paths(DATA_DIR, args.split, args.limit)
+    report = {"split": args.split, "images": len(image_paths), "variants": {}}
+
+    for variant in args.variants.split(","):
+        model_path = os.path.join(main.MODEL_DIR, main.MODEL_VARIANTS[variant])
+        if not os.path.exists(model_path):
+            print(f"[UYARI] {variant} atlandi, model yok: {model_path}")
+            continue
+        report["variants"][variant] = evaluate_variant(
+            variant, model_path, image_paths, args.confidence
+        )
+
+    print(f"\n{args.split}: {len(image_paths)} goruntu")
+    print(
+        f"{'varyant':>8} | {'MB':>6} | {'mAP50':>6} | {'mAP50-95':>8} | "
+        f"{'ort ms':>7} | {'p50 ms':>7} | {'p95 ms':>7}"
+    )
+    for variant, r in report["variants"].items():
+        lat = r["latency_ms"]
+        print(
+            f"{variant:>8} | {r['model_bytes'] / 1e6:6.2f} | {r['map50']:6.4f} | "
+            f"{r['map50_95']:8.4f} | {lat['mean']:7.2f} | {lat['p50']:7.2f} | "
+            f"{lat['p95']:7.2f}"
+        )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Rapor kaydedildi: {args.json}")
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,87 @@
+"""
+ScrewVision - Model dosyasi izleyici
+Model dosyasi degisince (yeni export / kopyalama bittikten sonra) yeniden
+yukleme geri cagrisini tetikler
+"""
+
+import asyncio
+import os
+from typing import Awaitable, Callable, Optional
+
+
+def file_signature(path: str) -> Optional[tuple]:
+    """Dosyanin (boyut, mtime) imzasi; dosya yoksa None"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+class ModelWatcher:
+    """
+    Dosyayi belirli araliklarla yoklayan arka plan gorevi
+
+    Imza degistikten sonra bir yoklama daha ayni kalirsa (yazma bitti)
+    on_change cagrilir. Geri cagri hata verirse imza yine kabul edilir,
+    ayni bozuk dosya tekrar tekrar yuklenmeye calisilmaz.
+    """
+
+    def __init__(
+        self,
+        path_getter: Callable[[], str],
+        on_change: Callable[[], Awaitable],
+        interval_seconds: float = 5.0,
+    ):
+        self.path_getter = path_getter
+        self.on_change = on_change
+        self.interval_seconds = max(0.1, float(interval_seconds))
+
+        self._task: Optional[asyncio.Task] = None
+        self._accepted: Optional[tuple] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def accept_current(self):
+        """Mevcut dosyayi yuklenmis say (baslangicta / elle yuklemeden sonra)"""
+        self._accepted = file_signature(self.path_getter())
+
+    async def start(self):
+        if self.running:
+            return
+        if self._accepted is None:
+            self.accept_current()
+        self._task = asyncio.get_running_loop().create_task(self._run_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run_loop(self):
+        candidate = None
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            signature = file_signature(self.path_getter())
+
+            if signature is None or signature == self._accepted:
+                candidate = None
+                continue
+
+            # Yazma suruyor olabilir: bir sonraki yoklamada ayni kalmali
+            if signature != candidate:
+                candidate = signature
+                continue
+
+            self._accepted = signature
+            candidate = None
+            try:
+                await self.on_change()
+            except Exception as e:
+                print(f"[HATA] Model yeniden yuklenemedi: {e}")
@@ -0,0 +1,182 @@
+"""
+ScrewVision - Goruntu kabul asamasi (decode oncesi erken ret)
+  1. Istek govdesi ASGI seviyesinde sayilir; Content-Length veya akan bayt sayisi
+     siniri asarsa govdenin geri kalani okunmadan 413 doner
+  2. Yuklemenin ilk parcasindan bicim (JPEG / PNG / WebP / BMP / TIFF) ve baslikta
+     yaziyorsa boyut okunur; bilinmeyen bicim 415, cok fazla piksel 413 ile
+     decode edilmeden reddedilir. Multipart dosyalari Starlette handler'dan once
+     biriktirdigi icin burada onlenen okuma degil, bellege kopyalama ve decode'dur;
+     govdeyi hic okumadan reddetmek 1. adimin isidir. Websocket kareleri ve toplu
+     yukleme ogeleri de ayni kontrolden gecer (check_image_bytes).
+Decode sonrasinda preprocess.decode_image buyuk JPEG'leri INPUT_SIZE'i kapsayan en
+kucuk IMREAD_REDUCED olceginde cozer.
+"""
+
+import base64
+import binascii
+from typing import Dict, Optional, Tuple
+
+from fastapi import HTTPException, UploadFile
+
+from preprocess import jpeg_dimensions
+
+# Baslik kontrolu icin okunan ilk parca (EXIF / ICC segmentleri SOF'tan once gelir)
+PROBE_BYTES = 128 * 1024
+
+
+class RejectedImage(Exception):
+    """Yukleme decode edilmeden reddedildi (status_code + metrik etiketi)"""
+
+    def __init__(self, status_code: int, reason: str, message: str):
+        super().__init__(message)
+        self.status_code = status_code
+        self.reason = reason
+
+
+class BodyTooLarge(HTTPException):
+    """Akan govde siniri asti; FastAPI govde ayristirmasindan HTTPException olarak gecer"""
+
+    def __init__(self, limit: int):
+        super().__init__(status_code=413, detail=f"Istek govdesi cok buyuk (sinir {limit} bayt)")
+
+
+def sniff_format(data: bytes) -> Optional[str]:
+    """Sihirli baytlardan bicim adi; taninmazsa None"""
+    if data[:3] == b"\xff\xd8\xff":
+        return "jpeg"
+    if data[:8] == b"\x89PNG\r\n\x1a\n":
+        return "png"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "webp"
+    if data[:2] == b"BM":
+        return "bmp"
+    if data[:4] in (b"II*\x00", b"MM\x00*"):
+        return "tiff"
+    return None
+
+
+def _webp_dimensions(data: bytes) -> Optional[Tuple[int, int]]:
+    chunk = data[12:16]
+    if chunk == b"VP8 " and len(data) >= 30:
+        w = int.from_bytes(data[26:28], "little") & 0x3FFF
+        h = int.from_bytes(data[28:30], "little") & 0x3FFF
+        return w, h
+    if chunk == b"VP8L" and len(data) >= 25:
+        bits = int.from_bytes(data[21:25], "little")
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b"VP8X" and len(data) >= 30:
+        w = int.from_bytes(data[24:27], "little") + 1
+        h = int.from_bytes(data[27:30], "little") + 1
+        return w, h
+    return None
+
+
+def header_dimensions(fmt: str, data: bytes) -> Optional[Tuple[int, int]]:
+    """Baslikta yazan (w, h); parca yetmiyorsa veya bicim desteklenmiyorsa None"""
+    if fmt == "jpeg":
+        return jpeg_dimensions(data)
+    if fmt == "png" and len(data) >= 24 and data[12:16] == b"IHDR":
+        return int.from_bytes(data[16:20], "big"), int.from_bytes(data[20:24], "big")
+    if fmt == "webp":
+        return _webp_dimensions(data)
+    if fmt == "bmp" and len(data) >= 26:
+        w = int.from_bytes(data[18:22], "little", signed=True)
+        h = int.from_bytes(data[22:26], "little", signed=True)
+        return abs(w), abs(h)
+    return None
+
+
+def probe_image(head: bytes, max_pixels: int) -> Tuple[str, Optional[Tuple[int, int]]]:
+    """
+    Ilk parcayi kontrol et
+    Donus: (bicim, (w, h) veya None) - gecersizse RejectedImage
+    """
+    fmt = sniff_format(head)
+    if fmt is None:
+        raise RejectedImage(415, "format", "Desteklenmeyen veya bozuk goruntu bicimi")
+    size = header_dimensions(fmt, head)
+    if size is not None:
+        w, h = size
+        if w <= 0 or h <= 0:
+            raise RejectedImage(400, "header", "Goruntu basligi bozuk")
+        if max_pixels and w * h > max_pixels:
+            raise RejectedImage(
+                413, "pixels", f"Goruntu cok buyuk: {w}x{h} (sinir {max_pixels} piksel)"
+            )
+    return fmt, size
+
+
+async def read_upload(upload: UploadFile, max_bytes: int, max_pixels: int) -> bytes:
+    """
+    Yuklemeyi oku: once ilk PROBE_BYTES kontrol edilir, gecerliyse kalan
+    en fazla max_bytes'a kadar okunur. Dosya Starlette'in gecici dosyasinda zaten
+    duruyor; gecersiz / cok buyuk goruntu bellege kopyalanmadan ve decode edilmeden
+    reddedilir (govde siniri UploadLimitMiddleware'de)
+    """
+    if upload.size is not None and upload.size > max_bytes:
+        raise RejectedImage(413, "bytes", f"Dosya cok buyuk (sinir {max_bytes} bayt)")
+    head = await upload.read(PROBE_BYTES)
+    probe_image(head, max_pixels)
+    if len(head) < PROBE_BYTES:
+        return head
+    rest = await upload.read(max_bytes - len(head) + 1)
+    if len(head) + len(rest) > max_bytes:
+        raise RejectedImage(413, "bytes", f"Dosya cok buyuk (sinir {max_bytes} bayt)")
+    return head + rest
+
+
+def check_image_bytes(data: bytes, max_bytes: int, max_pixels: int):
+    """Bellekteki kodlu goruntuyu (websocket karesi, arsiv uyesi) decode oncesi kontrol et"""
+    if max_bytes and len(data) > max_bytes:
+        raise RejectedImage(413, "bytes", f"Goruntu cok buyuk (sinir {max_bytes} bayt)")
+    probe_image(data[:PROBE_BYTES], max_pixels)
+
+
+def probe_base64(text: str, max_bytes: int, max_pixels: int):
+    """
+    Base64 metnini tamamini cozmeden kontrol et: tahmini boyut ve ilk parcanin basligi
+    Onek hizalanamazsa (satir sonu vb.) baslik kontrolu decode'a birakilir
+    """
+    if len(text) // 4 * 3 > max_bytes:
+        raise RejectedImage(413, "bytes", f"Goruntu cok buyuk (sinir {max_bytes} bayt)")
+    try:
+        head = base64.b64decode(text[: PROBE_BYTES // 3 * 4])
+    except (binascii.Error, ValueError):
+        return
+    probe_image(head, max_pixels)
+
+
+class UploadLimitMiddleware:
+    """
+    Yol basina istek govdesi siniri (ASGI)
+    Content-Length siniri asiyorsa ilk okumada govde hic alinmadan 413 atilir;
+    Content-Length yoksa (chunked) veya yanlissa akan baytlar sayilir.
+    Ret endpoint icinde olustugu icin metriklerde endpoint etiketi korunur.
+    """
+
+    def __init__(self, app, limits: Dict[str, int]):
+        self.app = app
+        self.limits = limits
+
+    async def __call__(self, scope, receive, send):
+        limit = self.limits.get(scope.get("path")) if scope["type"] == "http" else None
+        if limit is None or scope["method"] != "POST":
+            await self.app(scope, receive, send)
+            return
+
+        length = dict(scope["headers"]).get(b"content-length", b"")
+        declared = int(length) if length.isdigit() else 0
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            if declared > limit:
+                raise BodyTooLarge(limit)
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    raise BodyTooLarge(limit)
+            return message
+
+        await self.app(scope, limited_receive, send)
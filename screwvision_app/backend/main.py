@@ -3,15 +3,65 @@ ScrewVision - Object Detection API (ONNX Version)
 FastAPI backend for waste classification using ONNX Runtime
 """
 
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi import FastAPI, UploadFile, File, HTTPException, Request, WebSocket
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
 import numpy as np
 import cv2
 import onnxruntime as ort
+import asyncio
 import base64
-from typing import List, Dict, Any
+import hmac
+import json
+import tarfile
+import time
+import zipfile
+from contextlib import AsyncExitStack
+from typing import List, Dict, Any, Optional
 import os
 
+from annotate import IMAGE_FORMATS, GlyphCache, draw_detections, encode_image, iter_chunks
+from batch_upload import is_archive, is_image_name, iter_archive_images
+from batching import BatchScheduler
+from hot_reload import ModelWatcher
+from ingest import (
+    RejectedImage,
+    UploadLimitMiddleware,
+    check_image_bytes,
+    probe_base64,
+    read_upload,
+)
+from packing import (
+    FLAG_KEYFRAME,
+    FLAG_TRACK_IDS,
+    HEADER_DTYPE,
+    MAX_PACKED_DIM,
+    PACKED_MEDIA_TYPE,
+    RECORD_DTYPE,
+    TRACK_RECORD_DTYPE,
+    fits_packed,
+    msgpack,
+    negotiate,
+    pack_detections,
+)
+from preprocess import (
+    TensorPool,
+    decode_factor,
+    decode_image,
+    letterbox_into,
+    new_input_tensor,
+)
+from prediction_store import PredictionStore, extract_candidates
+from process_pool import ProcessInferencePool
+from resolution import AdaptiveResolution, accepts_input_size, parse_input_sizes, size_model_path
+from result_cache import ResultCache, perceptual_hash
+from session_config import SessionConfig, SessionRunner, create_session
+from streaming import LatestFrameSlot
+from telemetry import CONTENT_TYPE as METRICS_CONTENT_TYPE, Registry, SamplingProfiler
+from tiling import fill_tile_batch, merge_tile_boxes, seam_boxes, tile_grid, tiles_with_candidates
+from tracking import TrackerRegistry, decode_gray
+from worker_pool import InferencePool, PoolSaturatedError, default_worker_count
+
 app = FastAPI(
     title="ScrewVision API (ONNX)",
     description="Vida Tanıma ve Uç Önerme API'si - ONNX Runtime",
@@ -50,69 +100,435 @@ CLASS_LABELS_TR = {
     "torx": "Torx (T)",
 }
 
-# Model Yolu (Yeni eğitilen model)
-MODEL_PATH = os.path.join(os.path.dirname(__file__), "models", "best.onnx")
+# Model varyantlari (quantize_model.py ile uretilir)
+MODEL_DIR = os.path.join(os.path.dirname(__file__), "models")
+MODEL_VARIANTS = {
+    "fp32": "best.onnx",
+    "fp16": "best_fp16.onnx",
+    "int8": "best_int8.onnx",
+}
+MODEL_VARIANT = os.environ.get("SCREWVISION_MODEL_VARIANT", "fp32").lower()
+if MODEL_VARIANT not in MODEL_VARIANTS:
+    raise ValueError(
+        f"Gecersiz SCREWVISION_MODEL_VARIANT: {MODEL_VARIANT} "
+        f"(secenekler: {', '.join(MODEL_VARIANTS)})"
+    )
+
+# Model Yolu (Yeni eğitilen model) - SCREWVISION_MODEL_PATH varyanti ezer
+MODEL_PATH = os.environ.get(
+    "SCREWVISION_MODEL_PATH", os.path.join(MODEL_DIR, MODEL_VARIANTS[MODEL_VARIANT])
+)
 
 # Model boyutu (YOLO default)
 INPUT_SIZE = 640
 
+# Buyuk JPEG'leri IMREAD_REDUCED_* ile dogrudan kucuk decode et
+REDUCED_DECODE = os.environ.get("SCREWVISION_REDUCED_DECODE", "1") == "1"
+
+# Tek goruntu yuklemesi siniri ve baslikta okunan en fazla piksel (0 = sinirsiz)
+# Ikisi de decode'dan once kontrol edilir (bkz. ingest.py)
+MAX_UPLOAD_MB = float(os.environ.get("SCREWVISION_MAX_UPLOAD_MB", "25"))
+MAX_UPLOAD_BYTES = int(MAX_UPLOAD_MB * 1024 * 1024)
+MAX_IMAGE_PIXELS = int(os.environ.get("SCREWVISION_MAX_IMAGE_PIXELS", "50000000"))
+
+# Sonuc onbellegi (0 MB = kapali)
+# Algisal ozet mesafesi < 0 ise sadece birebir ayni kareler eslesir
+CACHE_MAX_MB = float(os.environ.get("SCREWVISION_CACHE_MB", "32"))
+CACHE_TTL_SECONDS = float(os.environ.get("SCREWVISION_CACHE_TTL", "30"))
+CACHE_PHASH_DISTANCE = int(os.environ.get("SCREWVISION_CACHE_PHASH_DISTANCE", "-1"))
+
+# Ham tahmin deposu: esik oncesi adaylar request_id ile saklanir (0 = kapali)
+PREDICTION_STORE_SIZE = int(os.environ.get("SCREWVISION_PREDICTION_STORE", "256"))
+PREDICTION_TTL_SECONDS = float(os.environ.get("SCREWVISION_PREDICTION_TTL", "300"))
+# Yeniden sorgu, esik en iyi CANDIDATE_TOP_K aday icinde kaldikca tam sonucla aynidir
+CANDIDATE_MIN_CONFIDENCE = 0.01
+CANDIDATE_TOP_K = 1000
+
+# Mikro-batch ayarlari (dinamik batch eksenli model gerekir, sabit modelde 1'e duser)
+MAX_BATCH_SIZE = int(os.environ.get("SCREWVISION_MAX_BATCH_SIZE", "8"))
+MAX_BATCH_WAIT_MS = float(os.environ.get("SCREWVISION_MAX_BATCH_WAIT_MS", "5"))
+
+# Ek giris cozunurlukleri (ornegin "320,416,640"); INPUT_SIZE varsayilan boyuttur
+# Boyut basina best_<boyut>.onnx varsa o, yoksa H/W'si dinamikse ana model kullanilir
+INPUT_SIZES = parse_input_sizes(os.environ.get("SCREWVISION_INPUT_SIZES", ""), INPUT_SIZE)
+# "auto" boyut: p90 gecikme hedefi veya kuyruk siniri asilinca bir kademe kuculur
+AUTO_TARGET_LATENCY_MS = float(os.environ.get("SCREWVISION_AUTO_LATENCY_MS", "100"))
+AUTO_TARGET_QUEUE = int(os.environ.get("SCREWVISION_AUTO_QUEUE", str(2 * MAX_BATCH_SIZE)))
+AUTO_COOLDOWN_SECONDS = float(os.environ.get("SCREWVISION_AUTO_COOLDOWN", "2"))
+# Websocket akisinin varsayilan boyutu ("auto" veya sayi)
+STREAM_INPUT_SIZE = os.environ.get("SCREWVISION_STREAM_INPUT_SIZE", "auto")
+
+# Dilimli inference (/detect?tiled=true): kare kenari kaynak piksel cinsinden
+TILE_SIZE = int(os.environ.get("SCREWVISION_TILE_SIZE", "1280"))
+TILE_OVERLAP = float(os.environ.get("SCREWVISION_TILE_OVERLAP", "0.2"))
+# Istek basina en fazla kare (asilirsa kare buyutulur) ve tek session.run'daki kare
+TILE_MAX = int(os.environ.get("SCREWVISION_TILE_MAX", "48"))
+TILE_BATCH = int(os.environ.get("SCREWVISION_TILE_BATCH", "16"))
+# Dusuk cozunurluk gecisinde bu esigi gecen aday olmayan kareler atlanir (0 = hepsi calisir)
+TILE_GATE_CONFIDENCE = float(os.environ.get("SCREWVISION_TILE_GATE_CONFIDENCE", "0.05"))
+# Kareler arasi birlestirme: dikise degen kutuda kesisim / kucuk kutu alani bu degeri
+# asarsa ayni nesne; dikise bu kadar pikselden (kaynak) yakin kutu kesik sayilir
+TILE_MERGE_OVERLAP = 0.6
+TILE_SEAM_MARGIN = 4.0
+
+# Izleme modu (/track, /ws/detect?track=true): dedektor sadece anahtar karelerde
+# calisir (her N karede bir veya kucuk resim farki esigi asinca)
+TRACK_KEYFRAME_INTERVAL = int(os.environ.get("SCREWVISION_TRACK_KEYFRAME_INTERVAL", "10"))
+TRACK_SCENE_THRESHOLD = float(os.environ.get("SCREWVISION_TRACK_SCENE_THRESHOLD", "0.08"))
+# Optik akisin calistigi gri karenin uzun kenari (px)
+TRACK_SIZE = int(os.environ.get("SCREWVISION_TRACK_SIZE", "320"))
+TRACK_SESSIONS = int(os.environ.get("SCREWVISION_TRACK_SESSIONS", "64"))
+TRACK_IDLE_SECONDS = float(os.environ.get("SCREWVISION_TRACK_IDLE_SECONDS", "60"))
+
+# Isaretlenmis goruntu (/detect/annotated): varsayilan uzun kenar (0 = kaynak boyutu)
+# ve JPEG / WebP kalitesi
+ANNOTATE_MAX_DIM = int(os.environ.get("SCREWVISION_ANNOTATE_MAX_DIM", "1280"))
+ANNOTATE_QUALITY = int(os.environ.get("SCREWVISION_ANNOTATE_QUALITY", "85"))
+
+# Ayri inference surecleri (0 = kapali, session bu surecte calisir)
+# Her surec bir cekirdek dilimine sabitlenir; tensorler paylasimli bellekle tasinir
+INFERENCE_PROCESSES = int(os.environ.get("SCREWVISION_INFERENCE_PROCESSES", "0"))
+
+# Is parcacigi havuzu ve kabul kuyrugu
+# Surec modunda her calisan batch bir thread'i bekletir, pre/post icin ek thread birak
+WORKER_THREADS = int(
+    os.environ.get(
+        "SCREWVISION_WORKER_THREADS", default_worker_count() + INFERENCE_PROCESSES
+    )
+)
+MAX_PENDING_REQUESTS = int(
+    os.environ.get("SCREWVISION_MAX_PENDING", WORKER_THREADS * 8)
+)
+RETRY_AFTER_SECONDS = int(os.environ.get("SCREWVISION_RETRY_AFTER", "1"))
+
+# /detect/batch: ayni anda islenen goruntu sayisi ve sinirlar
+BATCH_UPLOAD_CONCURRENCY = int(
+    os.environ.get("SCREWVISION_BATCH_CONCURRENCY", MAX_BATCH_SIZE * 2)
+)
+BATCH_UPLOAD_MAX_IMAGES = int(os.environ.get("SCREWVISION_BATCH_MAX_IMAGES", "2000"))
+BATCH_UPLOAD_MAX_IMAGE_MB = float(os.environ.get("SCREWVISION_BATCH_MAX_IMAGE_MB", "25"))
+# Toplu istek govdesinin tamami; Starlette multipart'i diske biriktirdigi icin disk siniridir
+BATCH_UPLOAD_MAX_MB = float(os.environ.get("SCREWVISION_BATCH_MAX_UPLOAD_MB", "1024"))
+
+# Model dosyasi degisince yeniden yukle (saniye, 0 = kapali)
+MODEL_WATCH_SECONDS = float(os.environ.get("SCREWVISION_MODEL_WATCH_SECONDS", "0"))
+# /admin/* icin token (X-Admin-Token); bos ise admin endpoint'leri kapali
+# (ters vekil arkasinda her istek localhost'tan geldigi icin adrese guvenilmez)
+ADMIN_TOKEN = os.environ.get("SCREWVISION_ADMIN_TOKEN", "")
+
+# Asama / istek metrikleri (/metrics) ve ornekleyen profiler (/admin/profile)
+METRICS_ENABLED = os.environ.get("SCREWVISION_METRICS", "1") == "1"
+PROFILER_ENABLED = os.environ.get("SCREWVISION_PROFILER", "0") == "1"
+PROFILER_MAX_SECONDS = float(os.environ.get("SCREWVISION_PROFILER_MAX_SECONDS", "60"))
+
+# ONNX Runtime session ayarlari (bkz. session_config.py)
+# Varsayilan thread'ler: havuzdaki her is parcacigi ayni anda session.run
+# cagirabilir, toplam thread sayisi cekirdek sayisini asmasin
+SESSION_CONFIG = SessionConfig.from_env(
+    {
+        "intra_op_threads": max(1, (os.cpu_count() or 1) // WORKER_THREADS),
+        "inter_op_threads": 1,
+        "optimized_cache_dir": os.path.join(MODEL_DIR, ".ort_cache"),
+    }
+)
+
+# Metrikler (bkz. telemetry.py); gostergeler havuz ve zamanlayici olusunca eklenir
+metrics = Registry()
+stage_seconds = metrics.histogram(
+    "screwvision_stage_seconds", "Istek yolundaki asamalarin suresi (sn)", ["stage"]
+)
+request_counter = metrics.counter(
+    "screwvision_requests_total", "Endpoint basina istek sayisi", ["endpoint", "method", "status"]
+)
+request_seconds = metrics.histogram(
+    "screwvision_request_seconds", "Endpoint basina istek suresi (sn)", ["endpoint"]
+)
+error_counter = metrics.counter(
+    "screwvision_errors_total", "Endpoint basina hata (503 disi 5xx veya istisna)", ["endpoint"]
+)
+ingest_rejected_counter = metrics.counter(
+    "screwvision_ingest_rejected_total", "Decode oncesi reddedilen goruntuler", ["reason"]
+)
+detection_counter = metrics.counter(
+    "screwvision_detections_total", "Model tarafindan uretilen tespitler", ["class"]
+)
+batch_size_histogram = metrics.histogram(
+    "screwvision_batch_size", "session.run basina goruntu sayisi", buckets=(1, 2, 4, 8, 16, 32)
+)
+profiler = SamplingProfiler()
+
+
+def timed_stage(stage: str):
+    """Fonksiyon suresini screwvision_stage_seconds{stage=...} altinda kaydet"""
+    if not METRICS_ENABLED:
+        return lambda fn: fn
+    return stage_seconds.timed(stage)
+
+
+def record_batch(size: int, infer_seconds: float, queue_waits: List[float]):
+    """Batch zamanlayici kancasi: model suresi, batch boyutu ve kuyrukta bekleme"""
+    batch_size_histogram.observe(size)
+    stage_seconds.observe(infer_seconds, "infer")
+    for wait in queue_waits:
+        stage_seconds.observe(wait, "batch_wait")
+
+
+def record_detections(detections: List[Dict[str, Any]]):
+    for detection in detections:
+        detection_counter.inc(detection["class_name"])
+
+
 # ONNX Session
 ort_session = None
+# Batch zamanlayicinin kullandigi sarmalayici (IO binding)
+session_runner = None
+# Giris boyutu -> sarmalayici (INPUT_SIZE icin session_runner)
+size_runners: Dict[int, SessionRunner] = {}
+# Isinma bitene kadar /health "warming_up" doner
+model_ready = False
+model_info = {"path": MODEL_PATH, "loaded_at": None, "reloads": 0, "last_error": None}
+
+
+def build_session(model_path: str) -> tuple:
+    """Ayarlara gore yeni session + sarmalayici olustur ve bilgileri yazdir"""
+    if not os.path.exists(model_path):
+        raise FileNotFoundError(f"Model bulunamadi: {model_path}")
+
+    # ONNX Runtime session olustur
+    start = time.perf_counter()
+    session, cache_status = create_session(model_path, SESSION_CONFIG)
+    load_ms = (time.perf_counter() - start) * 1000
+    runner = SessionRunner(session, SESSION_CONFIG.io_binding)
+
+    # Model bilgilerini yazdir
+    input_info = session.get_inputs()[0]
+    print(f"[OK] ONNX Model yuklendi ({MODEL_VARIANT}): {model_path}")
+    print(
+        f"    Input: {input_info.name}, Shape: {input_info.shape}, Type: {input_info.type}"
+    )
+    settings = SESSION_CONFIG.describe()
+    print(
+        f"    Providers: {', '.join(session.get_providers())}, "
+        f"threads: {settings['intra_op_threads']}/{settings['inter_op_threads']}, "
+        f"mode: {settings['execution_mode']}, "
+        f"graph_opt: {settings['graph_optimization']}, "
+        f"mem_arena: {settings['enable_mem_arena']}, "
+        f"io_binding: {settings['io_binding']}"
+    )
+    print(f"    Yukleme: {load_ms:.0f} ms (optimize model onbellegi: {cache_status})")
+    return session, runner
 
 
 def load_model():
     """ONNX modelini yukle"""
-    global ort_session
+    global ort_session, session_runner
     if ort_session is None:
-        if not os.path.exists(MODEL_PATH):
-            raise FileNotFoundError(f"Model bulunamadi: {MODEL_PATH}")
+        ort_session, session_runner = build_session(MODEL_PATH)
+        model_info.update(path=MODEL_PATH, loaded_at=time.time())
+    return ort_session
 
-        # ONNX Runtime session olustur
-        providers = ["CoreMLExecutionProvider", "CPUExecutionProvider"]
-        ort_session = ort.InferenceSession(MODEL_PATH, providers=providers)
 
-        # Model bilgilerini yazdir
-        input_info = ort_session.get_inputs()[0]
-        print(f"[OK] ONNX Model yuklendi: {MODEL_PATH}")
-        print(
-            f"    Input: {input_info.name}, Shape: {input_info.shape}, Type: {input_info.type}"
-        )
-    return ort_session
+def warm_up(runner: SessionRunner, input_size: int = INPUT_SIZE) -> Dict[int, float]:
+    """
+    Zamanlayicinin uretebilecegi her batch boyutunu sentetik girisle calistir
+    (ilk cagri bedelleri - bellek plani, IO binding boyutlari - istek disinda odensin)
+    """
+    limit = batch_scheduler.session_batch_limit(runner)
+    latencies = runner.warmup(input_size, range(1, limit + 1))
+    print(
+        f"[OK] Isinma ({input_size}px): "
+        + ", ".join(f"batch={b} {ms:.1f} ms" for b, ms in latencies.items())
+    )
+    return latencies
 
 
-def preprocess_image(image: np.ndarray, input_size: int = INPUT_SIZE) -> tuple:
+def build_size_runners(model_path: str) -> Dict[int, SessionRunner]:
+    """
+    INPUT_SIZE disindaki boyutlar icin ayri session'lar olustur ve isit
+    Modeli bu boyutu kabul etmeyen (sabit H/W, ayri export yok) boyutlar atlanir
+    """
+    runners = {}
+    for size in INPUT_SIZES:
+        if size == INPUT_SIZE:
+            continue
+        session, runner = build_session(size_model_path(model_path, size))
+        if not accepts_input_size(session, size):
+            print(
+                f"[UYARI] {size}px atlandi: model giris boyutu {session.get_inputs()[0].shape}, "
+                f"dinamik H/W'li model veya {os.path.basename(size_model_path(model_path, size))} "
+                f"yerine *_{size}.onnx export'u gerekir"
+            )
+            continue
+        warm_up(runner, size)
+        runners[size] = runner
+    return runners
+
+
+def available_input_sizes() -> List[int]:
+    """Su an sunulan giris boyutlari (surec modunda sadece INPUT_SIZE)"""
+    return sorted(size_runners) if size_runners else [INPUT_SIZE]
+
+
+def start_process_pool(model_path: str) -> ProcessInferencePool:
+    """Inference sureclerini baslat ve isinmalarini bekle (bloklar)"""
+    pool = ProcessInferencePool(
+        model_path,
+        INFERENCE_PROCESSES,
+        INPUT_SIZE,
+        MAX_BATCH_SIZE,
+        SESSION_CONFIG.describe(),
+    ).start()
+    print(f"[OK] {pool.processes} inference sureci hazir: {model_path}")
+    for worker in pool.stats()["workers"]:
+        print(f"    pid={worker['pid']}, cekirdekler={worker['cores']}")
+    return pool
+
+
+# Surec modunda (SCREWVISION_INFERENCE_PROCESSES > 0) session yerine kullanilir
+process_pool = None
+
+
+def get_session_runner():
+    """Batch zamanlayici icin session sarmalayicisi veya surec havuzu"""
+    if process_pool is not None:
+        return process_pool
+    load_model()
+    return session_runner
+
+
+def get_size_runner(size: int):
+    """Ek boyut zamanlayicilari icin; boyut model degisiminde kalktiysa hata"""
+    runner = size_runners.get(size)
+    if runner is None:
+        raise RuntimeError(f"{size}px giris boyutu su an sunulmuyor")
+    return runner
+
+
+@timed_stage("preprocess")
+def preprocess_image(
+    image: np.ndarray,
+    input_size: int = INPUT_SIZE,
+    out: np.ndarray = None,
+    original_size: tuple = None,
+) -> tuple:
     """
     Goruntyu ONNX modeli icin hazirla
+    out verilirse ([1, 3, S, S] float32) tensor yeniden kullanilir, yoksa yenisi ayrilir
+    original_size: kucultulerek decode edilen goruntunun kaynak (w, h) boyutu
     """
-    original_h, original_w = image.shape[:2]
+    if out is None:
+        out = new_input_tensor(input_size)
 
-    # Aspect ratio koruyarak yeniden boyutlandir
-    scale = min(input_size / original_w, input_size / original_h)
-    new_w = int(original_w * scale)
-    new_h = int(original_h * scale)
+    # Resize + padding + BGR->RGB + normalize + HWC->CHW (bkz. preprocess.py)
+    scale, pad_w, pad_h, original_w, original_h = letterbox_into(
+        image, out, input_size, original_size
+    )
 
-    resized = cv2.resize(image, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+    return out, scale, pad_w, pad_h, original_w, original_h
 
-    # Padding ekle (letterbox)
-    pad_w = (input_size - new_w) // 2
-    pad_h = (input_size - new_h) // 2
 
-    padded = np.full((input_size, input_size, 3), 114, dtype=np.uint8)
-    padded[pad_h : pad_h + new_h, pad_w : pad_w + new_w] = resized
+def decode_output(outputs: np.ndarray) -> np.ndarray:
+    """
+    Ham ONNX ciktisini [num_detections, 4 + num_classes] matrisine cevir
+    YOLOv8 output format: [1, 84, 8400] veya [1, num_classes+4, num_detections]
+    """
+    output = outputs[0]  # Ilk output
 
-    # BGR -> RGB
-    rgb = cv2.cvtColor(padded, cv2.COLOR_BGR2RGB)
+    # [1, 84, 8400] -> [84, 8400]
+    if len(output.shape) == 3:
+        output = output[0]
+
+    # [84, 8400] -> [8400, 84] (transpose)
+    if output.shape[0] < output.shape[1]:
+        output = output.T
+
+    return output
+
+
+def non_max_suppression(
+    boxes: np.ndarray,
+    scores: np.ndarray,
+    iou_threshold: float = 0.45,
+    class_ids: np.ndarray = None,
+) -> np.ndarray:
+    """
+    Vektorel greedy NMS (cv2.dnn.NMSBoxes ile ayni sonuc)
+    boxes: [N, 4] x1, y1, x2, y2 - class_ids verilirse sinif bazli NMS yapilir
+    Donus: tutulan kutularin indeksleri (skora gore azalan)
+    """
+    if len(boxes) == 0:
+        return np.empty(0, dtype=np.int64)
+
+    if class_ids is not None:
+        # Her sinifi ayri bir koordinat bolgesine kaydir, kutular siniflar arasi cakismaz
+        offset = class_ids.astype(boxes.dtype)[:, None] * (boxes.max() + 1)
+        boxes = boxes + offset
+
+    x1, y1, x2, y2 = boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3]
+    areas = (x2 - x1) * (y2 - y1)
+
+    # NMSBoxes ile ayni sira: skora gore azalan, esitlikte ilk gelen
+    order = np.argsort(-scores, kind="stable")
+    keep = []
+
+    while order.size > 0:
+        i = order[0]
+        keep.append(i)
+        rest = order[1:]
+
+        inter_w = np.maximum(
+            0.0, np.minimum(x2[i], x2[rest]) - np.maximum(x1[i], x1[rest])
+        )
+        inter_h = np.maximum(
+            0.0, np.minimum(y2[i], y2[rest]) - np.maximum(y1[i], y1[rest])
+        )
+        inter = inter_w * inter_h
+        area_sum = areas[i] + areas[rest]
+        # NMSBoxes gibi: iki alansiz (kirpilmis) kutu birbirinin aynisi sayilir
+        iou = np.where(
+            area_sum > 0, inter / np.maximum(area_sum - inter, 1e-12), 1.0
+        )
+
+        order = rest[iou <= iou_threshold]
+
+    return np.asarray(keep, dtype=np.int64)
+
+
+def format_detections(
+    boxes: np.ndarray, scores: np.ndarray, class_ids: np.ndarray
+) -> List[Dict[str, Any]]:
+    """Tespit dizilerini API yanit formatina cevir"""
+    detections = []
 
-    # Normalize [0, 255] -> [0, 1]
-    normalized = rgb.astype(np.float32) / 255.0
+    for (x1, y1, x2, y2), confidence, class_id in zip(
+        boxes.tolist(), scores.tolist(), class_ids.tolist()
+    ):
+        # Sinif adini al
+        if class_id < len(CLASS_NAMES):
+            class_name = CLASS_NAMES[class_id]
+        else:
+            class_name = f"class_{class_id}"
 
-    # HWC -> CHW -> NCHW
-    transposed = np.transpose(normalized, (2, 0, 1))
-    batched = np.expand_dims(transposed, axis=0)
+        detections.append(
+            {
+                "class_id": class_id,
+                "class_name": class_name,
+                "class_label": CLASS_LABELS_TR.get(class_name, class_name),
+                "confidence": round(confidence, 3),
+                "bbox": {
+                    "x1": int(x1),
+                    "y1": int(y1),
+                    "x2": int(x2),
+                    "y2": int(y2),
+                },
+                "color": CLASS_COLORS.get(class_name, "#FFFFFF"),
+            }
+        )
 
-    return batched, scale, pad_w, pad_h, original_w, original_h
+    return detections
 
 
+@timed_stage("postprocess")
 def postprocess_detections(
     outputs: np.ndarray,
     scale: float,
@@ -122,111 +538,95 @@ def postprocess_detections(
     original_h: int,
     confidence_threshold: float = 0.25,
     iou_threshold: float = 0.45,
+    agnostic_nms: bool = True,
 ) -> List[Dict[str, Any]]:
     """
     ONNX ciktisini isle ve tespitleri dondur
-    YOLOv8 output format: [1, 84, 8400] veya [1, num_classes+4, num_detections]
+    agnostic_nms=False ise NMS her sinif icin ayri uygulanir
     """
-    detections = []
-
-    # Output shape'i kontrol et
-    output = outputs[0]  # Ilk output
-
-    # [1, 84, 8400] -> [84, 8400] -> [8400, 84]
-    if len(output.shape) == 3:
-        output = output[0]
-
-    # [84, 8400] -> [8400, 84] (transpose)
-    if output.shape[0] < output.shape[1]:
-        output = output.T
-
-    # Her detection icin: [x_center, y_center, width, height, class_scores...]
-    num_detections = output.shape[0]
-    num_classes = output.shape[1] - 4
-
-    boxes = []
-    scores = []
-    class_ids = []
-
-    for i in range(num_detections):
-        detection = output[i]
+    return filter_predictions(
+        decode_output(outputs),
+        scale,
+        pad_w,
+        pad_h,
+        original_w,
+        original_h,
+        confidence_threshold,
+        iou_threshold,
+        agnostic_nms,
+    )
 
-        # Box coordinates
-        x_center, y_center, w, h = detection[:4]
 
-        # Class scores
-        class_scores = detection[4:]
+def filter_predictions(
+    output: np.ndarray,
+    scale: float,
+    pad_w: int,
+    pad_h: int,
+    original_w: int,
+    original_h: int,
+    confidence_threshold: float = 0.25,
+    iou_threshold: float = 0.45,
+    agnostic_nms: bool = True,
+) -> List[Dict[str, Any]]:
+    """
+    [N, 4 + num_classes] tahmin matrisini esikle ve NMS uygula
+    Tum adimlar vektorel: esikleme, xywh -> xyxy, letterbox geri donusumu, NMS
+    """
+    candidates = prediction_boxes(
+        output, scale, pad_w, pad_h, original_w, original_h, confidence_threshold
+    )
+    if candidates is None:
+        return []
+    boxes, scores, class_ids = candidates
 
-        # En yuksek skorlu sinif
-        class_id = np.argmax(class_scores)
-        confidence = class_scores[class_id]
+    # NMS uygula
+    keep = non_max_suppression(
+        boxes, scores, iou_threshold, None if agnostic_nms else class_ids
+    )
 
-        if confidence < confidence_threshold:
-            continue
+    return format_detections(boxes[keep], scores[keep], class_ids[keep])
 
-        # x_center, y_center, w, h -> x1, y1, x2, y2
-        x1 = x_center - w / 2
-        y1 = y_center - h / 2
-        x2 = x_center + w / 2
-        y2 = y_center + h / 2
 
-        # Padding'i cikar ve scale'i geri al
-        x1 = (x1 - pad_w) / scale
-        y1 = (y1 - pad_h) / scale
-        x2 = (x2 - pad_w) / scale
-        y2 = (y2 - pad_h) / scale
+def prediction_boxes(
+    output: np.ndarray,
+    scale: float,
+    pad_w: int,
+    pad_h: int,
+    original_w: int,
+    original_h: int,
+    confidence_threshold: float,
+) -> Optional[tuple]:
+    """
+    Esigi gecen adaylar goruntu koordinatlarinda (NMS oncesi)
+    Donus: (boxes [N, 4] x1 y1 x2 y2, scores, class_ids) - aday yoksa None
+    """
+    # En yuksek skorlu sinif
+    class_scores = output[:, 4:]
+    class_ids = np.argmax(class_scores, axis=1)
+    confidences = class_scores[np.arange(len(class_ids)), class_ids]
 
-        # Sinirlari kontrol et
-        x1 = max(0, min(x1, original_w))
-        y1 = max(0, min(y1, original_h))
-        x2 = max(0, min(x2, original_w))
-        y2 = max(0, min(y2, original_h))
+    # Esik alti adaylari at (NMSBoxes score_threshold ile ayni: kesin buyuk)
+    mask = confidences > confidence_threshold
+    if not np.any(mask):
+        return None
 
-        boxes.append([x1, y1, x2, y2])
-        scores.append(float(confidence))
-        class_ids.append(int(class_id))
+    xywh = output[mask, :4].astype(np.float64)
+    scores = confidences[mask].astype(np.float64)
+    class_ids = class_ids[mask]
 
-    # NMS uygula
-    if len(boxes) > 0:
-        boxes_np = np.array(boxes)
-        scores_np = np.array(scores)
+    # x_center, y_center, w, h -> x1, y1, x2, y2
+    half_wh = xywh[:, 2:4] / 2
+    boxes = np.concatenate([xywh[:, :2] - half_wh, xywh[:, :2] + half_wh], axis=1)
 
-        # OpenCV NMS
-        indices = cv2.dnn.NMSBoxes(
-            boxes_np.tolist(), scores_np.tolist(), confidence_threshold, iou_threshold
-        )
+    # Padding'i cikar ve scale'i geri al
+    boxes -= (pad_w, pad_h, pad_w, pad_h)
+    boxes /= scale
 
-        if len(indices) > 0:
-            indices = indices.flatten()
-
-            for idx in indices:
-                x1, y1, x2, y2 = boxes[idx]
-                class_id = class_ids[idx]
-                confidence = scores[idx]
-
-                # Sinif adini al
-                if class_id < len(CLASS_NAMES):
-                    class_name = CLASS_NAMES[class_id]
-                else:
-                    class_name = f"class_{class_id}"
-
-                detections.append(
-                    {
-                        "class_id": class_id,
-                        "class_name": class_name,
-                        "class_label": CLASS_LABELS_TR.get(class_name, class_name),
-                        "confidence": round(confidence, 3),
-                        "bbox": {
-                            "x1": int(x1),
-                            "y1": int(y1),
-                            "x2": int(x2),
-                            "y2": int(y2),
-                        },
-                        "color": CLASS_COLORS.get(class_name, "#FFFFFF"),
-                    }
-                )
+    # Sinirlari kontrol et
+    np.clip(boxes[:, 0::2], 0, original_w, out=boxes[:, 0::2])
+    np.clip(boxes[:, 1::2], 0, original_h, out=boxes[:, 1::2])
 
-    return detections
+    return boxes, scores, class_ids
 
 
 def run_inference(image: np.ndarray, confidence: float = 0.25) -> tuple:
@@ -252,11 +652,693 @@ def run_inference(image: np.ndarray, confidence: float = 0.25) -> tuple:
     return detections, orig_w, orig_h
 
 
+# CPU agirlikli adimlar icin sinirli havuz (event loop'u bloklamaz)
+inference_pool = InferencePool(WORKER_THREADS, MAX_PENDING_REQUESTS, RETRY_AFTER_SECONDS)
+
+# Eszamanli istekleri tek session.run cagrisinda toplayan zamanlayici
+batch_scheduler = BatchScheduler(
+    get_session_runner,
+    MAX_BATCH_SIZE,
+    MAX_BATCH_WAIT_MS,
+    executor=inference_pool.executor,
+    max_concurrent_batches=INFERENCE_PROCESSES or WORKER_THREADS,
+    on_batch=record_batch if METRICS_ENABLED else None,
+)
+
+# Giris boyutu basina zamanlayici (bir batch'teki tensorler ayni boyutta olmali)
+batch_schedulers = {INPUT_SIZE: batch_scheduler}
+for _size in INPUT_SIZES:
+    if _size != INPUT_SIZE:
+        batch_schedulers[_size] = BatchScheduler(
+            lambda size=_size: get_size_runner(size),
+            MAX_BATCH_SIZE,
+            MAX_BATCH_WAIT_MS,
+            executor=inference_pool.executor,
+            max_concurrent_batches=WORKER_THREADS,
+            on_batch=record_batch if METRICS_ENABLED else None,
+        )
+
+
+def batch_queue_depth() -> int:
+    """Tum zamanlayicilarda model bekleyen goruntuler"""
+    return sum(scheduler.pending for scheduler in batch_schedulers.values())
+
+
+# "auto" istekleri icin boyut secici
+adaptive_resolution = AdaptiveResolution(
+    [INPUT_SIZE], AUTO_TARGET_LATENCY_MS, AUTO_TARGET_QUEUE, AUTO_COOLDOWN_SECONDS
+)
+
+
+def resolve_input_size(value) -> int:
+    """
+    Istekteki boyut secimini cozumle: None -> INPUT_SIZE, "auto" -> secici,
+    sayi -> sunulan boyutlardan biri olmali (degilse 400)
+    """
+    if value is None or value == "":
+        return INPUT_SIZE
+    if str(value).lower() == "auto":
+        return adaptive_resolution.select(batch_queue_depth())
+    try:
+        size = int(value)
+    except (TypeError, ValueError):
+        size = None
+    sizes = available_input_sizes()
+    if size not in sizes:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Gecersiz giris boyutu: {value} (secenekler: auto, {', '.join(map(str, sizes))})",
+        )
+    return size
+
+
+metrics.gauge(
+    "screwvision_requests_in_flight", "Kabul edilmis, islenen istekler", lambda: inference_pool.in_flight
+)
+metrics.gauge(
+    "screwvision_requests_max_pending", "Kabul siniri", lambda: inference_pool.max_pending
+)
+metrics.callback_counter(
+    "screwvision_requests_rejected_total", "Kapasite dolu oldugu icin 503 donen istekler",
+    lambda: inference_pool.rejected,
+)
+metrics.gauge(
+    "screwvision_batch_queue_depth", "Batch zamanlayicida bekleyen goruntuler",
+    batch_queue_depth,
+)
+metrics.gauge(
+    "screwvision_auto_input_size", "auto modunda secilen giris boyutu (px)",
+    lambda: adaptive_resolution.current,
+)
+input_size_counter = metrics.counter(
+    "screwvision_input_size_total", "Giris boyutuna gore model calistirilan goruntuler", ["size"]
+)
+metrics.gauge("screwvision_model_ready", "Model yuklu ve isinmis (1/0)", lambda: model_ready)
+metrics.callback_counter(
+    "screwvision_model_reloads_total", "Basarili model degisimleri", lambda: model_info["reloads"]
+)
+
+
+# Istekler arasinda yeniden kullanilan giris tensorleri (boyut basina)
+input_tensors = {size: TensorPool(size) for size in INPUT_SIZES}
+
+
+def input_tensor_pool(input_size: int):
+    """Surec modunda letterbox dogrudan surec havuzunun paylasimli yuvalarina yazilir"""
+    pool = process_pool
+    if pool is not None and input_size == pool.input_size:
+        return pool.input_tensors
+    return input_tensors[input_size]
+
+
+@timed_stage("decode")
+def decode_image_bytes(image_bytes: bytes, input_size: int = INPUT_SIZE) -> tuple:
+    """
+    Kodlu goruntu baytlarini BGR diziye cevir
+    Donus: (goruntu veya None, kaynak (w, h)) - buyuk JPEG'ler kucuk decode edilir
+    (kucuk giris boyutunda daha fazla kucultulur)
+    """
+    return decode_image(image_bytes, input_size if REDUCED_DECODE else None)
+
+
+@timed_stage("postprocess")
+def postprocess_and_store(
+    outputs: np.ndarray,
+    scale: float,
+    pad_w: int,
+    pad_h: int,
+    original_w: int,
+    original_h: int,
+    confidence_threshold: float,
+    request_id: str,
+) -> List[Dict[str, Any]]:
+    """
+    postprocess_detections ile ayni, ek olarak esik oncesi adaylari
+    request_id altinda saklar (yeniden esikleme icin)
+    """
+    predictions = decode_output(outputs)
+    meta = (scale, pad_w, pad_h, original_w, original_h)
+
+    prediction_store.put(
+        request_id,
+        extract_candidates(predictions, CANDIDATE_MIN_CONFIDENCE, CANDIDATE_TOP_K),
+        meta,
+    )
+
+    return filter_predictions(predictions, *meta, confidence_threshold)
+
+
+def _discard_task_result(task: asyncio.Task):
+    """Bekleyeni iptal edilmis gorevin hatasini tuket (asyncio uyarisi cikmasin)"""
+    if not task.cancelled():
+        task.exception()
+
+
+async def run_inference_batched(
+    image: np.ndarray,
+    confidence: float = 0.25,
+    original_size: tuple = None,
+    request_id: str = None,
+    input_size: int = INPUT_SIZE,
+) -> tuple:
+    """
+    run_inference ile ayni, ancak adimlar havuzda calisir ve model cagrisi
+    batch zamanlayicisindan gecer
+    request_id verilirse ham adaylar prediction_store'a yazilir
+    """
+    start = time.perf_counter()
+    tensors = input_tensor_pool(input_size)
+    tensor = tensors.acquire()
+
+    async def prepare_and_infer():
+        try:
+            # Preprocess
+            prepared = await inference_pool.run(
+                preprocess_image, image, input_size, tensor, original_size
+            )
+            # Inference (ayni boyuttaki diger isteklerle ayni batch'te)
+            outputs = await batch_schedulers[input_size].submit(prepared[0])
+            return prepared, outputs
+        finally:
+            # Havuz is parcacigi ve zamanlayici tensorle isini bitirdi
+            tensors.release(tensor)
+
+    # Istek iptal edilse de (istemci koptu) gorev biter: letterbox veya batch hala
+    # tensoru kullaniyorken tensor baska bir istege verilmez
+    task = asyncio.ensure_future(prepare_and_infer())
+    task.add_done_callback(_discard_task_result)
+    (input_tensor, scale, pad_w, pad_h, orig_w, orig_h), outputs = await asyncio.shield(task)
+
+    # Postprocess
+    if request_id is not None:
+        detections = await inference_pool.run(
+            postprocess_and_store,
+            outputs,
+            scale,
+            pad_w,
+            pad_h,
+            orig_w,
+            orig_h,
+            confidence,
+            request_id,
+        )
+    else:
+        detections = await inference_pool.run(
+            postprocess_detections,
+            outputs,
+            scale,
+            pad_w,
+            pad_h,
+            orig_w,
+            orig_h,
+            confidence,
+        )
+
+    adaptive_resolution.record(input_size, (time.perf_counter() - start) * 1000)
+    if METRICS_ENABLED:
+        record_detections(detections)
+        input_size_counter.inc(str(input_size))
+    return detections, orig_w, orig_h
+
+
+# Havuzda calisan yardimci adimlarin olculen surumleri
+timed_perceptual_hash = timed_stage("phash")(perceptual_hash)
+decode_base64 = timed_stage("base64")(base64.b64decode)
+refilter_predictions = timed_stage("refilter")(filter_predictions)
+decode_full_resolution = timed_stage("decode")(decode_image)
+preprocess_tiles = timed_stage("preprocess")(fill_tile_batch)
+decode_tracking_frame = timed_stage("decode")(decode_gray)
+render_annotations = timed_stage("render")(draw_detections)
+encode_annotated = timed_stage("encode")(encode_image)
+
+# Sinif etiketi yamalari; varsayilan cikti boyutundaki yaygin olcekler onceden cizilir
+glyph_cache = GlyphCache(
+    [CLASS_LABELS_TR[name] for name in CLASS_NAMES],
+    [CLASS_COLORS[name] for name in CLASS_NAMES],
+)
+if ANNOTATE_MAX_DIM:
+    glyph_cache.prerender(
+        {
+            GlyphCache.font_scale(ANNOTATE_MAX_DIM, round(ANNOTATE_MAX_DIM * ratio))
+            for ratio in (3 / 4, 9 / 16, 1.0)
+        }
+    )
+
+
+# Istemci basina izleme durumu (HTTP /track; websocket baglantisi kendi izleyicisini tutar)
+tracker_registry = TrackerRegistry(
+    TRACK_SESSIONS,
+    TRACK_IDLE_SECONDS,
+    keyframe_interval=TRACK_KEYFRAME_INTERVAL,
+    scene_threshold=TRACK_SCENE_THRESHOLD,
+    track_size=TRACK_SIZE,
+)
+track_frame_counter = metrics.counter(
+    "screwvision_track_frames_total", "Izleme modunda islenen kareler", ["kind"]
+)
+metrics.gauge(
+    "screwvision_track_sessions", "Aktif izleme oturumlari", lambda: tracker_registry.stats()["sessions"]
+)
+
+
+@timed_stage("track")
+def propagate_tracks(tracker, gray: np.ndarray) -> List[Dict[str, Any]]:
+    return tracker.propagate(gray)
+
+
+async def track_frame(tracker, image_bytes: bytes, confidence: float) -> Optional[tuple]:
+    """
+    Izleme modunda bir kare: anahtar karede dedektor + IoU eslemesi, arada optik akis
+    Cagiran tracker.lock'u tutmali (kareler sirayla islenir)
+    Donus: (track_id'li tespitler, w, h, anahtar kare mi) - decode edilemezse None
+    """
+    gray, size = await inference_pool.run(decode_tracking_frame, image_bytes, TRACK_SIZE)
+    if gray is None:
+        return None
+
+    if tracker.needs_keyframe(gray, size):
+        result = await detect_encoded_image(image_bytes, confidence, None, False)
+        if result is None:
+            return None
+        detections = await inference_pool.run(tracker.keyframe, gray, size, result[0])
+        keyframe = True
+    else:
+        detections = await inference_pool.run(propagate_tracks, tracker, gray)
+        keyframe = False
+
+    if METRICS_ENABLED:
+        track_frame_counter.inc("keyframe" if keyframe else "tracked")
+    return detections, size[0], size[1], keyframe
+
+
+def plan_tiles(width: int, height: int, overlap: float) -> tuple:
+    """Kare izgarasi; TILE_MAX asilirsa kare kenari buyutulur. Donus: (kareler, kenar)"""
+    tile = TILE_SIZE
+    tiles = tile_grid(width, height, tile, overlap)
+    while len(tiles) > TILE_MAX:
+        tile = int(tile * 1.25)
+        tiles = tile_grid(width, height, tile, overlap)
+    return tiles, tile
+
+
+def tile_batch_limit(runner) -> int:
+    """Tek session.run'daki en fazla bolge (sabit batch'li model / surec tamponu siniri)"""
+    if isinstance(runner, ProcessInferencePool):
+        return runner.max_batch_size
+    batch_dim = runner.get_inputs()[0].shape[0]
+    if isinstance(batch_dim, int) and batch_dim > 0:
+        return batch_dim
+    return max(1, TILE_BATCH)
+
+
+def infer_regions(image: np.ndarray, regions: List[tuple]) -> tuple:
+    """
+    Goruntu bolgelerini (x1, y1, x2, y2) letterbox'layip batch halinde calistir
+    Dinamik batch'li modelde SCREWVISION_TILE_BATCH bolgeye kadar tek session.run
+    Donus: (bolge basina cikti [4 + C, N], bolge basina letterbox meta)
+    """
+    runner = get_session_runner()
+    input_name = runner.get_inputs()[0].name
+    limit = tile_batch_limit(runner)
+    tensor = new_input_tensor(INPUT_SIZE, min(limit, len(regions)))
+    outputs, metas = [], []
+    for start in range(0, len(regions), limit):
+        chunk = regions[start : start + limit]
+        metas.extend(preprocess_tiles(image, chunk, tensor, INPUT_SIZE))
+        infer_start = time.perf_counter()
+        outputs.extend(runner.run(None, {input_name: tensor[: len(chunk)]})[0])
+        if METRICS_ENABLED:
+            record_batch(len(chunk), time.perf_counter() - infer_start, [])
+    return outputs, metas
+
+
+def region_candidates(output: np.ndarray, region: tuple, meta: tuple, confidence: float):
+    """Bir bolgenin esigi gecen adaylari goruntu koordinatlarinda (yoksa None)"""
+    candidates = prediction_boxes(decode_output([output]), *meta, confidence)
+    if candidates is not None:
+        candidates[0][:] += (region[0], region[1], region[0], region[1])
+    return candidates
+
+
+@timed_stage("postprocess")
+def merge_region_detections(
+    outputs: List[np.ndarray],
+    regions: List[tuple],
+    metas: List[tuple],
+    confidence: float,
+    iou_threshold: float = 0.45,
+) -> List[Dict[str, Any]]:
+    """
+    Bolge ici NMS, goruntu koordinatlarina tasima, sonra kareler arasi birlestirme
+    regions[0] tum goruntudur (dikisi yok); kare kutularinin dikise degip degmedigi
+    birlestirmede kullanilir
+    """
+    width, height = regions[0][2], regions[0][3]
+    parts = []
+    for output, region, meta in zip(outputs, regions, metas):
+        candidates = region_candidates(output, region, meta, confidence)
+        if candidates is None:
+            continue
+        boxes, scores, class_ids = candidates
+        keep = non_max_suppression(boxes, scores, iou_threshold)
+        on_seam = seam_boxes(boxes[keep], region, width, height, TILE_SEAM_MARGIN)
+        parts.append((boxes[keep], scores[keep], class_ids[keep], on_seam))
+    if not parts:
+        return []
+
+    boxes, scores, class_ids, on_seam = (np.concatenate(arrays) for arrays in zip(*parts))
+    keep, merged = merge_tile_boxes(
+        boxes, scores, class_ids, on_seam, iou_threshold, TILE_MERGE_OVERLAP
+    )
+    return format_detections(merged, scores[keep], class_ids[keep])
+
+
+async def detect_tiled(
+    image_bytes: bytes,
+    confidence: float = 0.25,
+    overlap: float = TILE_OVERLAP,
+    skip_empty: bool = True,
+) -> Optional[tuple]:
+    """
+    Tam cozunurlukte decode edip ortusen karelerde tespit yap
+    Tum goruntu de bir bolge olarak calisir (kareye sigmayan buyuk vidalar icin).
+    skip_empty: once tum goruntu calisir, TILE_GATE_CONFIDENCE ustunde aday
+    icermeyen kareler atlanir; kalan kareler tek batch'te calisir.
+    Sonuc onbellege ve aday deposuna yazilmaz.
+    Donus: (detections, w, h, kare bilgisi) - goruntu decode edilemezse None
+    """
+    image, _ = await inference_pool.run(decode_full_resolution, image_bytes)
+    if image is None:
+        return None
+    h, w = image.shape[:2]
+    tiles, tile_size = plan_tiles(w, h, overlap)
+    full = (0, 0, w, h)
+
+    if len(tiles) <= 1:
+        # Goruntu tek kareye sigiyor: normal yol
+        detections, w, h = await run_inference_batched(image, confidence)
+        return detections, w, h, {"tile_size": tile_size, "grid": 1, "run": 0, "skipped": 0}
+
+    if skip_empty and TILE_GATE_CONFIDENCE > 0:
+        outputs, metas = await inference_pool.run(infer_regions, image, [full])
+        candidates = region_candidates(outputs[0], full, metas[0], TILE_GATE_CONFIDENCE)
+        selected = [] if candidates is None else tiles_with_candidates(tiles, candidates[0])
+        run_tiles = [tiles[i] for i in selected]
+        if run_tiles:
+            tile_outputs, tile_metas = await inference_pool.run(
+                infer_regions, image, run_tiles
+            )
+            outputs += tile_outputs
+            metas += tile_metas
+        regions = [full] + run_tiles
+    else:
+        run_tiles = tiles
+        regions = [full] + tiles
+        outputs, metas = await inference_pool.run(infer_regions, image, regions)
+
+    detections = await inference_pool.run(
+        merge_region_detections, outputs, regions, metas, confidence
+    )
+    if METRICS_ENABLED:
+        record_detections(detections)
+    info = {
+        "tile_size": tile_size,
+        "grid": len(tiles),
+        "run": len(run_tiles),
+        "skipped": len(tiles) - len(run_tiles),
+    }
+    return detections, w, h, info
+
+
+# Son goruntulerin esik oncesi adaylari (GET /detect/{request_id} icin)
+prediction_store = PredictionStore(PREDICTION_STORE_SIZE, PREDICTION_TTL_SECONDS)
+
+# Ayni (veya gorsel olarak ayni) kareler icin tespit onbellegi
+result_cache = ResultCache(
+    int(CACHE_MAX_MB * 1024 * 1024), CACHE_TTL_SECONDS, CACHE_PHASH_DISTANCE
+)
+
+
+def request_id_for(cache_key: tuple) -> str:
+    """Icerik ozetinden turetilen request_id (ayni goruntu ve giris boyutu = ayni id)"""
+    digest, _, input_size = cache_key
+    if input_size == INPUT_SIZE:
+        return digest.hex()
+    return f"{digest.hex()}-{input_size}"
+
+
+async def detect_encoded_image(
+    image_bytes: bytes,
+    confidence: float = 0.25,
+    cache_key: tuple = None,
+    keep_predictions: bool = True,
+    input_size: int = INPUT_SIZE,
+) -> tuple:
+    """
+    Kodlu goruntuyu decode edip tespit yap ve sonucu onbellege yaz
+    Algisal ozet modu aciksa gorsel olarak degismemis karelerde inference atlanir
+    keep_predictions: ham adaylari request_id ile sakla (yeniden esikleme icin)
+    Donus: (detections, w, h) - goruntu decode edilemezse None
+    """
+    image, original_size = await inference_pool.run(
+        decode_image_bytes, image_bytes, input_size
+    )
+    if image is None:
+        return None
+
+    phash = None
+    if cache_key is not None and result_cache.phash_enabled:
+        phash = await inference_pool.run(timed_perceptual_hash, image)
+        cached = result_cache.get_similar(phash, confidence, original_size, input_size)
+        if cached is not None:
+            return cached
+
+    request_id = None
+    if cache_key is not None and keep_predictions and prediction_store.enabled:
+        request_id = request_id_for(cache_key)
+
+    result = await run_inference_batched(
+        image, confidence, original_size, request_id, input_size
+    )
+
+    if cache_key is not None:
+        result_cache.put(cache_key, result, phash, original_size)
+    return result
+
+
+async def cache_lookup(
+    key_data: bytes, confidence: float, input_size: int = INPUT_SIZE, variant: str = ""
+) -> tuple:
+    """
+    Kodlu veri icin onbellek anahtarini (havuzda) hesapla ve kaydi ara
+    variant: ayni baytlari /detect'ten farkli decode eden yollar icin ayri anahtar
+    Donus: (anahtar veya None, sonuc veya None)
+    """
+    if not result_cache.enabled and not prediction_store.enabled:
+        return None, None
+    cache_key = await inference_pool.run(
+        result_cache.key, key_data, confidence, input_size, variant
+    )
+    return cache_key, result_cache.get(cache_key)
+
+
+def detection_response(
+    detections: List[Dict[str, Any]],
+    w: int,
+    h: int,
+    cache_key: tuple = None,
+    input_size: int = None,
+) -> Dict[str, Any]:
+    """Tespit yaniti; adaylar saklandiysa yeniden sorgu icin request_id eklenir"""
+    response = {
+        "success": True,
+        "image_size": {"width": w, "height": h},
+        "detections_count": len(detections),
+        "detections": detections,
+    }
+    if input_size is not None:
+        response["input_size"] = input_size
+    if cache_key is not None and request_id_for(cache_key) in prediction_store:
+        response["request_id"] = request_id_for(cache_key)
+    return response
+
+
+# Yeniden yuklemeler sirayla yapilir
+model_reload_lock = asyncio.Lock()
+
+
+async def reload_model(model_path: str = None) -> Dict[str, Any]:
+    """
+    Yeni session'i arka planda olustur, isit ve atomik olarak degistir
+    Calisan batch'ler kendi session referanslariyla eski modelde biter;
+    hata olursa eski model hizmete devam eder
+    """
+    global ort_session, session_runner, process_pool, size_runners, MODEL_PATH
+    path = model_path or MODEL_PATH
+
+    async with model_reload_lock:
+        loop = asyncio.get_running_loop()
+        try:
+            # Varsayilan executor: istek havuzundaki is parcaciklari mesgul edilmez
+            if process_pool is not None:
+                if not os.path.exists(path):
+                    raise FileNotFoundError(f"Model bulunamadi: {path}")
+                new_pool = await loop.run_in_executor(None, start_process_pool, path)
+                warmup = new_pool.warmup_ms()
+            else:
+                session, runner = await loop.run_in_executor(None, build_session, path)
+                warmup = await loop.run_in_executor(None, warm_up, runner)
+                extra_runners = await loop.run_in_executor(None, build_size_runners, path)
+        except Exception as e:
+            model_info["last_error"] = str(e)
+            raise
+
+        if process_pool is not None:
+            # Eski surecler ellerindeki batch'leri bitirince kapanir
+            old_pool, process_pool = process_pool, new_pool
+            loop.run_in_executor(None, old_pool.close)
+        else:
+            ort_session, session_runner = session, runner
+            size_runners = {INPUT_SIZE: runner, **extra_runners}
+            adaptive_resolution.set_sizes(available_input_sizes())
+        MODEL_PATH = path
+
+        # Eski modelin sonuclari artik gecersiz
+        result_cache.clear()
+        prediction_store.clear()
+        tracker_registry.clear()
+        model_watcher.accept_current()
+
+        model_info.update(
+            path=path,
+            loaded_at=time.time(),
+            last_error=None,
+            reloads=model_info["reloads"] + 1,
+        )
+        print(f"[OK] Model degistirildi: {path}")
+
+    return {**model_info, "warmup_ms": {b: round(ms, 2) for b, ms in warmup.items()}}
+
+
+# Model dosyasi degisince reload_model'i tetikler (SCREWVISION_MODEL_WATCH_SECONDS)
+model_watcher = ModelWatcher(lambda: MODEL_PATH, reload_model, MODEL_WATCH_SECONDS or 5.0)
+
+
+def require_admin(request: Request):
+    """X-Admin-Token basligini zorunlu kil; token ayarli degilse endpoint yok sayilir"""
+    if not ADMIN_TOKEN:
+        raise HTTPException(
+            status_code=404, detail="Admin endpoint'leri kapali (SCREWVISION_ADMIN_TOKEN)"
+        )
+    token = request.headers.get("X-Admin-Token", "")
+    if not hmac.compare_digest(token, ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Yetkisiz")
+
+
+# Tek goruntu endpoint'lerinde govde siniri (multipart / JSON sarmalayici icin pay)
+UPLOAD_BODY_SLACK = 64 * 1024
+app.add_middleware(
+    UploadLimitMiddleware,
+    limits={
+        "/detect": MAX_UPLOAD_BYTES + UPLOAD_BODY_SLACK,
+        "/detect/annotated": MAX_UPLOAD_BYTES + UPLOAD_BODY_SLACK,
+        "/track": MAX_UPLOAD_BYTES + UPLOAD_BODY_SLACK,
+        "/detect/base64": MAX_UPLOAD_BYTES * 4 // 3 + UPLOAD_BODY_SLACK,
+        "/detect/batch": int(BATCH_UPLOAD_MAX_MB * 1024 * 1024),
+    },
+)
+
+
+async def read_image_upload(file: UploadFile) -> bytes:
+    """
+    Yuklemeyi sinirli oku; bicim ve baslik boyutu ilk parcada kontrol edilir
+    Gecersiz / cok buyuk goruntu decode edilmeden 4xx ile reddedilir
+    """
+    try:
+        return await read_upload(file, MAX_UPLOAD_BYTES, MAX_IMAGE_PIXELS)
+    except RejectedImage as e:
+        ingest_rejected_counter.inc(e.reason)
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+
+
+def check_base64_image(image_data: str):
+    """Base64 goruntuyu tamamini cozmeden kontrol et (boyut tahmini + baslik)"""
+    try:
+        probe_base64(image_data, MAX_UPLOAD_BYTES, MAX_IMAGE_PIXELS)
+    except RejectedImage as e:
+        ingest_rejected_counter.inc(e.reason)
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Endpoint (yol sablonu) basina istek sayisi, sure ve hatalar"""
+    if not METRICS_ENABLED:
+        return await call_next(request)
+    start = time.perf_counter()
+    try:
+        response = await call_next(request)
+        status = response.status_code
+    except Exception:
+        status = 500
+        raise
+    finally:
+        # Eslesmeyen yollar tek etikette toplanir (kardinalite sinirli kalsin)
+        route = request.scope.get("route")
+        endpoint = getattr(route, "path", "unmatched")
+        request_counter.inc(endpoint, request.method, str(status))
+        request_seconds.observe(time.perf_counter() - start, endpoint)
+        # 503 yuk atma sayilmaz (screwvision_requests_rejected_total)
+        if status >= 500 and status != 503:
+            error_counter.inc(endpoint)
+    return response
+
+
+@app.exception_handler(PoolSaturatedError)
+async def pool_saturated_handler(request, exc: PoolSaturatedError):
+    """Kapasite dolu: istegi kuyruga almadan hemen 503 dondur"""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
 @app.on_event("startup")
 async def startup_event():
     """Uygulama baslagicinda modeli yukle ve IP adresini yazdir"""
     try:
-        load_model()
+        global model_ready, process_pool, size_runners
+        if INFERENCE_PROCESSES > 0:
+            process_pool = await inference_pool.run(start_process_pool, MODEL_PATH)
+            model_info.update(path=MODEL_PATH, loaded_at=time.time())
+            if len(INPUT_SIZES) > 1:
+                print(f"[UYARI] Surec modunda sadece {INPUT_SIZE}px sunulur (SCREWVISION_INPUT_SIZES yok sayildi)")
+        else:
+            load_model()
+            await inference_pool.run(warm_up, session_runner)
+            extra_runners = await inference_pool.run(build_size_runners, MODEL_PATH)
+            size_runners = {INPUT_SIZE: session_runner, **extra_runners}
+        adaptive_resolution.set_sizes(available_input_sizes())
+        model_ready = True
+        for scheduler in batch_schedulers.values():
+            await scheduler.start()
+        if len(available_input_sizes()) > 1:
+            print(
+                f"[OK] Giris boyutlari: {available_input_sizes()} "
+                f"(auto hedefi: p90 {AUTO_TARGET_LATENCY_MS:g} ms, kuyruk {AUTO_TARGET_QUEUE})"
+            )
+        if MODEL_WATCH_SECONDS > 0:
+            await model_watcher.start()
+            print(f"[OK] Model izleniyor ({MODEL_WATCH_SECONDS:g} sn): {MODEL_PATH}")
+        print(
+            f"[OK] Batch zamanlayici: max_batch={MAX_BATCH_SIZE}, "
+            f"max_wait={MAX_BATCH_WAIT_MS}ms"
+        )
+        print(
+            f"[OK] Is parcacigi havuzu: workers={WORKER_THREADS}, "
+            f"max_pending={MAX_PENDING_REQUESTS}"
+        )
         
         # Yerel IP adresini bul ve yazdir
         import socket
@@ -276,6 +1358,17 @@ async def startup_event():
         print(f"[HATA] Model yukleme hatasi: {e}")
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Batch zamanlayiciyi ve is parcacigi havuzunu durdur"""
+    await model_watcher.stop()
+    for scheduler in batch_schedulers.values():
+        await scheduler.stop()
+    if process_pool is not None:
+        process_pool.close(timeout=5)
+    inference_pool.shutdown()
+
+
 @app.get("/")
 async def root():
     """API durumu"""
@@ -289,62 +1382,214 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    """Saglik kontrolu"""
-    model_loaded = ort_session is not None
-    return {
-        "status": "healthy" if model_loaded else "unhealthy",
+    """Saglik kontrolu (model yuklenip isinana kadar 503)"""
+    model_loaded = ort_session is not None or process_pool is not None
+    if model_loaded and model_ready:
+        status = "healthy"
+    elif model_loaded:
+        status = "warming_up"
+    else:
+        status = "unhealthy"
+
+    content = {
+        "status": status,
         "model_loaded": model_loaded,
+        "model_ready": model_ready,
         "model_type": "ONNX",
+        "model_variant": MODEL_VARIANT,
+        "model": model_info,
+        "session": SESSION_CONFIG.describe(),
         "classes": CLASS_NAMES,
+        "batching": {
+            "max_batch_size": MAX_BATCH_SIZE,
+            "max_wait_ms": MAX_BATCH_WAIT_MS,
+            "pending": batch_queue_depth(),
+            "mean_batch_size": round(batch_scheduler.mean_batch_size, 2),
+        },
+        "input_sizes": {
+            "default": INPUT_SIZE,
+            "available": available_input_sizes(),
+            "auto": adaptive_resolution.stats(),
+        },
+        "cache": result_cache.stats(),
+        "predictions": prediction_store.stats(),
+        "tracking": tracker_registry.stats(),
+        "workers": {
+            "threads": WORKER_THREADS,
+            "in_flight": inference_pool.in_flight,
+            "max_pending": MAX_PENDING_REQUESTS,
+            "rejected": inference_pool.rejected,
+        },
     }
+    if process_pool is not None:
+        content["processes"] = process_pool.stats()
+    return JSONResponse(status_code=200 if status == "healthy" else 503, content=content)
+
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Prometheus metin formatinda metrikler"""
+    if not METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Metrikler kapali (SCREWVISION_METRICS=0)")
+    return PlainTextResponse(metrics.render(), media_type=METRICS_CONTENT_TYPE)
+
+
+@app.post("/admin/profile")
+async def admin_profile(
+    request: Request, seconds: float = 10.0, hz: float = 100.0, idle: bool = False
+):
+    """
+    Tum thread'leri seconds boyunca hz frekansinda ornekle; katlanmis yigin
+    metni doner (flamegraph.pl / speedscope ile gorsellestirilir)
+    Yuk altinda calistirilmalidir; SCREWVISION_PROFILER=1 gerektirir
+    """
+    require_admin(request)
+    if not PROFILER_ENABLED:
+        raise HTTPException(status_code=404, detail="Profiler kapali (SCREWVISION_PROFILER=1)")
+    if profiler.running:
+        raise HTTPException(status_code=409, detail="Profiler zaten calisiyor")
+    seconds = min(max(0.1, seconds), PROFILER_MAX_SECONDS)
+    profiler.start(min(max(1.0, hz), 1000.0), idle)
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        folded = profiler.stop()
+    return PlainTextResponse(
+        folded, headers={"X-Profile-Samples": str(profiler.samples)}
+    )
 
 
 @app.get("/classes")
 async def get_classes():
-    """Mevcut siniflari dondur"""
-    return {
-        "classes": [
-            {
-                "id": i,
-                "name": name,
-                "label": CLASS_LABELS_TR.get(name, name),
-                "color": CLASS_COLORS.get(name, "#FFFFFF"),
-            }
-            for i, name in enumerate(CLASS_NAMES)
-        ]
-    }
+    """
+    Mevcut siniflari dondur
+    Kompakt yanitlarda (paketli / MessagePack / websocket satirlari) tespitler sadece
+    class_id tasir; ad, etiket ve renk buradan bir kez alinip istemcide saklanir
+    """
+    return JSONResponse(
+        {
+            "classes": [
+                {
+                    "id": i,
+                    "name": name,
+                    "label": CLASS_LABELS_TR.get(name, name),
+                    "color": CLASS_COLORS.get(name, "#FFFFFF"),
+                }
+                for i, name in enumerate(CLASS_NAMES)
+            ],
+            "formats": {
+                # Kayit duzeni baslik flags alanina gore: track_ids biti varsa track_record
+                "packed": {
+                    "media_type": PACKED_MEDIA_TYPE,
+                    "header": list(HEADER_DTYPE.names),
+                    "record": list(RECORD_DTYPE.names),
+                    "track_record": list(TRACK_RECORD_DTYPE.names),
+                    "flags": {"track_ids": FLAG_TRACK_IDS, "keyframe": FLAG_KEYFRAME},
+                    "max_dim": MAX_PACKED_DIM,
+                },
+                "msgpack": msgpack is not None,
+            },
+        },
+        headers={"Cache-Control": "public, max-age=3600"},
+    )
+
+
+@app.get("/cache")
+async def cache_stats():
+    """Sonuc onbellegi istatistikleri (isabet/iska sayaclari)"""
+    return result_cache.stats()
+
+
+@app.delete("/cache")
+async def cache_clear(request: Request):
+    """Sonuc onbellegini bosalt (durum degistirir: admin token gerekir)"""
+    require_admin(request)
+    result_cache.clear()
+    return {"success": True}
+
+
+@app.post("/admin/reload")
+async def admin_reload(request: Request, model_path: str = None):
+    """
+    Modeli kesintisiz yeniden yukle (ornegin train_model.py + export sonrasi)
+    model_path verilmezse mevcut dosya yeniden okunur
+    """
+    require_admin(request)
+    if model_path is not None and not model_path.endswith(".onnx"):
+        raise HTTPException(status_code=400, detail="Sadece .onnx dosyalari")
+    try:
+        return {"success": True, "model": await reload_model(model_path)}
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Yeniden yukleme hatasi: {str(e)}")
+
+
+async def tiled_response(
+    image_bytes: bytes, confidence: float, overlap: float, skip_empty: bool
+) -> Dict[str, Any]:
+    """Dilimli tespit yaniti (/detect ve /detect/base64 icin)"""
+    if not 0 <= overlap < 1:
+        raise HTTPException(status_code=400, detail="overlap 0 ile 1 arasinda olmali")
+    async with inference_pool.admit():
+        result = await detect_tiled(image_bytes, confidence, overlap, skip_empty)
+    if result is None:
+        raise HTTPException(status_code=400, detail="Goruntu okunamadi")
+    detections, w, h, info = result
+    return {**detection_response(detections, w, h, input_size=INPUT_SIZE), "tiles": info}
 
 
 @app.post("/detect")
-async def detect_objects(file: UploadFile = File(...), confidence: float = 0.25):
+async def detect_objects(
+    request: Request,
+    file: UploadFile = File(...),
+    confidence: float = 0.25,
+    size: str = None,
+    tiled: bool = False,
+    overlap: float = TILE_OVERLAP,
+    skip_empty: bool = True,
+):
     """
     Goruntude nesne tespiti yap
+    size: model giris boyutu (ornegin 320 / 640) veya "auto"; varsayilan INPUT_SIZE
+    tiled: yuksek cozunurluklu fotograflarda kucuk vidalar icin dilimli inference
+    (overlap: kare ortusme orani, skip_empty: bos kareleri atla)
+    Yanit formati Accept basligiyla secilir (JSON, paketli kayitlar, MessagePack)
     """
     try:
+        input_size = resolve_input_size(size)
         if not file.content_type.startswith("image/"):
             raise HTTPException(
                 status_code=400,
                 detail="Gecersiz dosya tipi. Sadece goruntu dosyalari kabul edilir.",
             )
 
-        contents = await file.read()
-        nparr = np.frombuffer(contents, np.uint8)
-        image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+        contents = await read_image_upload(file)
 
-        if image is None:
-            raise HTTPException(status_code=400, detail="Goruntu okunamadi")
+        if tiled:
+            return negotiated_response(
+                request, await tiled_response(contents, confidence, overlap, skip_empty)
+            )
 
-        # ONNX inference
-        detections, w, h = run_inference(image, confidence)
+        async with inference_pool.admit():
+            cache_key, result = await cache_lookup(contents, confidence, input_size)
 
-        return {
-            "success": True,
-            "image_size": {"width": w, "height": h},
-            "detections_count": len(detections),
-            "detections": detections,
-        }
+            if result is None:
+                # ONNX inference
+                result = await detect_encoded_image(
+                    contents, confidence, cache_key, input_size=input_size
+                )
 
-    except HTTPException:
+            if result is None:
+                raise HTTPException(status_code=400, detail="Goruntu okunamadi")
+
+        detections, w, h = result
+
+        return negotiated_response(
+            request, detection_response(detections, w, h, cache_key, input_size)
+        )
+
+    except (HTTPException, PoolSaturatedError):
         raise
     except Exception as e:
         import traceback
@@ -354,13 +1599,14 @@ async def detect_objects(file: UploadFile = File(...), confidence: float = 0.25)
 
 
 @app.post("/detect/base64")
-async def detect_objects_base64(data: dict):
+async def detect_objects_base64(request: Request, data: dict):
     """
     Base64 kodlu goruntude nesne tespiti yap
     """
     try:
         image_data = data.get("image")
         confidence = data.get("confidence", 0.25)
+        input_size = resolve_input_size(data.get("size"))
 
         if not image_data:
             raise HTTPException(status_code=400, detail="Goruntu verisi gerekli")
@@ -368,26 +1614,48 @@ async def detect_objects_base64(data: dict):
         # Base64 header'ini kaldir
         if "," in image_data:
             image_data = image_data.split(",")[1]
+        check_base64_image(image_data)
+
+        if data.get("tiled"):
+            # JSON govdesi dogrulanmaz: sayisal olmayan overlap 500 degil 400 olmali
+            try:
+                overlap = float(data.get("overlap", TILE_OVERLAP))
+            except (TypeError, ValueError):
+                raise HTTPException(status_code=400, detail="overlap sayi olmali")
+            image_bytes = await inference_pool.run(decode_base64, image_data)
+            response = await tiled_response(
+                image_bytes,
+                confidence,
+                overlap,
+                bool(data.get("skip_empty", True)),
+            )
+            return negotiated_response(request, response)
 
-        # Decode
-        image_bytes = base64.b64decode(image_data)
-        nparr = np.frombuffer(image_bytes, np.uint8)
-        image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+        async with inference_pool.admit():
+            # Base64 metninin ozeti yeterli, tekrar eden karede decode da atlanir
+            cache_key, result = await cache_lookup(
+                image_data.encode(), confidence, input_size
+            )
 
-        if image is None:
-            raise HTTPException(status_code=400, detail="Goruntu decode edilemedi")
+            if result is None:
+                # Decode
+                image_bytes = await inference_pool.run(decode_base64, image_data)
 
-        # ONNX inference
-        detections, w, h = run_inference(image, confidence)
+                # ONNX inference
+                result = await detect_encoded_image(
+                    image_bytes, confidence, cache_key, input_size=input_size
+                )
 
-        return {
-            "success": True,
-            "image_size": {"width": w, "height": h},
-            "detections_count": len(detections),
-            "detections": detections,
-        }
+            if result is None:
+                raise HTTPException(status_code=400, detail="Goruntu decode edilemedi")
+
+        detections, w, h = result
+
+        return negotiated_response(
+            request, detection_response(detections, w, h, cache_key, input_size)
+        )
 
-    except HTTPException:
+    except (HTTPException, PoolSaturatedError):
         raise
     except Exception as e:
         import traceback
@@ -396,7 +1664,529 @@ async def detect_objects_base64(data: dict):
         raise HTTPException(status_code=500, detail=f"Tespit hatasi: {str(e)}")
 
 
+async def iter_batch_images(files: List[UploadFile]):
+    """
+    Yuklenen dosyalardan (ad, bayt veya None, hata) uc'lulerini sirayla uret
+    Arsiv uyeleri havuzda tek tek okunur, tum arsiv bellege alinmaz
+    """
+    max_bytes = int(BATCH_UPLOAD_MAX_IMAGE_MB * 1024 * 1024)
+
+    for upload in files:
+        name = upload.filename or "image"
+        if is_archive(upload.filename, upload.content_type):
+            members = iter_archive_images(upload.file, max_bytes)
+            while True:
+                try:
+                    item = await inference_pool.run(next, members, None)
+                except (zipfile.BadZipFile, tarfile.TarError, EOFError) as e:
+                    yield name, None, f"Arsiv okunamadi: {e}"
+                    break
+                if item is None:
+                    break
+                member_name, data = item
+                error = None if data is not None else "Dosya cok buyuk"
+                yield f"{name}/{member_name}", data, error
+        elif (upload.content_type or "").startswith("image/") or is_image_name(name):
+            data = await upload.read()
+            if len(data) > max_bytes:
+                yield name, None, "Dosya cok buyuk"
+            else:
+                yield name, data, None
+        else:
+            yield name, None, "Gecersiz dosya tipi"
+
+
+async def detect_batch_item(
+    index: int,
+    filename: str,
+    data: bytes,
+    error: str,
+    confidence: float,
+    input_size: int = INPUT_SIZE,
+) -> Dict[str, Any]:
+    """Toplu yuklemedeki tek goruntunun NDJSON satiri"""
+    line = {"index": index, "filename": filename}
+    if error is None:
+        try:
+            check_image_bytes(data, 0, MAX_IMAGE_PIXELS)
+        except RejectedImage as e:
+            ingest_rejected_counter.inc(e.reason)
+            error = str(e)
+    if error is not None:
+        return {**line, "success": False, "error": error}
+
+    try:
+        cache_key, result = await cache_lookup(data, confidence, input_size)
+        if result is None:
+            result = await detect_encoded_image(
+                data, confidence, cache_key, input_size=input_size
+            )
+    except Exception as e:
+        if METRICS_ENABLED:
+            error_counter.inc("/detect/batch")
+        print(f"Error processing batch item {filename}: {e}")
+        return {**line, "success": False, "error": f"Tespit hatasi: {str(e)}"}
+
+    if result is None:
+        return {**line, "success": False, "error": "Goruntu okunamadi"}
+
+    detections, w, h = result
+    return {**line, **detection_response(detections, w, h, cache_key, input_size)}
+
+
+@app.post("/detect/annotated")
+async def detect_annotated(
+    file: UploadFile = File(...),
+    confidence: float = 0.25,
+    format: str = "jpeg",
+    max_dim: int = ANNOTATE_MAX_DIM,
+    quality: int = ANNOTATE_QUALITY,
+):
+    """
+    Tespit yap ve kutulari cizilmis goruntuyu dondur (JPEG / WebP, parca parca)
+    Goruntu bir kez, cizim icin gereken cozunurlukte (max_dim) decode edilir; tespit
+    ve cizim ayni diziyi kullanir. Bu decode /detect'inkiyle ayni kucultmeyi seciyorsa
+    pikseller aynidir ve /detect'in onbellek anahtari paylasilir; degilse sonuc ayri
+    anahtarla saklanir (farkli decode'dan gelen tespitler /detect'e karismaz).
+    max_dim: ciktinin uzun kenari (0 = kaynak boyutu), quality: 1-100
+    Tespitler basliklarda: X-Detections ([class_id, confidence, x1, y1, x2, y2]
+    satirlari, kaynak koordinatlari), X-Detections-Count, X-Image-Size (w x h)
+    """
+    fmt = format.lower()
+    if fmt not in IMAGE_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Gecersiz format: {format} (secenekler: {', '.join(IMAGE_FORMATS)})",
+        )
+    if not 1 <= quality <= 100:
+        raise HTTPException(status_code=400, detail="quality 1-100 arasinda olmali")
+    if not 0 <= max_dim <= 8192:
+        raise HTTPException(status_code=400, detail="max_dim 0-8192 arasinda olmali")
+    if not file.content_type.startswith("image/"):
+        raise HTTPException(
+            status_code=400,
+            detail="Gecersiz dosya tipi. Sadece goruntu dosyalari kabul edilir.",
+        )
+
+    try:
+        contents = await read_image_upload(file)
+
+        async with inference_pool.admit():
+            # Tek decode: cizim icin gereken cozunurlukte, tespit de ayni diziden
+            target = max(INPUT_SIZE, max_dim) if max_dim and REDUCED_DECODE else None
+            factor = decode_factor(contents, target)
+            shared = factor == decode_factor(contents, INPUT_SIZE if REDUCED_DECODE else None)
+            cache_key, result = await cache_lookup(
+                contents, confidence, INPUT_SIZE, "" if shared else f"annotated-{factor}"
+            )
+
+            image, original_size = await inference_pool.run(
+                decode_full_resolution, contents, target
+            )
+            if image is None:
+                raise HTTPException(status_code=400, detail="Goruntu okunamadi")
+
+            if result is None:
+                request_id = None
+                if shared and cache_key is not None and prediction_store.enabled:
+                    request_id = request_id_for(cache_key)
+                result = await run_inference_batched(
+                    image, confidence, original_size, request_id
+                )
+                if cache_key is not None:
+                    result_cache.put(cache_key, result, None, original_size)
+            detections, w, h = result
+
+            annotated = await inference_pool.run(
+                render_annotations, image, detections, original_size, max_dim, glyph_cache
+            )
+            encoded = await inference_pool.run(encode_annotated, annotated, fmt, quality)
+
+        return StreamingResponse(
+            iter_chunks(encoded),
+            media_type=IMAGE_FORMATS[fmt][2],
+            headers={
+                "X-Detections-Count": str(len(detections)),
+                "X-Detections": json.dumps(compact_detections(detections), separators=(",", ":")),
+                "X-Image-Size": f"{w}x{h}",
+            },
+        )
+
+    except (HTTPException, PoolSaturatedError):
+        raise
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        print(f"Error processing annotated detection: {e}")
+        raise HTTPException(status_code=500, detail=f"Tespit hatasi: {str(e)}")
+
+
+class AdmittedStreamingResponse(StreamingResponse):
+    """
+    Yanit bitince (tamamlandi, istemci koptu veya iptal edildi) kabul slotlarini
+    birakan StreamingResponse; uretecin baslayip baslamamasina bagli degildir
+    """
+
+    def __init__(self, content, stack: AsyncExitStack, **kwargs):
+        super().__init__(content, **kwargs)
+        self.stack = stack
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            await self.stack.aclose()
+
+
+@app.post("/detect/batch")
+async def detect_objects_batch(
+    files: List[UploadFile] = File(...), confidence: float = 0.25, size: str = None
+):
+    """
+    Cok sayida goruntu veya zip / tar arsivi icin toplu tespit
+
+    Goruntuler paralel decode edilir, inference batch zamanlayicisinda model
+    batch'lerine toplanir. Sonuclar her goruntu bittikce NDJSON satiri olarak
+    akar (sira tamamlanma sirasidir, "index" yukleme sirasidir); son satir ozettir:
+        {"index": 0, "filename": "kutu.zip/a.jpg", "success": true, ...}
+        {"done": true, "images": 120, "failed": 1, "elapsed_ms": 5321.4}
+
+    Not: Starlette multipart govdeyi handler'dan once tamamen (diske) biriktirir;
+    akis yukleme bittikten sonra baslar. Govde SCREWVISION_BATCH_MAX_UPLOAD_MB ile
+    sinirlidir, asilirsa yukleme sirasinda 413 doner.
+    """
+    # "auto" toplu istekte bir kez secilir, tum goruntuler ayni boyutta islenir
+    input_size = resolve_input_size(size)
+
+    # Tum akis tek istek olarak kabul edilir; kapasite doluysa hemen 503
+    # Slot uretecte degil yanitta birakilir (uretec hic baslamayabilir)
+    stack = AsyncExitStack()
+    await stack.enter_async_context(inference_pool.admit())
+
+    async def stream():
+        start = time.perf_counter()
+        pending = set()
+        source = iter_batch_images(files)
+        exhausted = False
+        count = failed = 0
+
+        try:
+            while True:
+                # Pencere dolana kadar yeni goruntu al
+                while not exhausted and len(pending) < BATCH_UPLOAD_CONCURRENCY:
+                    try:
+                        filename, data, error = await source.__anext__()
+                    except StopAsyncIteration:
+                        exhausted = True
+                        break
+                    if count >= BATCH_UPLOAD_MAX_IMAGES:
+                        # Kalan dosyalar okunmaz
+                        data, error = None, f"Goruntu siniri ({BATCH_UPLOAD_MAX_IMAGES}) asildi"
+                        exhausted = True
+                    pending.add(
+                        asyncio.create_task(
+                            detect_batch_item(
+                                count, filename, data, error, confidence, input_size
+                            )
+                        )
+                    )
+                    count += 1
+
+                if not pending:
+                    break
+
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    line = task.result()
+                    failed += not line["success"]
+                    yield json.dumps(line, separators=(",", ":")) + "\n"
+
+            yield json.dumps(
+                {
+                    "done": True,
+                    "images": count,
+                    "failed": failed,
+                    "elapsed_ms": round((time.perf_counter() - start) * 1000, 1),
+                }
+            ) + "\n"
+        finally:
+            # Istemci baglantiyi kestiyse kalan isleri iptal et
+            for task in pending:
+                task.cancel()
+            await source.aclose()
+
+    return AdmittedStreamingResponse(stream(), stack, media_type="application/x-ndjson")
+
+
+@app.post("/track")
+async def track_objects(
+    request: Request, session: str, file: UploadFile = File(...), confidence: float = 0.25
+):
+    """
+    Izleme modunda tespit: ayni session ile gonderilen kareler bir akis sayilir
+    Dedektor sadece anahtar karelerde calisir, aradaki karelerde kutular optik
+    akisla tasinir; tespitler kararli track_id tasir. Oturum SCREWVISION_TRACK_IDLE_SECONDS
+    boyunca kare gelmezse silinir.
+    """
+    if not file.content_type.startswith("image/"):
+        raise HTTPException(
+            status_code=400,
+            detail="Gecersiz dosya tipi. Sadece goruntu dosyalari kabul edilir.",
+        )
+    contents = await read_image_upload(file)
+
+    # Once kabul: 503 donen istek izleme oturumu olusturmaz
+    async with inference_pool.admit():
+        tracker = tracker_registry.get(session)
+        async with tracker.lock:
+            result = await track_frame(tracker, contents, confidence)
+    if result is None:
+        raise HTTPException(status_code=400, detail="Goruntu okunamadi")
+
+    detections, w, h, keyframe = result
+    response = {**detection_response(detections, w, h), "keyframe": keyframe, "session": session}
+    return negotiated_response(request, response)
+
+
+@app.delete("/track/{session}")
+async def end_tracking(session: str):
+    """Izleme oturumunu kapat (durum hemen serbest birakilir)"""
+    if not tracker_registry.drop(session):
+        raise HTTPException(status_code=404, detail="Oturum bulunamadi")
+    return {"success": True}
+
+
+@app.get("/detect/{request_id}")
+async def refilter_detections(
+    request: Request, request_id: str, confidence: float = 0.25, iou: float = 0.45
+):
+    """
+    Daha once gonderilen goruntuyu yeni confidence / IoU esigiyle yeniden filtrele
+    Model tekrar calismaz, sadece saklanan adaylar uzerinde esikleme + NMS yapilir
+    (saklanan adaylar skoru 0.01 ustundeki en iyi 1000 satirdir)
+    """
+    stored = prediction_store.get(request_id)
+    if stored is None:
+        raise HTTPException(
+            status_code=404,
+            detail="request_id bulunamadi veya suresi doldu, goruntuyu tekrar gonderin",
+        )
+
+    candidates, (scale, pad_w, pad_h, w, h) = stored
+    async with inference_pool.admit():
+        detections = await inference_pool.run(
+            refilter_predictions, candidates, scale, pad_w, pad_h, w, h, confidence, iou
+        )
+
+    response = detection_response(detections, w, h)
+    response["request_id"] = request_id
+    return negotiated_response(request, response)
+
+
+def compact_detections(detections: List[Dict[str, Any]]) -> List[list]:
+    """
+    Tespitleri kisa formata cevir: [class_id, confidence, x1, y1, x2, y2]
+    (izleme modunda sona track_id eklenir)
+    Sinif adlari, etiketler ve renkler /classes uzerinden bir kez alinir
+    """
+    rows = []
+    for d in detections:
+        b = d["bbox"]
+        row = [d["class_id"], d["confidence"], b["x1"], b["y1"], b["x2"], b["y2"]]
+        if "track_id" in d:
+            row.append(d["track_id"])
+        rows.append(row)
+    return rows
+
+
+# Paketli / MessagePack yanitta kayitlardan turetilen alanlar
+_DERIVED_FIELDS = ("success", "image_size", "detections_count", "detections")
+
+
+@timed_stage("serialize")
+def encode_detection_response(payload: Dict[str, Any], fmt: str) -> tuple:
+    """
+    Tespit yanitini kompakt formatta kodla
+    packed: baslik + sabit genislikli kayitlar, diger alanlar (request_id, input_size,
+    tiles, ...) X-Response-Meta basligina gider; msgpack: ayni alanlar + kisa satirlar
+    Donus: (govde, ek basliklar)
+    """
+    size = payload["image_size"]
+    meta = {k: v for k, v in payload.items() if k not in _DERIVED_FIELDS}
+    if fmt == "packed":
+        body = pack_detections(
+            payload["detections"], size["width"], size["height"], bool(meta.get("keyframe"))
+        )
+        headers = {"X-Response-Meta": json.dumps(meta, separators=(",", ":"))} if meta else {}
+        return body, headers
+    body = msgpack.packb(
+        {"image_size": size, **meta, "detections": compact_detections(payload["detections"])}
+    )
+    return body, {}
+
+
+def negotiated_response(request: Request, payload: Dict[str, Any]):
+    """
+    Accept basligina gore yanit: varsayilan JSON (dict oldugu gibi doner),
+    application/vnd.screwvision.detections veya application/msgpack ise kompakt govde
+    Paketli formata sigmayan (kenari MAX_PACKED_DIM'i asan) goruntulerde JSON doner
+    """
+    fmt = negotiate(request.headers.get("accept", ""))
+    size = payload["image_size"]
+    if fmt == "packed" and not fits_packed(size["width"], size["height"]):
+        fmt = "json"
+    if fmt == "json":
+        return payload
+    body, headers = encode_detection_response(payload, fmt)
+    media_type = PACKED_MEDIA_TYPE if fmt == "packed" else "application/msgpack"
+    return Response(body, media_type=media_type, headers={"Vary": "Accept", **headers})
+
+
+@app.websocket("/ws/detect")
+async def detect_stream(
+    websocket: WebSocket,
+    confidence: float = 0.25,
+    size: str = STREAM_INPUT_SIZE,
+    track: bool = False,
+):
+    """
+    Gercek zamanli kamera modu icin kalici baglanti
+
+    Istemci ham JPEG karelerini binary mesaj olarak gonderir. Sunucu sadece en
+    yeni kareyi isler (arada kalanlar dusurulur) ve her sonucu kare sira
+    numarasiyla (seq, baglantida 0'dan baslayan gelis sirasi) geri yollar:
+        {"seq": 12, "w": 1920, "h": 1080, "ms": 41.2, "dropped": 3,
+         "det": [[class_id, confidence, x1, y1, x2, y2], ...]}
+    Metin mesaji {"confidence": 0.3, "size": 320} ile esik ve giris boyutu baglanti
+    sirasinda degistirilebilir. size varsayilani SCREWVISION_STREAM_INPUT_SIZE
+    ("auto": her karede yuk durumuna gore secilir); kullanilan boyut "size" alaninda.
+
+    track=true: izleme modu. Dedektor sadece anahtar karelerde calisir, aradaki
+    karelerde kutular optik akisla tasinir. Satirlara track_id eklenir
+    ([class_id, confidence, x1, y1, x2, y2, track_id]), "key" anahtar kareyi belirtir.
+    """
+    try:
+        resolve_input_size(size)
+    except HTTPException as e:
+        await websocket.close(code=1008, reason=e.detail)
+        return
+    await websocket.accept()
+    slot = LatestFrameSlot()
+
+    def record_frame(status: str):
+        # Kare basina sayac (HTTP ara katmani websocket'i gormez)
+        if METRICS_ENABLED:
+            request_counter.inc("/ws/detect", "WS", status)
+    settings = {"confidence": confidence, "size": size}
+    # Baglanti basina izleyici; baglanti kapaninca durum da gider
+    tracker = tracker_registry.new_tracker() if track else None
+
+    async def receive_frames():
+        seq = 0
+        try:
+            while True:
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    break
+                if message.get("bytes") is not None:
+                    slot.put((seq, message["bytes"]))
+                    seq += 1
+                elif message.get("text"):
+                    try:
+                        update = json.loads(message["text"])
+                        settings["confidence"] = float(
+                            update.get("confidence", settings["confidence"])
+                        )
+                        if "size" in update:
+                            resolve_input_size(update["size"])
+                            settings["size"] = update["size"]
+                    except (ValueError, TypeError, AttributeError, HTTPException):
+                        pass
+        finally:
+            slot.close()
+
+    receiver = asyncio.create_task(receive_frames())
+
+    try:
+        while True:
+            item = await slot.get()
+            if item is None:
+                break
+            seq, frame = item
+            start = time.perf_counter()
+
+            # Bicim / piksel kontrolu decode'dan once (bayt siniri uvicorn ws_max_size'da)
+            try:
+                check_image_bytes(frame, MAX_UPLOAD_BYTES, MAX_IMAGE_PIXELS)
+            except RejectedImage as e:
+                ingest_rejected_counter.inc(e.reason)
+                record_frame(str(e.status_code))
+                await websocket.send_text(
+                    json.dumps({"seq": seq, "error": "rejected", "detail": str(e)})
+                )
+                continue
+
+            try:
+                async with inference_pool.admit():
+                    if tracker is not None:
+                        result = await track_frame(tracker, frame, settings["confidence"])
+                    else:
+                        input_size = resolve_input_size(settings["size"])
+                        cache_key, result = await cache_lookup(
+                            frame, settings["confidence"], input_size
+                        )
+                        if result is None:
+                            result = await detect_encoded_image(
+                                frame, settings["confidence"], cache_key, False, input_size
+                            )
+                if result is None:
+                    record_frame("400")
+                    await websocket.send_text(
+                        json.dumps({"seq": seq, "error": "decode"})
+                    )
+                    continue
+                detections, w, h = result[:3]
+            except PoolSaturatedError as e:
+                record_frame("503")
+                await websocket.send_text(
+                    json.dumps(
+                        {"seq": seq, "error": "busy", "retry_after": e.retry_after}
+                    )
+                )
+                continue
+
+            message = {
+                "seq": seq,
+                "w": w,
+                "h": h,
+                "ms": round((time.perf_counter() - start) * 1000, 1),
+                "dropped": slot.dropped,
+            }
+            if tracker is not None:
+                message["key"] = result[3]
+            else:
+                message["size"] = input_size
+            message["det"] = compact_detections(detections)
+
+            record_frame("200")
+            await websocket.send_text(json.dumps(message, separators=(",", ":")))
+    except Exception as e:
+        # Istemci kapandiysa sessizce cik
+        if receiver.done():
+            return
+        if METRICS_ENABLED:
+            error_counter.inc("/ws/detect")
+        import traceback
+        traceback.print_exc()
+        print(f"Error processing stream: {e}")
+    finally:
+        receiver.cancel()
+
+
 if __name__ == "__main__":
     import uvicorn
 
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # Websocket mesaj siniri: buyuk kareler tamponlanmadan protokol seviyesinde reddedilir
+    uvicorn.run(app, host="0.0.0.0", port=8000, ws_max_size=MAX_UPLOAD_BYTES + UPLOAD_BODY_SLACK)
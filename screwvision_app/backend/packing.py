@@ -0,0 +1,125 @@
+"""
+ScrewVision - Kompakt tespit yanit formatlari (Accept basligi ile secilir)
+  application/json                         varsayilan, mevcut yanit
+  application/vnd.screwvision.detections   sabit genislikli kayitlar (asagida)
+  application/msgpack                      MessagePack (msgpack kuruluysa)
+Sinif adlari, etiketler ve renkler tespit basina tekrarlanmaz, /classes'tan alinir.
+
+Paketli format (little-endian):
+  baslik  12 bayt: magic "SVD1", count u2, width u2, height u2, flags u2
+  kayit   12 bayt: class_id i2, confidence f2, x1 i2, y1 i2, x2 i2, y2 i2
+          (flags & FLAG_TRACK_IDS ise + track_id u4 = 16 bayt)
+Koordinatlar kaynak goruntu pikselidir; kenari MAX_PACKED_DIM'i asan goruntulerde
+paketli format kullanilamaz (sunucu JSON'a doner, bkz. fits_packed).
+"""
+
+import struct
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+JSON_MEDIA_TYPE = "application/json"
+PACKED_MEDIA_TYPE = "application/vnd.screwvision.detections"
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack")
+
+MAGIC = b"SVD1"
+FLAG_TRACK_IDS = 1
+FLAG_KEYFRAME = 2
+
+HEADER_DTYPE = np.dtype(
+    [("magic", "S4"), ("count", "<u2"), ("width", "<u2"), ("height", "<u2"), ("flags", "<u2")]
+)
+_FIELDS = [
+    ("class_id", "<i2"),
+    ("confidence", "<f2"),
+    ("x1", "<i2"),
+    ("y1", "<i2"),
+    ("x2", "<i2"),
+    ("y2", "<i2"),
+]
+RECORD_DTYPE = np.dtype(_FIELDS)
+TRACK_RECORD_DTYPE = np.dtype(_FIELDS + [("track_id", "<u4")])
+
+# int16 koordinatlar (kutular goruntuye kirpilir) ve uint16 baslik boyutlari icin sinir
+MAX_PACKED_DIM = 32767
+
+# Paketleme struct ile (tek cagri), cozme numpy dtype'lari ile
+_HEADER = struct.Struct("<4sHHHH")
+_RECORD_FORMAT = "hehhhh"
+_TRACK_RECORD_FORMAT = "hehhhhI"
+
+
+def negotiate(accept: str) -> str:
+    """
+    Accept basligindan yanit formati: "json", "packed" veya "msgpack"
+    q degeri en yuksek desteklenen tur secilir (esitlikte ilk yazilan);
+    baslik yoksa, "*/*" ise veya msgpack kurulu degilse JSON
+    """
+    choices = []
+    for position, part in enumerate(accept.split(",")):
+        media_type, *params = (p.strip() for p in part.split(";"))
+        q = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        if q > 0:
+            choices.append((-q, position, media_type.lower()))
+
+    for _, _, media_type in sorted(choices):
+        if media_type == PACKED_MEDIA_TYPE:
+            return "packed"
+        if media_type in MSGPACK_MEDIA_TYPES and msgpack is not None:
+            return "msgpack"
+        if media_type in (JSON_MEDIA_TYPE, "application/*", "*/*"):
+            return "json"
+    return "json"
+
+
+def fits_packed(width: int, height: int) -> bool:
+    """Goruntu paketli formatin alanlarina sigiyor mu"""
+    return 0 <= width <= MAX_PACKED_DIM and 0 <= height <= MAX_PACKED_DIM
+
+
+def pack_detections(
+    detections: List[Dict], width: int, height: int, keyframe: bool = False
+) -> bytes:
+    """
+    Tespitleri baslik + sabit genislikli kayit olarak paketle
+    Kutular goruntuye kirpildigi icin koordinatlar int16'ya sigar; kenari
+    MAX_PACKED_DIM'i asan goruntude ValueError (once fits_packed ile kontrol edin)
+    """
+    if not fits_packed(width, height):
+        raise ValueError(f"Goruntu paketli format icin cok buyuk: {width}x{height}")
+    track_ids = bool(detections) and "track_id" in detections[0]
+    flat = []
+    for d in detections:
+        b = d["bbox"]
+        flat += (d["class_id"], d["confidence"], b["x1"], b["y1"], b["x2"], b["y2"])
+        if track_ids:
+            flat.append(d["track_id"])
+    record = _TRACK_RECORD_FORMAT if track_ids else _RECORD_FORMAT
+    flags = (FLAG_TRACK_IDS if track_ids else 0) | (FLAG_KEYFRAME if keyframe else 0)
+    return _HEADER.pack(MAGIC, len(detections), width, height, flags) + struct.pack(
+        "<" + record * len(detections), *flat
+    )
+
+
+def unpack_detections(data: bytes) -> Tuple[Dict[str, int], np.ndarray]:
+    """Paketli yaniti coz (istemci / test icin): (baslik alanlari, kayit dizisi)"""
+    header = np.frombuffer(data, dtype=HEADER_DTYPE, count=1)[0]
+    if header["magic"] != MAGIC:
+        raise ValueError("Gecersiz paketli tespit verisi")
+    flags = int(header["flags"])
+    dtype = TRACK_RECORD_DTYPE if flags & FLAG_TRACK_IDS else RECORD_DTYPE
+    records = np.frombuffer(
+        data, dtype=dtype, count=int(header["count"]), offset=HEADER_DTYPE.itemsize
+    )
+    return {name: int(header[name]) for name in ("count", "width", "height", "flags")}, records
@@ -0,0 +1,91 @@
+"""
+ScrewVision - Esikten bagimsiz ham tahmin deposu
+Son goruntulerin esik oncesi aday kumesini (top-K) request_id ile saklar;
+farkli confidence / IoU ile yeniden sorgu sadece filtre + NMS adimini calistirir
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+def extract_candidates(
+    predictions: np.ndarray, min_confidence: float, top_k: int
+) -> np.ndarray:
+    """
+    [N, 4 + C] tahminlerden en iyi sinif skoru min_confidence ustundeki en fazla
+    top_k satiri sec. Satirlar ozgun sirasinda kalir, boylece NMS'in esit skor
+    sirasi tam ciktidakiyle ayni olur.
+    """
+    scores = predictions[:, 4:].max(axis=1)
+    idx = np.flatnonzero(scores >= min_confidence)
+    if len(idx) > top_k:
+        idx = np.sort(idx[np.argpartition(-scores[idx], top_k - 1)[:top_k]])
+    return np.ascontiguousarray(predictions[idx])
+
+
+class PredictionStore:
+    """
+    Adet sinirli, TTL'li LRU aday deposu
+
+    Deger: (candidates [K, 4 + C] float32, (scale, pad_w, pad_h, w, h))
+    """
+
+    def __init__(self, capacity: int, ttl_seconds: float):
+        self.capacity = max(0, int(capacity))
+        self.ttl_seconds = float(ttl_seconds)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.capacity > 0
+
+    def __contains__(self, request_id: str) -> bool:
+        with self._lock:
+            entry = self._entries.get(request_id)
+            return entry is not None and entry[1] >= time.monotonic()
+
+    def put(self, request_id: str, candidates: np.ndarray, meta: tuple):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries.pop(request_id, None)
+            self._entries[request_id] = (
+                (candidates, meta),
+                time.monotonic() + self.ttl_seconds,
+            )
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+
+    def get(self, request_id: str) -> Optional[Tuple[np.ndarray, tuple]]:
+        with self._lock:
+            entry = self._entries.get(request_id)
+            if entry is None or entry[1] < time.monotonic():
+                if entry is not None:
+                    del self._entries[request_id]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(request_id)
+            self.hits += 1
+            return entry[0]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "capacity": self.capacity,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
@@ -0,0 +1,214 @@
+"""
+ScrewVision - Yeniden kullanilan tamponlarla letterbox on isleme
+Resize + padding + BGR->RGB + [0, 1] olcekleme + HWC->CHW iki gecise indirilir:
+  1. cv2.resize dogrudan is parcacigina ait tuvalin ortasina yazar
+  2. tek bir np.divide kanal sirasini cevirerek NCHW float32 tensore yazar
+"""
+
+import threading
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+PAD_VALUE = 114
+
+# (faktor, bayrak) - buyukten kucuge
+_REDUCED_FLAGS = (
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2),
+)
+
+_JPEG_SOF_MARKERS = {
+    0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF
+}
+
+_local = threading.local()
+
+
+def _thread_canvas(input_size: int) -> np.ndarray:
+    """Is parcacigina ozel uint8 letterbox tuvali (tek cagri icinde tuketilir)"""
+    canvases = getattr(_local, "canvases", None)
+    if canvases is None:
+        canvases = _local.canvases = {}
+    canvas = canvases.get(input_size)
+    if canvas is None:
+        canvas = np.full((input_size, input_size, 3), PAD_VALUE, dtype=np.uint8)
+        canvases[input_size] = canvas
+    return canvas
+
+
+def new_input_tensor(input_size: int, batch: int = 1) -> np.ndarray:
+    return np.empty((batch, 3, input_size, input_size), dtype=np.float32)
+
+
+def letterbox_canvas(image: np.ndarray, canvas: np.ndarray, input_size: int) -> tuple:
+    """
+    image'i letterbox'layip canvas ([S, S, 3] uint8, BGR) icine yaz
+    Sadece kenar seritleri boyanir; goruntu dogrudan tuvalin ortasina resize edilir
+    Donus: scale, pad_w, pad_h (canvas'a gore)
+    """
+    h, w = image.shape[:2]
+
+    # Aspect ratio koruyarak yeniden boyutlandir
+    scale = min(input_size / w, input_size / h)
+    new_w = int(w * scale)
+    new_h = int(h * scale)
+    pad_w = (input_size - new_w) // 2
+    pad_h = (input_size - new_h) // 2
+
+    # Onceki cagridan kalan alanlari padding rengine boya (sadece kenar seritleri)
+    canvas[:pad_h] = PAD_VALUE
+    canvas[pad_h + new_h :] = PAD_VALUE
+    canvas[pad_h : pad_h + new_h, :pad_w] = PAD_VALUE
+    canvas[pad_h : pad_h + new_h, pad_w + new_w :] = PAD_VALUE
+
+    # Resize dogrudan tuvalin ilgili bolgesine
+    roi = canvas[pad_h : pad_h + new_h, pad_w : pad_w + new_w]
+    if (new_w, new_h) == (w, h):
+        roi[...] = image
+    else:
+        cv2.resize(image, (new_w, new_h), dst=roi, interpolation=cv2.INTER_LINEAR)
+
+    return scale, pad_w, pad_h
+
+
+def canvas_to_tensor(canvas: np.ndarray, out: np.ndarray):
+    """[S, S, 3] BGR uint8 tuvali out[0] ([3, S, S] float32) icine yaz"""
+    # BGR -> RGB, HWC -> CHW ve / 255 tek geciste (float32 bolme, eski yolla ayni)
+    np.divide(
+        canvas[:, :, ::-1].transpose(2, 0, 1),
+        np.float32(255.0),
+        out=out[0],
+        casting="unsafe",
+    )
+
+
+def letterbox_into(
+    image: np.ndarray,
+    out: np.ndarray,
+    input_size: int,
+    original_size: Optional[Tuple[int, int]] = None,
+) -> tuple:
+    """
+    image'i letterbox'layip out[0] ([3, S, S] float32) icine yaz
+
+    original_size: goruntu kucultulerek decode edildiyse kaynagin (w, h) boyutu;
+    donen scale bu boyuta gore hesaplanir, kutular orijinal koordinatlara doner.
+    Donus: scale, pad_w, pad_h, original_w, original_h
+    """
+    h, w = image.shape[:2]
+    canvas = _thread_canvas(input_size)
+    scale, pad_w, pad_h = letterbox_canvas(image, canvas, input_size)
+    canvas_to_tensor(canvas, out)
+
+    if original_size is not None:
+        original_w, original_h = original_size
+        scale *= w / original_w
+    else:
+        original_w, original_h = w, h
+
+    return scale, pad_w, pad_h, original_w, original_h
+
+
+class TensorPool:
+    """
+    Yeniden kullanilan [1, 3, S, S] giris tensorleri
+
+    Tensor batch zamanlayicisi onu kopyalayana kadar istek sahibinde kalir,
+    bu yuzden is parcacigi yerine istek basina odunc verilir.
+    """
+
+    def __init__(self, input_size: int, max_free: int = 64):
+        self.input_size = input_size
+        self.max_free = max_free
+        self._free = []
+        self._lock = threading.Lock()
+
+    def acquire(self) -> np.ndarray:
+        with self._lock:
+            if self._free:
+                return self._free.pop()
+        return new_input_tensor(self.input_size)
+
+    def release(self, tensor: np.ndarray):
+        with self._lock:
+            if len(self._free) < self.max_free:
+                self._free.append(tensor)
+
+
+def jpeg_dimensions(data: bytes) -> Optional[Tuple[int, int]]:
+    """JPEG basligindaki SOF segmentinden (w, h) oku, decode etmeden"""
+    if len(data) < 4 or data[0] != 0xFF or data[1] != 0xD8:
+        return None
+
+    i = 2
+    n = len(data)
+    while i + 9 < n:
+        if data[i] != 0xFF:
+            return None
+        marker = data[i + 1]
+        # Dolgu baytlari
+        if marker == 0xFF:
+            i += 1
+            continue
+        # Uzunlugu olmayan isaretciler
+        if marker in (0x01, 0xD8) or 0xD0 <= marker <= 0xD7:
+            i += 2
+            continue
+        length = (data[i + 2] << 8) | data[i + 3]
+        if marker in _JPEG_SOF_MARKERS:
+            h = (data[i + 5] << 8) | data[i + 6]
+            w = (data[i + 7] << 8) | data[i + 8]
+            return (w, h) if w and h else None
+        # Goruntu verisi basladi, SOF bulunamadi
+        if marker == 0xDA:
+            return None
+        i += 2 + length
+    return None
+
+
+def reduced_decode_flag(width: int, height: int, target_size: int) -> Tuple[int, int]:
+    """
+    Letterbox sonrasi cozunurlugu bozmayan en buyuk IMREAD_REDUCED faktorunu sec
+    Donus: (faktor, imread bayragi) - kucultme yoksa (1, IMREAD_COLOR)
+    """
+    longest = max(width, height)
+    for factor, flag in _REDUCED_FLAGS:
+        if longest // factor >= target_size:
+            return factor, flag
+    return 1, cv2.IMREAD_COLOR
+
+
+def decode_factor(data: bytes, target_size: Optional[int] = None) -> int:
+    """decode_image'in ayni argumanlarla sececegi kucultme faktoru (1 = tam cozunurluk)"""
+    size = jpeg_dimensions(data) if target_size else None
+    if size is None:
+        return 1
+    return reduced_decode_flag(size[0], size[1], target_size)[0]
+
+
+def decode_image(data: bytes, target_size: Optional[int] = None) -> tuple:
+    """
+    Kodlu goruntuyu decode et; target_size verilirse buyuk JPEG'leri
+    DCT olceklemesiyle dogrudan kucuk decode et
+    Donus: (BGR goruntu veya None, (original_w, original_h) veya None)
+    """
+    buf = np.frombuffer(data, np.uint8)
+
+    flag = cv2.IMREAD_COLOR
+    size = jpeg_dimensions(data) if target_size else None
+    if size is not None:
+        _, flag = reduced_decode_flag(size[0], size[1], target_size)
+
+    image = cv2.imdecode(buf, flag)
+    if image is None:
+        return None, None
+
+    if size is None:
+        size = (image.shape[1], image.shape[0])
+    elif (image.shape[1] >= image.shape[0]) != (size[0] >= size[1]):
+        # EXIF yonu uygulanip goruntu dondurulduyse baslik boyutlari da doner
+        size = (size[1], size[0])
+    return image, size
@@ -0,0 +1,513 @@
+"""
+ScrewVision - Cok surecli inference havuzu
+Her surec kendi cekirdek dilimine sabitlenir ve dilim boyutunda ORT thread'i
+kullanir. Batch tensorleri ve model ciktilari pickle yerine paylasimli bellek
+uzerinden tasinir; pipe'tan sadece batch boyutu ve durum mesaji gecer.
+"""
+
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+# Olu surec yeniden baslatma denemeleri arasindaki en kisa sure (sn)
+RESTART_RETRY_SECONDS = 5.0
+
+
+def available_cores() -> List[int]:
+    """Bu surecin calisabildigi cekirdekler"""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def split_cores(cores: List[int], parts: int) -> List[List[int]]:
+    """Cekirdekleri ardisik, olabildigince esit dilimlere bol"""
+    parts = max(1, int(parts))
+    if parts >= len(cores):
+        # Cekirdekten fazla surec: dilimler paylasilir
+        return [[cores[i % len(cores)]] for i in range(parts)]
+    size, extra = divmod(len(cores), parts)
+    slices, start = [], 0
+    for i in range(parts):
+        end = start + size + (1 if i < extra else 0)
+        slices.append(cores[start:end])
+        start = end
+    return slices
+
+
+class InputSpec:
+    """InferenceSession.get_inputs() ogesiyle ayni alanlar (BatchScheduler icin)"""
+
+    def __init__(self, name: str, shape: list, type: str = "tensor(float)"):
+        self.name = name
+        self.shape = shape
+        self.type = type
+
+
+class SharedTensorPool:
+    """
+    Paylasimli bellekte [1, 3, S, S] giris yuvalari (TensorPool ile ayni arayuz)
+
+    Istekler letterbox'u dogrudan bir yuvaya yazar; batch'te inference sureci
+    yuvalari kendisi okur, ana surecte birlestirme ve tampona kopyalama olmaz.
+    Yuvalar bittiginde ozel tensor verilir (run_tensors onu surec tamponuna kopyalar).
+    """
+
+    def __init__(self, input_size: int, slots: int):
+        self.input_size = input_size
+        self.slots = max(1, int(slots))
+        shape = (self.slots, 3, input_size, input_size)
+        self.shm = shared_memory.SharedMemory(create=True, size=int(np.prod(shape)) * 4)
+        self.array = np.ndarray(shape, dtype=np.float32, buffer=self.shm.buf)
+        self._base = self.array.ctypes.data
+        self._row_bytes = self.array[0].nbytes
+        # pop() artan sirada verir: ayni anda gelen istekler ardisik yuvalara duser
+        self._free = list(range(self.slots - 1, -1, -1))
+        self._lock = threading.Lock()
+
+    def acquire(self) -> np.ndarray:
+        with self._lock:
+            if self._free:
+                slot = self._free.pop()
+                return self.array[slot : slot + 1]
+        return np.empty((1, 3, self.input_size, self.input_size), dtype=np.float32)
+
+    def release(self, tensor: np.ndarray):
+        slot = self.slot_of(tensor)
+        if slot is not None:
+            with self._lock:
+                self._free.append(slot)
+
+    def slot_of(self, tensor: np.ndarray) -> Optional[int]:
+        """Tensor bu havuzun bir yuvasiysa indeksi, degilse None"""
+        if self.array is None or tensor.shape != (1,) + self.array.shape[1:]:
+            return None
+        offset = tensor.ctypes.data - self._base
+        if offset < 0 or offset % self._row_bytes or offset // self._row_bytes >= self.slots:
+            return None
+        return offset // self._row_bytes
+
+    def close(self):
+        self.array = None
+        try:
+            self.shm.close()
+        except BufferError:
+            # Bir istek hala yuva tutuyor; bellek o birakinca serbest kalir
+            pass
+        self.shm.unlink()
+
+
+def _worker_main(
+    model_path: str,
+    cores: List[int],
+    config_values: Dict,
+    input_size: int,
+    max_batch_size: int,
+    conn,
+):
+    """Inference sureci: session'i olustur, ciktilari dogrudan paylasimli bellege yazdir"""
+    from session_config import SessionConfig, create_session
+
+    if cores and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cores)
+
+    config = SessionConfig(
+        **{
+            **config_values,
+            "intra_op_threads": max(1, len(cores)),
+            "inter_op_threads": 1,
+            "execution_mode": "sequential",
+        }
+    )
+    session, _ = create_session(model_path, config)
+    input_info = session.get_inputs()[0]
+    output_names = [o.name for o in session.get_outputs()]
+
+    batch_dim = input_info.shape[0]
+    if isinstance(batch_dim, int) and batch_dim > 0:
+        max_batch_size = min(max_batch_size, batch_dim)
+
+    # Cikti boyutlarini ogren, ana surec tamponlari buna gore ayirsin
+    dummy = np.zeros((1, 3, input_size, input_size), dtype=np.float32)
+    specs = [(o.shape[1:], o.dtype.str) for o in session.run(None, {input_info.name: dummy})]
+    conn.send(("specs", input_info.name, max_batch_size, specs))
+
+    _, input_name, output_names_shm, staging_name, staging_slots = conn.recv()
+    # Bolgeleri ana surec olusturur ve siler (resource tracker ortak)
+    input_shm = shared_memory.SharedMemory(name=input_name)
+    output_shms = [shared_memory.SharedMemory(name=name) for name in output_names_shm]
+    staging_shm = shared_memory.SharedMemory(name=staging_name)
+    inputs = np.ndarray(
+        (max_batch_size, 3, input_size, input_size), dtype=np.float32, buffer=input_shm.buf
+    )
+    staging = np.ndarray(
+        (staging_slots, 3, input_size, input_size), dtype=np.float32, buffer=staging_shm.buf
+    )
+    output_views = [
+        np.ndarray((max_batch_size,) + tuple(shape), dtype=np.dtype(dtype), buffer=shm.buf)
+        for shm, (shape, dtype) in zip(output_shms, specs)
+    ]
+
+    binding = session.io_binding()
+
+    def gather(slots: list) -> np.ndarray:
+        """Giris yuvalarindan batch: ardisik yuvalar kopyasiz, digerleri tampona"""
+        n = len(slots)
+        first = slots[0]
+        if first >= 0 and slots == list(range(first, first + n)):
+            return staging[first : first + n]
+        for i, slot in enumerate(slots):
+            # -1: ana surec satiri tampona kendisi yazdi
+            if slot >= 0:
+                inputs[i] = staging[slot]
+        return inputs[:n]
+
+    def run(n: int, batch: Optional[np.ndarray] = None):
+        binding.bind_cpu_input(input_info.name, inputs[:n] if batch is None else batch)
+        for name, view in zip(output_names, output_views):
+            out = view[:n]
+            binding.bind_output(name, "cpu", 0, out.dtype.type, out.shape, out.ctypes.data)
+        session.run_with_iobinding(binding)
+        binding.clear_binding_inputs()
+        binding.clear_binding_outputs()
+
+    # Isinma: her batch boyutu
+    warmup = {}
+    for n in range(1, max_batch_size + 1):
+        for _ in range(2):
+            start = time.perf_counter()
+            run(n)
+            warmup[n] = (time.perf_counter() - start) * 1000
+    conn.send(("ready", os.getpid(), warmup))
+
+    try:
+        while True:
+            message = conn.recv()
+            if message is None:
+                break
+            try:
+                if isinstance(message, int):
+                    run(message)
+                else:
+                    run(len(message), gather(message))
+                conn.send(("ok", None))
+            except Exception as e:
+                conn.send(("error", str(e)))
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        del inputs, staging, output_views
+        input_shm.close()
+        staging_shm.close()
+        for shm in output_shms:
+            shm.close()
+
+
+class _Worker:
+    """Ana surec tarafinda bir inference surecinin tutamaci"""
+
+    def __init__(self, index: int, cores: List[int]):
+        self.index = index
+        self.cores = cores
+        self.process = None
+        self.conn = None
+        self.pid = None
+        self.input_shm = None
+        self.output_shms = []
+        self.inputs = None
+        self.outputs = []
+        self.warmup_ms = {}
+        self.batches = 0
+
+
+class ProcessInferencePool:
+    """
+    N inference sureci + paylasimli bellek tamponlari
+
+    InferenceSession ile ayni run / get_inputs arayuzunu sunar; BatchScheduler
+    session yerine bunu kullanir. run() bos bir sureci alir, batch'i onun giris
+    tamponuna yazar, pipe'tan batch boyutunu yollar ve ciktilarin kopyasini
+    dondurur (tampon surec bosa cikinca yeniden kullanilir). run_tensors()
+    input_tensors (SharedTensorPool) yuvalarindaki tensorlerin sadece indekslerini yollar.
+    Coken surec hemen yeniden baslatilir; baslatilamazsa kuyruga donmez ve
+    RESTART_RETRY_SECONDS aralikla sonraki isteklerde yeniden denenir.
+    """
+
+    def __init__(
+        self,
+        model_path: str,
+        processes: int,
+        input_size: int,
+        max_batch_size: int,
+        config_values: Dict,
+        cores: Optional[List[int]] = None,
+        staging_slots: Optional[int] = None,
+    ):
+        self.model_path = model_path
+        self.processes = max(1, int(processes))
+        self.input_size = input_size
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.config_values = dict(config_values)
+        self.core_slices = split_cores(cores or available_cores(), self.processes)
+
+        self._ctx = mp.get_context("spawn")
+        self._workers = [_Worker(i, c) for i, c in enumerate(self.core_slices)]
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        self._dead: List[_Worker] = []
+        self._dead_lock = threading.Lock()
+        self._next_revive = 0.0
+        self._input_name = "images"
+        self._closed = False
+        self.restarts = 0
+        # Istek tensorleri icin paylasimli yuvalar (varsayilan: her surece bir tam batch)
+        self.input_tensors = SharedTensorPool(
+            input_size, staging_slots or self.processes * self.max_batch_size
+        )
+
+    # --- Yasam dongusu ---
+
+    def start(self):
+        """Tum surecleri baslat ve isinmalarini bekle (bloklar)"""
+        for worker in self._workers:
+            self._spawn(worker)
+        for worker in self._workers:
+            self._wait_ready(worker)
+            self._idle.put(worker)
+        return self
+
+    def _spawn(self, worker: _Worker):
+        parent_conn, child_conn = self._ctx.Pipe()
+        worker.conn = parent_conn
+        worker.process = self._ctx.Process(
+            target=_worker_main,
+            args=(
+                self.model_path,
+                worker.cores,
+                self.config_values,
+                self.input_size,
+                self.max_batch_size,
+                child_conn,
+            ),
+            name=f"screwvision-infer-{worker.index}",
+            daemon=True,
+        )
+        worker.process.start()
+        child_conn.close()
+
+    def _wait_ready(self, worker: _Worker):
+        try:
+            _, input_name, max_batch, specs = worker.conn.recv()
+        except EOFError:
+            raise RuntimeError(
+                f"Inference sureci {worker.index} baslatilamadi (model: {self.model_path})"
+            )
+        self._input_name = input_name
+        self.max_batch_size = min(self.max_batch_size, max_batch)
+
+        self._release_buffers(worker)
+        shape = (max_batch, 3, self.input_size, self.input_size)
+        worker.input_shm = shared_memory.SharedMemory(
+            create=True, size=int(np.prod(shape)) * 4
+        )
+        worker.inputs = np.ndarray(shape, dtype=np.float32, buffer=worker.input_shm.buf)
+        worker.output_shms, worker.outputs = [], []
+        for out_shape, dtype in specs:
+            full = (max_batch,) + tuple(out_shape)
+            shm = shared_memory.SharedMemory(
+                create=True, size=int(np.prod(full)) * np.dtype(dtype).itemsize
+            )
+            worker.output_shms.append(shm)
+            worker.outputs.append(np.ndarray(full, dtype=np.dtype(dtype), buffer=shm.buf))
+
+        worker.conn.send(
+            (
+                "buffers",
+                worker.input_shm.name,
+                [shm.name for shm in worker.output_shms],
+                self.input_tensors.shm.name,
+                self.input_tensors.slots,
+            )
+        )
+        _, worker.pid, worker.warmup_ms = worker.conn.recv()
+
+    def _release_buffers(self, worker: _Worker):
+        worker.inputs = None
+        worker.outputs = []
+        for shm in [worker.input_shm] + worker.output_shms:
+            if shm is not None:
+                shm.close()
+                shm.unlink()
+        worker.input_shm, worker.output_shms = None, []
+
+    def _restart(self, worker: _Worker) -> bool:
+        """Sureci oldurup yeniden baslat; basarisizsa False (surec olu kalir)"""
+        if worker.process is not None:
+            if worker.process.is_alive():
+                worker.process.kill()
+            worker.process.join(timeout=5)
+        self.restarts += 1
+        print(f"[UYARI] Inference sureci {worker.index} yeniden baslatiliyor")
+        try:
+            self._spawn(worker)
+            self._wait_ready(worker)
+        except Exception as e:
+            print(f"[HATA] Inference sureci {worker.index} baslatilamadi: {e}")
+            if worker.process is not None and worker.process.is_alive():
+                worker.process.kill()
+            return False
+        return True
+
+    def _recover(self, worker: _Worker):
+        """Coken sureci yeniden baslat; saglikliysa kuyruga, degilse olu listesine"""
+        if self._restart(worker):
+            self._idle.put(worker)
+            return
+        with self._dead_lock:
+            self._dead.append(worker)
+            self._next_revive = time.monotonic() + RESTART_RETRY_SECONDS
+
+    def _revive_dead(self):
+        """Bekleme suresi dolduysa olu bir sureci yeniden baslatmayi dene"""
+        with self._dead_lock:
+            if not self._dead or time.monotonic() < self._next_revive:
+                return
+            worker = self._dead.pop(0)
+            # Ayni anda baska bir istek ayni sureci denemesin
+            self._next_revive = time.monotonic() + RESTART_RETRY_SECONDS
+        self._recover(worker)
+
+    def _checkout(self) -> _Worker:
+        """Bos ve saglikli bir sureci al; tum surecler oluyse hata"""
+        while True:
+            self._revive_dead()
+            with self._dead_lock:
+                all_dead = len(self._dead) == len(self._workers)
+                waiting = bool(self._dead)
+            if all_dead:
+                raise RuntimeError("Calisan inference sureci yok")
+            try:
+                # Olu surec varken periyodik uyan, yeniden baslatma denensin
+                return self._idle.get(timeout=RESTART_RETRY_SECONDS if waiting else None)
+            except queue.Empty:
+                continue
+
+    def close(self, timeout: float = 30.0):
+        """Calisan batch'lerin bitmesini bekle, surecleri durdur ve bellegi birak"""
+        if self._closed:
+            return
+        self._closed = True
+        for _ in range(len(self._workers) - len(self._dead)):
+            try:
+                worker = self._idle.get(timeout=timeout)
+            except queue.Empty:
+                break
+            try:
+                worker.conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        for worker in self._workers:
+            if worker.process is not None:
+                worker.process.join(timeout=5)
+                if worker.process.is_alive():
+                    worker.process.kill()
+            self._release_buffers(worker)
+        self.input_tensors.close()
+
+    # --- InferenceSession arayuzu ---
+
+    def get_inputs(self) -> List[InputSpec]:
+        return [
+            InputSpec(
+                self._input_name,
+                [self.max_batch_size, 3, self.input_size, self.input_size],
+            )
+        ]
+
+    def run(self, output_names, input_feed: Dict[str, np.ndarray]) -> List[np.ndarray]:
+        if self._closed:
+            raise RuntimeError("Inference havuzu kapatildi")
+        batch = input_feed[self._input_name]
+        n = len(batch)
+        if n > self.max_batch_size:
+            raise ValueError(f"Batch boyutu {n} > {self.max_batch_size}")
+
+        worker = self._checkout()
+
+        def fill(inputs: np.ndarray) -> int:
+            inputs[:n] = batch
+            return n
+
+        return self._execute(worker, n, fill)
+
+    def run_tensors(self, tensors: Sequence[np.ndarray]) -> List[np.ndarray]:
+        """
+        [1, 3, S, S] tensorlerini birlestirmeden tek batch olarak calistir
+        self.input_tensors yuvalarindakiler surece indeksle gider; digerleri surec
+        tamponuna dogrudan yazilir (tek kopya)
+        """
+        if self._closed:
+            raise RuntimeError("Inference havuzu kapatildi")
+        n = len(tensors)
+        if n > self.max_batch_size:
+            raise ValueError(f"Batch boyutu {n} > {self.max_batch_size}")
+        slots = [self.input_tensors.slot_of(tensor) for tensor in tensors]
+        worker = self._checkout()
+
+        def fill(inputs: np.ndarray) -> list:
+            for i, (tensor, slot) in enumerate(zip(tensors, slots)):
+                if slot is None:
+                    inputs[i] = tensor[0]
+            return [-1 if slot is None else slot for slot in slots]
+
+        return self._execute(worker, n, fill)
+
+    def _execute(self, worker: _Worker, n: int, fill) -> List[np.ndarray]:
+        """Girisi fill ile hazirla, sureci calistir; surec sadece saglikliysa kuyruga doner"""
+        healthy = True
+        try:
+            message = fill(worker.inputs)
+            try:
+                worker.conn.send(message)
+                status, error = worker.conn.recv()
+            except (EOFError, BrokenPipeError, OSError):
+                healthy = False
+                self._recover(worker)
+                raise RuntimeError(f"Inference sureci {worker.index} coktu")
+            if status != "ok":
+                raise RuntimeError(error)
+            worker.batches += 1
+            # Tampon bir sonraki batch'te ezilecek
+            return [out[:n].copy() for out in worker.outputs]
+        finally:
+            if healthy:
+                self._idle.put(worker)
+
+    def warmup_ms(self) -> Dict[int, float]:
+        """Surecler arasinda batch boyutu basina en yuksek isinma gecikmesi"""
+        merged: Dict[int, float] = {}
+        for worker in self._workers:
+            for n, ms in worker.warmup_ms.items():
+                merged[n] = max(merged.get(n, 0.0), ms)
+        return merged
+
+    def stats(self) -> dict:
+        return {
+            "processes": self.processes,
+            "idle": self._idle.qsize(),
+            "dead": len(self._dead),
+            "restarts": self.restarts,
+            "workers": [
+                {
+                    "pid": worker.pid,
+                    "cores": worker.cores,
+                    "batches": worker.batches,
+                }
+                for worker in self._workers
+            ],
+        }
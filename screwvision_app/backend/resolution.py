@@ -0,0 +1,137 @@
+"""
+ScrewVision - Coklu giris cozunurlugu
+Her giris boyutu icin ayri model dosyasi (best_320.onnx gibi) veya dinamik
+boyutlu tek model; boyut basina ayri session. "auto" modunda kuyruk derinligi ve
+son gecikmelere gore boyut secilir.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+def size_model_path(model_path: str, size: int) -> str:
+    """Boyuta ozel export varsa onu (best.onnx -> best_320.onnx), yoksa modelin kendisini dondur"""
+    stem, ext = os.path.splitext(model_path)
+    candidate = f"{stem}_{size}{ext}"
+    return candidate if os.path.exists(candidate) else model_path
+
+
+def accepts_input_size(session, size: int) -> bool:
+    """Modelin H/W eksenleri dinamik mi ya da bu boyuta mi sabit"""
+    shape = session.get_inputs()[0].shape
+    if len(shape) != 4:
+        return False
+    return all(not isinstance(dim, int) or dim <= 0 or dim == size for dim in shape[2:])
+
+
+def parse_input_sizes(value: str, default: int) -> List[int]:
+    """'320,416,640' -> [320, 416, 640]; varsayilan boyut her zaman dahil"""
+    sizes = {default}
+    for part in (value or "").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        size = int(part)
+        if size <= 0 or size % 32:
+            print(f"[UYARI] Giris boyutu {size} atlandi (32'nin kati olmali)")
+            continue
+        sizes.add(size)
+    return sorted(sizes)
+
+
+class AdaptiveResolution:
+    """
+    auto modunda kullanilacak giris boyutunu secer
+
+    Son istek gecikmelerinin p90'i hedefi ya da kuyruk derinligi sinirini asarsa
+    bir kademe kucuk boyuta iner. Bir ust boyutta beklenen gecikme (piksel sayisi
+    oraniyla olceklenmis p90) hedefin %80'inin altinda ve kuyruk sinirin yarisinin
+    altindaysa bir kademe cikar. Degisiklikler arasinda en az cooldown_seconds
+    gecer; her degisiklikten sonra olcum penceresi sifirlanir.
+    """
+
+    def __init__(
+        self,
+        sizes: List[int],
+        target_latency_ms: float,
+        target_queue: int,
+        cooldown_seconds: float = 2.0,
+        window: int = 32,
+        min_samples: int = 8,
+    ):
+        self.target_latency_ms = float(target_latency_ms)
+        self.target_queue = max(1, int(target_queue))
+        self.cooldown_seconds = float(cooldown_seconds)
+        self.min_samples = max(1, int(min_samples))
+        self._latencies = deque(maxlen=max(self.min_samples, int(window)))
+        self._lock = threading.Lock()
+        self._changed_at = 0.0
+        self.downshifts = 0
+        self.upshifts = 0
+        self.set_sizes(sizes)
+
+    def set_sizes(self, sizes: List[int]):
+        """Kullanilabilir boyutlar degisti (model yeniden yuklendi); en buyukten basla"""
+        with self._lock:
+            self.sizes = sorted(set(sizes))
+            self._index = len(self.sizes) - 1
+            self._latencies.clear()
+
+    @property
+    def current(self) -> int:
+        return self.sizes[self._index]
+
+    def record(self, size: int, latency_ms: float):
+        """Tamamlanan bir istegin gecikmesi; sadece gecerli boyuttakiler sayilir"""
+        if size == self.current:
+            self._latencies.append(latency_ms)
+
+    def select(self, queue_depth: int) -> int:
+        """Sonraki auto istegi icin boyut"""
+        now = time.monotonic()
+        with self._lock:
+            if len(self.sizes) == 1 or now - self._changed_at < self.cooldown_seconds:
+                return self.current
+
+            p90: Optional[float] = None
+            if len(self._latencies) >= self.min_samples:
+                p90 = float(np.percentile(self._latencies, 90))
+
+            overloaded = queue_depth > self.target_queue or (
+                p90 is not None and p90 > self.target_latency_ms
+            )
+            if overloaded and self._index > 0:
+                self._shift(-1, now)
+                self.downshifts += 1
+            elif (
+                p90 is not None
+                and self._index < len(self.sizes) - 1
+                and queue_depth <= self.target_queue // 2
+            ):
+                ratio = (self.sizes[self._index + 1] / self.current) ** 2
+                if p90 * ratio < 0.8 * self.target_latency_ms:
+                    self._shift(1, now)
+                    self.upshifts += 1
+            return self.current
+
+    def _shift(self, step: int, now: float):
+        self._index += step
+        self._changed_at = now
+        self._latencies.clear()
+
+    def stats(self) -> Dict:
+        latencies = list(self._latencies)
+        return {
+            "current": self.current,
+            "sizes": self.sizes,
+            "target_latency_ms": self.target_latency_ms,
+            "target_queue": self.target_queue,
+            "recent_p90_ms": round(float(np.percentile(latencies, 90)), 2) if latencies else None,
+            "downshifts": self.downshifts,
+            "upshifts": self.upshifts,
+        }
@@ -0,0 +1,179 @@
+"""
+ScrewVision - Tekrarlanan kareler icin sonuc onbellegi
+Kodlu goruntu baytlarinin hizli ozeti + confidence anahtariyla LRU onbellek;
+istege bagli algisal ozet (dHash) modu gorsel olarak degismeyen karelerde
+inference'i tamamen atlar
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+import cv2
+import numpy as np
+
+# Tahmini boyut: sabit kisim + tespit basina (dict + bbox + stringler)
+_ENTRY_OVERHEAD_BYTES = 256
+_DETECTION_BYTES = 640
+
+
+def perceptual_hash(image: np.ndarray) -> int:
+    """64 bitlik fark ozeti (dHash): 9x8 gri kucultmede yatay komsu karsilastirmasi"""
+    small = cv2.resize(image, (9, 8), interpolation=cv2.INTER_AREA)
+    gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+    bits = (gray[:, 1:] > gray[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+class ResultCache:
+    """
+    Bellek sinirli, TTL'li LRU tespit onbellegi
+
+    Degerler (detections, w, h) demetleridir. max_bytes tahmini boyuta gore
+    uygulanir; en eski kullanilan kayitlar ve suresi dolanlar atilir.
+    phash_distance >= 0 ise son kayitlarin dHash'leri de tutulur ve Hamming
+    mesafesi esigin altindaki kareler icin ayni sonuc dondurulur.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int,
+        ttl_seconds: float,
+        phash_distance: int = -1,
+        similar_capacity: int = 256,
+    ):
+        self.max_bytes = max(0, int(max_bytes))
+        self.ttl_seconds = float(ttl_seconds)
+        self.phash_distance = int(phash_distance)
+        self.similar_capacity = similar_capacity
+
+        # key -> (value, expires_at, size_bytes)
+        self._entries: "OrderedDict[Any, tuple]" = OrderedDict()
+        # key -> (phash, confidence, (w, h)) - sadece son kayitlar
+        self._similar: "OrderedDict[Any, tuple]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    @property
+    def phash_enabled(self) -> bool:
+        return self.enabled and self.phash_distance >= 0
+
+    @staticmethod
+    def key(data: bytes, confidence: float, input_size: int = 0, variant: str = "") -> tuple:
+        """
+        Kodlu goruntu baytlarinin 128 bit blake2b ozeti + confidence + model giris boyutu
+        variant (en fazla 16 bayt): ayni baytlarin farkli decode edildigi yollar icin
+        ayri anahtar uzayi (ozet kisisellestirilir)
+        """
+        return (
+            hashlib.blake2b(data, digest_size=16, person=variant.encode()).digest(),
+            round(confidence, 4),
+            input_size,
+        )
+
+    def get(self, key) -> Optional[Tuple]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] < time.monotonic():
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def get_similar(
+        self, phash: int, confidence: float, size: tuple, input_size: int = 0
+    ) -> Optional[Tuple]:
+        """Ayni boyutlu, ayni esikli, ayni giris boyutlu ve dHash'i yakin en yeni kaydi bul"""
+        if not self.phash_enabled:
+            return None
+        confidence = round(confidence, 4)
+        now = time.monotonic()
+        with self._lock:
+            for key in reversed(self._similar):
+                other_hash, other_conf, other_size = self._similar[key]
+                if other_conf != confidence or other_size != size or key[2] != input_size:
+                    continue
+                if hamming_distance(phash, other_hash) > self.phash_distance:
+                    continue
+                entry = self._entries.get(key)
+                if entry is None or entry[1] < now:
+                    continue
+                self._entries.move_to_end(key)
+                self.similar_hits += 1
+                return entry[0]
+        return None
+
+    def put(self, key, value: Tuple, phash: Optional[int] = None, size: tuple = None):
+        if not self.enabled:
+            return
+        detections = value[0]
+        size_bytes = _ENTRY_OVERHEAD_BYTES + _DETECTION_BYTES * len(detections)
+        if size_bytes > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, time.monotonic() + self.ttl_seconds, size_bytes)
+            self._bytes += size_bytes
+
+            if phash is not None and self.phash_enabled:
+                self._similar[key] = (phash, key[1], size)
+                while len(self._similar) > self.similar_capacity:
+                    self._similar.popitem(last=False)
+
+            # Bellek siniri asildiysa en eski kayitlari at
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._similar.clear()
+            self._bytes = 0
+
+    def _remove(self, key):
+        _, _, size_bytes = self._entries.pop(key)
+        self._similar.pop(key, None)
+        self._bytes -= size_bytes
+
+    def stats(self) -> dict:
+        # Benzerlik aramasi sadece tam eslesme kacinca yapilir
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "similar_hits": self.similar_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round((self.hits + self.similar_hits) / lookups, 3)
+            if lookups
+            else 0.0,
+            "phash_distance": self.phash_distance if self.phash_enabled else None,
+        }
@@ -0,0 +1,315 @@
+"""
+ScrewVision - ONNX Runtime session ayarlari
+Provider listesi, thread sayilari, calisma modu, graf optimizasyon seviyesi,
+optimize edilmis model onbellegi ve IO binding tek yerden yapilandirilir.
+Oncelik: varsayilanlar < JSON ayar dosyasi (SCREWVISION_ORT_CONFIG) < ortam degiskenleri
+"""
+
+import hashlib
+import json
+import os
+import platform
+import sys
+import threading
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+import onnxruntime as ort
+
+ENV_PREFIX = "SCREWVISION_ORT_"
+
+DEFAULT_PROVIDERS = ["CoreMLExecutionProvider", "CPUExecutionProvider"]
+
+GRAPH_OPT_LEVELS = {
+    "disable": ort.GraphOptimizationLevel.ORT_DISABLE_ALL,
+    "basic": ort.GraphOptimizationLevel.ORT_ENABLE_BASIC,
+    "extended": ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED,
+    "all": ort.GraphOptimizationLevel.ORT_ENABLE_ALL,
+}
+
+EXECUTION_MODES = {
+    "sequential": ort.ExecutionMode.ORT_SEQUENTIAL,
+    "parallel": ort.ExecutionMode.ORT_PARALLEL,
+}
+
+
+def hardware_fingerprint() -> str:
+    """
+    Optimize edilmis grafi etkileyen donanim bilgisi: mimari ve CPU ozellikleri
+    (ORT_ENABLE_ALL, ornegin AVX2 / AVX-512 icin farkli cekirdekler secer)
+    """
+    parts = [platform.machine(), platform.processor()]
+    try:
+        with open("/proc/cpuinfo") as f:
+            for line in f:
+                if line.startswith(("flags", "Features")):
+                    parts.append(" ".join(sorted(line.split(":", 1)[1].split())))
+                    break
+    except OSError:
+        pass
+    return "|".join(parts)
+
+
+def _parse_bool(value) -> bool:
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ("1", "true", "yes", "on")
+
+
+class SessionConfig:
+    """
+    InferenceSession ayarlari
+
+    optimized_cache_dir: optimize edilmis graf bu dizine kaydedilir ve sonraki
+    acilislarda optimizasyon atlanarak oradan yuklenir (None/"" = kapali)
+    io_binding: giris tensoru kopyalanmadan baglanir, cikti onceden ayrilip
+    bagli tutulan numpy tamponlarina yazilir (bkz. SessionRunner)
+    """
+
+    # Alan adi -> (ortam degiskeni soneki, donusturucu)
+    FIELDS = {
+        "providers": ("PROVIDERS", lambda v: [p.strip() for p in v.split(",") if p.strip()]),
+        "intra_op_threads": ("INTRA_OP_THREADS", int),
+        "inter_op_threads": ("INTER_OP_THREADS", int),
+        "execution_mode": ("EXECUTION_MODE", str),
+        "graph_optimization": ("GRAPH_OPT", str),
+        "optimized_cache_dir": ("OPTIMIZED_CACHE", str),
+        "enable_mem_arena": ("MEM_ARENA", _parse_bool),
+        "io_binding": ("IO_BINDING", _parse_bool),
+    }
+
+    def __init__(
+        self,
+        providers: Optional[List[str]] = None,
+        intra_op_threads: int = 0,
+        inter_op_threads: int = 1,
+        execution_mode: str = "sequential",
+        graph_optimization: str = "all",
+        optimized_cache_dir: Optional[str] = None,
+        enable_mem_arena: bool = True,
+        io_binding: bool = False,
+    ):
+        self.providers = list(providers or DEFAULT_PROVIDERS)
+        self.intra_op_threads = int(intra_op_threads)
+        self.inter_op_threads = int(inter_op_threads)
+        self.execution_mode = str(execution_mode).lower()
+        self.graph_optimization = str(graph_optimization).lower()
+        self.optimized_cache_dir = optimized_cache_dir or None
+        self.enable_mem_arena = bool(enable_mem_arena)
+        self.io_binding = bool(io_binding)
+
+        if self.execution_mode not in EXECUTION_MODES:
+            raise ValueError(
+                f"Gecersiz execution_mode: {self.execution_mode} "
+                f"(secenekler: {', '.join(EXECUTION_MODES)})"
+            )
+        if self.graph_optimization not in GRAPH_OPT_LEVELS:
+            raise ValueError(
+                f"Gecersiz graph_optimization: {self.graph_optimization} "
+                f"(secenekler: {', '.join(GRAPH_OPT_LEVELS)})"
+            )
+
+    @classmethod
+    def from_env(cls, defaults: Optional[Dict] = None, environ=os.environ) -> "SessionConfig":
+        """Varsayilanlari JSON dosyasi ve SCREWVISION_ORT_* degiskenleriyle ez"""
+        values = dict(defaults or {})
+
+        config_path = environ.get(ENV_PREFIX + "CONFIG")
+        if config_path:
+            with open(config_path) as f:
+                file_values = json.load(f)
+            unknown = set(file_values) - set(cls.FIELDS)
+            if unknown:
+                raise ValueError(
+                    f"{config_path}: bilinmeyen ayar(lar): {', '.join(sorted(unknown))}"
+                )
+            values.update(file_values)
+
+        for field, (suffix, convert) in cls.FIELDS.items():
+            raw = environ.get(ENV_PREFIX + suffix)
+            if raw is not None:
+                values[field] = convert(raw)
+
+        return cls(**values)
+
+    def resolved_providers(self) -> List[str]:
+        """Bu kurulumda mevcut olan provider'lar (sira korunur, CPU her zaman sonda)"""
+        available = set(ort.get_available_providers())
+        providers = [p for p in self.providers if p in available]
+        if "CPUExecutionProvider" not in providers:
+            providers.append("CPUExecutionProvider")
+        return providers
+
+    def session_options(self) -> ort.SessionOptions:
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = self.intra_op_threads
+        options.inter_op_num_threads = self.inter_op_threads
+        options.execution_mode = EXECUTION_MODES[self.execution_mode]
+        options.graph_optimization_level = GRAPH_OPT_LEVELS[self.graph_optimization]
+        options.enable_cpu_mem_arena = self.enable_mem_arena
+        return options
+
+    def optimized_model_path(self, model_path: str) -> Optional[str]:
+        """
+        Onbellek dosyasi: kaynak model (boyut + mtime), optimizasyon seviyesi,
+        provider listesi, donanim (mimari + CPU ozellikleri) ve ORT surumu
+        degisince anahtar da degisir
+        """
+        if not self.optimized_cache_dir or self.graph_optimization == "disable":
+            return None
+        stat = os.stat(model_path)
+        fingerprint = "|".join(
+            [
+                os.path.abspath(model_path),
+                str(stat.st_size),
+                str(stat.st_mtime_ns),
+                self.graph_optimization,
+                ",".join(self.resolved_providers()),
+                hardware_fingerprint(),
+                ort.__version__,
+            ]
+        )
+        digest = hashlib.blake2b(fingerprint.encode(), digest_size=8).hexdigest()
+        stem = os.path.splitext(os.path.basename(model_path))[0]
+        return os.path.join(
+            self.optimized_cache_dir, f"{stem}.{self.graph_optimization}.{digest}.onnx"
+        )
+
+    def describe(self) -> Dict:
+        """Baslangic logu ve /health icin ozet"""
+        return {
+            "providers": self.resolved_providers(),
+            "intra_op_threads": self.intra_op_threads,
+            "inter_op_threads": self.inter_op_threads,
+            "execution_mode": self.execution_mode,
+            "graph_optimization": self.graph_optimization,
+            "optimized_cache_dir": self.optimized_cache_dir,
+            "enable_mem_arena": self.enable_mem_arena,
+            "io_binding": self.io_binding,
+        }
+
+
+def create_session(model_path: str, config: SessionConfig) -> tuple:
+    """
+    Ayarlara gore InferenceSession olustur
+    Donus: (session, onbellek durumu: "hit" | "saved" | "off")
+    """
+    providers = config.resolved_providers()
+    options = config.session_options()
+    cache_path = config.optimized_model_path(model_path)
+
+    if cache_path and os.path.exists(cache_path):
+        # Graf zaten optimize edildi, tekrar optimize etme
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_DISABLE_ALL
+        return ort.InferenceSession(cache_path, options, providers=providers), "hit"
+
+    if not cache_path:
+        return ort.InferenceSession(model_path, options, providers=providers), "off"
+
+    # ORT optimize edilmis grafi session olusurken yazar; yarim dosya kalmasin
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    options.optimized_model_filepath = tmp_path
+    session = ort.InferenceSession(model_path, options, providers=providers)
+    if os.path.exists(tmp_path):
+        os.replace(tmp_path, cache_path)
+        return session, "saved"
+    return session, "off"
+
+
+class SessionRunner:
+    """
+    InferenceSession ile ayni run / get_inputs arayuzune sahip sarmalayici
+
+    io_binding aciksa her is parcacigi, giris boyutu basina en fazla
+    OUTPUT_SETS_PER_SHAPE cikti tampon takimi tutar. Her takimin kendi IOBinding'i
+    vardir ve ciktilari bir kez baglanir; cagri basina sadece giris yeniden baglanir.
+    Cagiran ciktilari (veya gorunumlerini) batch bittikten sonra da okudugu icin bir
+    takim, ona referans kalmadiginda yeniden kullanilir; hepsi kullanimdaysa
+    normal session.run'a dusulur. IOBinding nesneleri is parcacigina ozeldir.
+    """
+
+    OUTPUT_SETS_PER_SHAPE = 4
+
+    def __init__(self, session: ort.InferenceSession, io_binding: bool = False):
+        self.session = session
+        self.io_binding = io_binding
+        self.input_name = session.get_inputs()[0].name
+        self.output_names = [o.name for o in session.get_outputs()]
+        # Giris boyutu -> [(cikti boyutu, dtype)]
+        self._output_specs: Dict[tuple, List[tuple]] = {}
+        self._local = threading.local()
+
+    def get_inputs(self):
+        return self.session.get_inputs()
+
+    def get_outputs(self):
+        return self.session.get_outputs()
+
+    @staticmethod
+    def _max_refs(outputs: List[np.ndarray]) -> int:
+        # Gorunumler (output[i:i+1], .T, ...) sahip diziye referans tutar
+        return max(sys.getrefcount(out) for out in outputs)
+
+    def _bind_outputs(self, specs: List[tuple]) -> tuple:
+        outputs = [np.empty(shape, dtype=dtype) for shape, dtype in specs]
+        binding = self.session.io_binding()
+        for name, out in zip(self.output_names, outputs):
+            binding.bind_output(name, "cpu", 0, out.dtype.type, out.shape, out.ctypes.data)
+        return outputs, binding
+
+    def _output_set(self, shape: tuple, specs: List[tuple]):
+        """Bu is parcacigindaki bos bir (ciktilar, binding) takimi; yoksa None"""
+        sets = getattr(self._local, "output_sets", None)
+        if sets is None:
+            sets = self._local.output_sets = {}
+        entries = sets.setdefault(shape, [])
+        for outputs, binding, free_refs in entries:
+            if self._max_refs(outputs) <= free_refs:
+                return outputs, binding
+        if len(entries) >= self.OUTPUT_SETS_PER_SHAPE:
+            return None
+
+        outputs, binding = self._bind_outputs(specs)
+        # Sadece takim listesi tutarken referans sayisi (yukaridaki kontrolle ayni sekilde)
+        entries.append((outputs, binding, self._max_refs(outputs)))
+        return outputs, binding
+
+    def run(self, output_names, input_feed: Dict[str, np.ndarray]) -> List[np.ndarray]:
+        if not self.io_binding or output_names is not None:
+            return self.session.run(output_names, input_feed)
+
+        batch = input_feed[self.input_name]
+        specs = self._output_specs.get(batch.shape)
+        if specs is None:
+            # Cikti boyutlarini ilk cagrida ogren
+            outputs = self.session.run(None, input_feed)
+            self._output_specs[batch.shape] = [(o.shape, o.dtype) for o in outputs]
+            return outputs
+
+        output_set = self._output_set(batch.shape, specs)
+        if output_set is None:
+            # Tum takimlar hala okunuyor
+            return self.session.run(None, input_feed)
+
+        outputs, binding = output_set
+        binding.bind_cpu_input(self.input_name, np.ascontiguousarray(batch))
+        self.session.run_with_iobinding(binding)
+        return list(outputs)
+
+    def warmup(self, input_size: int, batch_sizes=(1,), repeat: int = 2) -> Dict[int, float]:
+        """
+        Sentetik girislerle calistir (ilk cagri bedelleri istek disinda odensin)
+        Donus: batch boyutu -> son cagrinin gecikmesi (ms)
+        """
+        latencies = {}
+        for batch_size in batch_sizes:
+            dummy = np.full(
+                (batch_size, 3, input_size, input_size), 114 / 255.0, dtype=np.float32
+            )
+            for _ in range(max(1, repeat)):
+                start = time.perf_counter()
+                self.run(None, {self.input_name: dummy})
+                latencies[batch_size] = (time.perf_counter() - start) * 1000
+        return latencies
@@ -0,0 +1,45 @@
+"""
+ScrewVision - Gercek zamanli akis yardimcilari
+WebSocket uzerinden gelen karelerden sadece en yenisini tutar
+"""
+
+import asyncio
+from typing import Any, Optional
+
+
+class LatestFrameSlot:
+    """
+    Tek elemanli, ustune yazilan kare yuvasi
+
+    Istemci sunucunun isleyebileceginden hizli kare gonderirse eski kare
+    islenmeden yenisiyle degistirilir; boylece gecikme birikmez.
+    """
+
+    def __init__(self):
+        self._item: Optional[Any] = None
+        self._event = asyncio.Event()
+        self._closed = False
+        self.dropped = 0
+
+    def put(self, item: Any):
+        """Yeni kareyi yerlestir, islenmemis eski kare varsa dusur"""
+        if self._item is not None:
+            self.dropped += 1
+        self._item = item
+        self._event.set()
+
+    def close(self):
+        """Akis bitti - bekleyen get() None doner"""
+        self._closed = True
+        self._event.set()
+
+    async def get(self) -> Optional[Any]:
+        """En yeni kareyi al (akis kapandiysa None)"""
+        while self._item is None:
+            if self._closed:
+                return None
+            self._event.clear()
+            await self._event.wait()
+
+        item, self._item = self._item, None
+        return item
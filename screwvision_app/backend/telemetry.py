@@ -0,0 +1,286 @@
+"""
+ScrewVision - Hafif metrik katmani ve ornekleyen profiler
+Sayac / histogram / geri cagirmali gosterge; /metrics icin Prometheus metin
+formatinda (0.0.4) yazilir. Harici bagimlilik yok; olcum basina tek kilit +
+bisect, istek yolunda mikro saniye mertebesinde maliyet.
+"""
+
+import bisect
+import functools
+import os
+import sys
+import threading
+import time
+from collections import Counter as _Tally
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# Saniye cinsinden varsayilan kovalar (asama sureleri: 0.1 ms - 10 sn)
+DEFAULT_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    """Etiket degerleri basina artan sayac"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labelvalues, amount: float = 1.0):
+        key = tuple(labelvalues)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, *labelvalues) -> float:
+        return self._values.get(tuple(labelvalues), 0.0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(v)}"
+            for key, v in sorted(items)
+        ]
+
+
+class Histogram:
+    """Kovali dagilim (Prometheus histogram: _bucket / _sum / _count)"""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # etiketler -> [kova sayilari (kumulatif degil), toplam, adet]
+        self._series: Dict[Tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labelvalues):
+        key = tuple(labelvalues)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def time(self, *labelvalues):
+        """with hist.time("preprocess"): ... blogun suresini kaydeder"""
+        return _Timer(self, labelvalues)
+
+    def timed(self, *labelvalues):
+        """Fonksiyon suresini kaydeden dekorator (calistigi thread'de olcer)"""
+
+        def decorator(fn: Callable):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    self.observe(time.perf_counter() - start, *labelvalues)
+
+            return wrapper
+
+        return decorator
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = [(k, (list(s[0]), s[1], s[2])) for k, s in self._series.items()]
+        lines = []
+        for key, (counts, total, count) in sorted(items):
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                le = f'le="{_format_value(bound)}"'
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}"
+                )
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class _Timer:
+    __slots__ = ("histogram", "labelvalues", "start")
+
+    def __init__(self, histogram: Histogram, labelvalues: Tuple):
+        self.histogram = histogram
+        self.labelvalues = labelvalues
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, *self.labelvalues)
+        return False
+
+
+class CallbackMetric:
+    """Okuma aninda fonksiyondan alinan deger (kuyruk derinligi vb.)"""
+
+    def __init__(self, name: str, help: str, fn: Callable[[], float], kind: str = "gauge"):
+        self.name = name
+        self.help = help
+        self.fn = fn
+        self.kind = kind
+
+    def samples(self) -> List[str]:
+        try:
+            value = float(self.fn())
+        except Exception:
+            return []
+        return [f"{self.name} {_format_value(value)}"]
+
+
+class Registry:
+    """Metrik kaydi; render() Prometheus metin formatini uretir"""
+
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self.register(Counter(name, help, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self.register(Histogram(name, help, labelnames, buckets))
+
+    def gauge(self, name: str, help: str, fn: Callable[[], float]) -> CallbackMetric:
+        return self.register(CallbackMetric(name, help, fn, "gauge"))
+
+    def callback_counter(self, name: str, help: str, fn: Callable[[], float]) -> CallbackMetric:
+        return self.register(CallbackMetric(name, help, fn, "counter"))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+# Bos bekleyen thread'lerin en ustteki Python cercevesi (dosya, fonksiyon)
+_IDLE_FRAMES = {
+    ("thread.py", "_worker"),  # ThreadPoolExecutor bos isci
+    ("selectors.py", "select"),  # asyncio event loop beklemede
+    ("runners.py", "run"),  # uvloop: dongu C tarafinda bekler
+    ("threading.py", "wait"),
+}
+
+
+class SamplingProfiler:
+    """
+    sys._current_frames() ile tum thread'lerin yiginlarini hz frekansinda ornekler
+    Cikti "katlanmis yigin" formatidir (flamegraph.pl, speedscope, inferno):
+        thread;modul:fonksiyon;modul:fonksiyon <ornek sayisi>
+    Sadece acikken maliyeti vardir; ornekleme ayri bir daemon thread'de calisir.
+    """
+
+    def __init__(self):
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._stacks: _Tally = _Tally()
+        self.samples = 0
+        self.started_at = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, hz: float = 100.0, include_idle: bool = False):
+        if self.running:
+            raise RuntimeError("Profiler zaten calisiyor")
+        self._stacks = _Tally()
+        self.samples = 0
+        self.started_at = time.time()
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run,
+            args=(1.0 / max(1.0, hz), include_idle),
+            name="screwvision-profiler",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self) -> str:
+        """Orneklemeyi durdur ve katlanmis yiginlari dondur"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        return "\n".join(
+            f"{stack} {count}" for stack, count in self._stacks.most_common()
+        ) + "\n"
+
+    def _run(self, interval: float, include_idle: bool):
+        own = threading.get_ident()
+        while not self._stop.wait(interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                code = frame.f_code
+                if not include_idle and (
+                    os.path.basename(code.co_filename), code.co_name
+                ) in _IDLE_FRAMES:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    module = os.path.splitext(os.path.basename(code.co_filename))[0]
+                    stack.append(f"{module}:{code.co_name}")
+                    frame = frame.f_back
+                # Havuz thread'leri (screwvision_0, _1, ...) tek satirda toplansin
+                thread = names.get(ident, "thread").rstrip("0123456789").rstrip("_-")
+                stack.append(thread or "thread")
+                self._stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
@@ -0,0 +1,62 @@
+"""Iptal edilen istegin giris tensoru, batch bitene kadar baska istege verilmez"""
+
+import asyncio
+import threading
+
+import numpy as np
+
+import main
+from batching import BatchScheduler
+from preprocess import TensorPool
+from process_pool import InputSpec
+
+
+class BlockingSession:
+    """run() serbest birakilana kadar bekler; batch'in hala tensoru kullandigi an"""
+
+    def __init__(self, input_size):
+        self.input_size = input_size
+        self.started = threading.Event()
+        self.proceed = threading.Event()
+
+    def get_inputs(self):
+        return [InputSpec("images", ["batch", 3, self.input_size, self.input_size])]
+
+    def run(self, output_names, input_feed):
+        self.started.set()
+        self.proceed.wait(10)
+        n = len(input_feed["images"])
+        return [np.zeros((n, 9, 100), dtype=np.float32)]
+
+
+def test_cancelled_request_keeps_tensor_until_batch_finishes(monkeypatch):
+    size = main.INPUT_SIZE
+    session = BlockingSession(size)
+    tensors = TensorPool(size)
+    scheduler = BatchScheduler(lambda: session, max_batch_size=4, max_wait_ms=0)
+    monkeypatch.setitem(main.input_tensors, size, tensors)
+    monkeypatch.setitem(main.batch_schedulers, size, scheduler)
+    monkeypatch.setattr(main, "process_pool", None)
+
+    image = np.full((120, 160, 3), 50, dtype=np.uint8)
+
+    async def scenario():
+        request = asyncio.ensure_future(main.run_inference_batched(image, 0.25))
+        loop = asyncio.get_running_loop()
+        assert await loop.run_in_executor(None, session.started.wait, 10)
+
+        # Istemci koptu: istek iptal edilir, batch hala calisiyor
+        request.cancel()
+        await asyncio.sleep(0.05)
+        assert request.cancelled()
+        assert tensors._free == []
+
+        session.proceed.set()
+        for _ in range(100):
+            if tensors._free:
+                break
+            await asyncio.sleep(0.01)
+        assert len(tensors._free) == 1
+        await scheduler.stop()
+
+    asyncio.run(scenario())
@@ -0,0 +1,49 @@
+"""Paketli tespit formati (pack_detections / unpack_detections / negotiate)"""
+
+import pytest
+
+from packing import FLAG_TRACK_IDS, MAX_PACKED_DIM, negotiate, pack_detections, unpack_detections
+
+
+def detection(class_id, confidence, x1, y1, x2, y2, **extra):
+    return {
+        "class_id": class_id,
+        "confidence": confidence,
+        "bbox": {"x1": x1, "y1": y1, "x2": x2, "y2": y2},
+        **extra,
+    }
+
+
+def test_round_trip():
+    header, records = unpack_detections(
+        pack_detections([detection(2, 0.75, 10, 20, 30, 40)], 640, 480)
+    )
+    assert header == {"count": 1, "width": 640, "height": 480, "flags": 0}
+    assert records[0]["class_id"] == 2 and records[0]["confidence"] == 0.75
+    assert [int(records[0][k]) for k in ("x1", "y1", "x2", "y2")] == [10, 20, 30, 40]
+
+
+def test_track_ids_switch_record_layout():
+    data = pack_detections([detection(1, 0.5, 0, 0, 5, 5, track_id=70000)], 100, 100)
+    header, records = unpack_detections(data)
+    assert header["flags"] & FLAG_TRACK_IDS
+    assert records["track_id"].tolist() == [70000]
+
+
+def test_oversized_image_is_rejected():
+    with pytest.raises(ValueError):
+        pack_detections([], MAX_PACKED_DIM + 1, 1250)
+
+
+@pytest.mark.parametrize(
+    "accept, expected",
+    [
+        ("", "json"),
+        ("*/*", "json"),
+        ("application/vnd.screwvision.detections", "packed"),
+        ("application/json, application/vnd.screwvision.detections;q=0.5", "json"),
+        ("application/vnd.screwvision.detections;q=0, application/json", "json"),
+    ],
+)
+def test_negotiate(accept, expected):
+    assert negotiate(accept) == expected
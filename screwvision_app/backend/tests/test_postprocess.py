@@ -0,0 +1,101 @@
+"""
+non_max_suppression / postprocess_detections parite testleri
+Referans: cv2.dnn.NMSBoxes (sinif bazli icin NMSBoxesBatched), sentetik kutular
+"""
+
+import cv2
+import numpy as np
+import pytest
+
+import main
+
+
+def random_boxes(seed, count=300, num_classes=4):
+    """Kumelenmis (cakisan) kutular; koordinatlar tam sayi, skorlar farkli"""
+    rng = np.random.default_rng(seed)
+    centers = rng.uniform(50, 590, (count // 10, 2))
+    xy = centers[rng.integers(0, len(centers), count)] + rng.normal(0, 12, (count, 2))
+    wh = rng.uniform(10, 120, (count, 2))
+    boxes = np.round(np.hstack([xy - wh / 2, xy + wh / 2])).astype(np.float32)
+    scores = rng.permutation(count).astype(np.float32) / count + 0.001
+    class_ids = rng.integers(0, num_classes, count)
+    return boxes, scores, class_ids
+
+
+def as_rects(boxes):
+    return [[float(x1), float(y1), float(x2 - x1), float(y2 - y1)] for x1, y1, x2, y2 in boxes]
+
+
+def cv2_nms(boxes, scores, iou, class_ids=None):
+    rects = as_rects(boxes)
+    if class_ids is None:
+        indices = cv2.dnn.NMSBoxes(rects, scores.tolist(), 0.0, iou)
+    else:
+        indices = cv2.dnn.NMSBoxesBatched(rects, scores.tolist(), class_ids.tolist(), 0.0, iou)
+    return np.asarray(indices, dtype=np.int64).flatten()
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("iou", [0.3, 0.45, 0.7])
+def test_agnostic_matches_nmsboxes(seed, iou):
+    boxes, scores, _ = random_boxes(seed)
+    np.testing.assert_array_equal(
+        main.non_max_suppression(boxes, scores, iou), cv2_nms(boxes, scores, iou)
+    )
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_per_class_matches_nmsboxes_batched(seed):
+    boxes, scores, class_ids = random_boxes(seed)
+    actual = main.non_max_suppression(boxes, scores, 0.45, class_ids)
+    expected = cv2_nms(boxes, scores, 0.45, class_ids)
+    # NMSBoxesBatched sirayi korumaz; kume ve skor sirasi ayni olmali
+    assert sorted(actual.tolist()) == sorted(expected.tolist())
+    assert np.all(np.diff(scores[actual]) <= 0)
+
+
+def test_equal_scores_keep_first_index():
+    boxes = np.array([[0, 0, 10, 10], [1, 1, 11, 11], [100, 100, 110, 110]], np.float32)
+    scores = np.array([0.5, 0.5, 0.5], np.float32)
+    actual = main.non_max_suppression(boxes, scores, 0.45)
+    np.testing.assert_array_equal(actual, cv2_nms(boxes, scores, 0.45))
+    assert actual.tolist() == [0, 2]
+
+
+def test_zero_area_boxes():
+    # Goruntu kenarina kirpilmis, alansiz kutular: ayni yerdekiler birbirini bastirir
+    boxes = np.array(
+        [[0, 5, 0, 20], [0, 5, 0, 20], [640, 0, 640, 0], [10, 10, 30, 30]], np.float32
+    )
+    scores = np.array([0.9, 0.8, 0.7, 0.6], np.float32)
+    actual = main.non_max_suppression(boxes, scores, 0.45)
+    np.testing.assert_array_equal(actual, cv2_nms(boxes, scores, 0.45))
+
+
+def test_empty_input():
+    empty = np.empty((0, 4), np.float32)
+    assert main.non_max_suppression(empty, np.empty(0, np.float32)).shape == (0,)
+
+
+def yolo_output(boxes_xywh, class_scores, num_classes=3, anchors=100):
+    """Tek goruntuluk [1, 4 + C, anchors] YOLOv8 ciktisi (kalan anchor'lar skorsuz)"""
+    out = np.zeros((1, 4 + num_classes, anchors), np.float32)
+    out[0, :4, : len(boxes_xywh)] = np.asarray(boxes_xywh, np.float32).T
+    for i, (class_id, score) in enumerate(class_scores):
+        out[0, 4 + class_id, i] = score
+    return [out]
+
+
+def test_postprocess_agnostic_flag():
+    # Ayni yerde iki farkli sinif + ayni sinifin kopyasi
+    outputs = yolo_output(
+        [[100, 100, 40, 40], [101, 101, 40, 40], [102, 100, 40, 40]],
+        [(0, 0.9), (1, 0.8), (0, 0.7)],
+    )
+    meta = (1.0, 0, 0, 640, 640)
+
+    agnostic = main.postprocess_detections(outputs, *meta, 0.25, 0.45)
+    assert [d["class_id"] for d in agnostic] == [0]
+
+    per_class = main.postprocess_detections(outputs, *meta, 0.25, 0.45, agnostic_nms=False)
+    assert [(d["class_id"], d["confidence"]) for d in per_class] == [(0, 0.9), (1, 0.8)]
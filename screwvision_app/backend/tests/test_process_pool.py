@@ -0,0 +1,89 @@
+"""Surec havuzu: paylasimli giris yuvalari ve coken surecin kuyruga donmemesi"""
+
+import numpy as np
+import pytest
+
+import process_pool
+from process_pool import ProcessInferencePool, SharedTensorPool
+
+onnx = pytest.importorskip("onnx")
+
+
+@pytest.fixture(scope="module")
+def model_path(tmp_path_factory):
+    """y = x * 2 (dinamik batch)"""
+    from onnx import TensorProto, helper
+
+    graph = helper.make_graph(
+        [helper.make_node("Mul", ["images", "two"], ["output0"])],
+        "double",
+        [helper.make_tensor_value_info("images", TensorProto.FLOAT, ["batch", 3, 4, 4])],
+        [helper.make_tensor_value_info("output0", TensorProto.FLOAT, ["batch", 3, 4, 4])],
+        [helper.make_tensor("two", TensorProto.FLOAT, [1], [2.0])],
+    )
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 13)])
+    model.ir_version = 8
+    path = str(tmp_path_factory.mktemp("model") / "double.onnx")
+    onnx.save(model, path)
+    return path
+
+
+@pytest.fixture
+def pool(model_path, monkeypatch):
+    monkeypatch.setattr(process_pool, "RESTART_RETRY_SECONDS", 0.0)
+    pool = ProcessInferencePool(
+        model_path, 2, 4, 4, {"providers": ["CPUExecutionProvider"]}
+    ).start()
+    yield pool
+    pool.close(timeout=5)
+
+
+def test_shared_slots_and_fallback():
+    tensors = SharedTensorPool(4, 2)
+    try:
+        first, second, extra = tensors.acquire(), tensors.acquire(), tensors.acquire()
+        assert tensors.slot_of(first) == 0
+        assert tensors.slot_of(second) == 1
+        # Yuvalar bitince ozel tensor
+        assert tensors.slot_of(extra) is None
+        assert tensors.slot_of(tensors.array[0, :1]) is None
+        tensors.release(second)
+        assert tensors.slot_of(tensors.acquire()) == 1
+        del first, second, extra
+    finally:
+        tensors.close()
+
+
+def test_run_tensors_matches_run(pool):
+    tensors = [pool.input_tensors.acquire() for _ in range(3)]
+    private = np.empty((1, 3, 4, 4), dtype=np.float32)
+    for value, tensor in enumerate(tensors + [private]):
+        tensor[...] = value
+
+    # Ardisik yuvalar, karisik sira ve yuva disi tensor
+    for order in ([0, 1, 2], [2, 0, 3, 1]):
+        outputs = pool.run_tensors([(tensors + [private])[i] for i in order])
+        assert np.array_equal(outputs[0][:, 0, 0, 0], np.array(order) * 2.0)
+
+
+def test_failed_restart_is_not_requeued(pool, model_path):
+    worker = pool._idle.queue[0]
+    pool.model_path = "/olmayan/model.onnx"
+    worker.process.kill()
+    worker.process.join()
+
+    with pytest.raises(RuntimeError):
+        pool.run(None, {"images": np.ones((1, 3, 4, 4), dtype=np.float32)})
+    assert pool.stats()["dead"] == 1
+    assert worker not in list(pool._idle.queue)
+
+    # Kalan surec hizmete devam eder
+    batch = np.ones((2, 3, 4, 4), dtype=np.float32)
+    for _ in range(3):
+        assert np.all(pool.run(None, {"images": batch})[0] == 2)
+
+    # Model geri gelince olu surec sonraki istekte yeniden baslatilir
+    pool.model_path = model_path
+    pool.run(None, {"images": batch})
+    assert pool.stats()["dead"] == 0
+    assert pool._idle.qsize() == 2
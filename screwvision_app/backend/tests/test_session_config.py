@@ -0,0 +1,65 @@
+"""SessionRunner IO binding tamponlari ve optimize model onbellek anahtari"""
+
+import numpy as np
+import pytest
+
+from session_config import SessionConfig, SessionRunner, create_session, hardware_fingerprint
+
+onnx = pytest.importorskip("onnx")
+
+
+@pytest.fixture(scope="module")
+def session(tmp_path_factory):
+    """y = x * 2 (dinamik batch)"""
+    from onnx import TensorProto, helper
+
+    graph = helper.make_graph(
+        [helper.make_node("Mul", ["images", "two"], ["output0"])],
+        "double",
+        [helper.make_tensor_value_info("images", TensorProto.FLOAT, ["batch", 3, 4, 4])],
+        [helper.make_tensor_value_info("output0", TensorProto.FLOAT, ["batch", 3, 4, 4])],
+        [helper.make_tensor("two", TensorProto.FLOAT, [1], [2.0])],
+    )
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 13)])
+    model.ir_version = 8
+    path = str(tmp_path_factory.mktemp("model") / "double.onnx")
+    onnx.save(model, path)
+    return create_session(path, SessionConfig(providers=["CPUExecutionProvider"]))[0]
+
+
+def batch(value, size=2):
+    return np.full((size, 3, 4, 4), value, dtype=np.float32)
+
+
+def test_bound_outputs_are_reused_when_released(session):
+    runner = SessionRunner(session, io_binding=True)
+    runner.run(None, {"images": batch(1)})  # cikti boyutlarini ogrenir
+
+    first = runner.run(None, {"images": batch(1)})
+    address = first[0].ctypes.data
+    del first
+    second = runner.run(None, {"images": batch(3)})
+    assert second[0].ctypes.data == address
+    assert np.all(second[0] == 6)
+
+
+def test_held_outputs_are_not_overwritten(session):
+    runner = SessionRunner(session, io_binding=True)
+    runner.run(None, {"images": batch(1)})
+
+    # BatchScheduler gibi satir gorunumleri batch bittikten sonra okunur
+    rows = [runner.run(None, {"images": batch(v)})[0][1:2].T for v in range(8)]
+    for value, row in enumerate(rows):
+        assert np.all(row == value * 2)
+    assert len(runner._local.output_sets[(2, 3, 4, 4)]) == SessionRunner.OUTPUT_SETS_PER_SHAPE
+
+
+def test_cache_key_includes_hardware(tmp_path, monkeypatch):
+    model = tmp_path / "m.onnx"
+    model.write_bytes(b"x")
+    config = SessionConfig(providers=["CPUExecutionProvider"], optimized_cache_dir=str(tmp_path))
+    path = config.optimized_model_path(str(model))
+
+    monkeypatch.setattr("session_config.hardware_fingerprint", lambda: "other-cpu")
+    assert config.optimized_model_path(str(model)) != path
+    assert hardware_fingerprint()
@@ -0,0 +1,56 @@
+"""Kareler arasi birlestirme (merge_tile_boxes / seam_boxes)"""
+
+import numpy as np
+
+from tiling import merge_tile_boxes, seam_boxes
+
+
+def merge(rows):
+    """rows: (x1, y1, x2, y2, score, class_id, on_seam)"""
+    data = np.asarray(rows, dtype=np.float64)
+    boxes = data[:, :4].astype(np.float32)
+    keep, merged = merge_tile_boxes(
+        boxes, data[:, 4].astype(np.float32), data[:, 5].astype(np.int64), data[:, 6] > 0
+    )
+    return keep.tolist(), merged.round(1).tolist()
+
+
+def test_small_screw_inside_large_box_is_kept():
+    # Tam goruntu gecisindeki buyuk kutu ve icindeki kucuk vida, ikisi de dikiste degil
+    keep, merged = merge([(0, 0, 400, 400, 0.9, 0, 0), (50, 50, 90, 90, 0.8, 0, 0)])
+    assert keep == [0, 1]
+    assert merged[1] == [50, 50, 90, 90]
+
+
+def test_cut_box_joins_whole_box_of_same_class():
+    # Dikiste kesik parca (yuksek skor) tam kutunun icinde: tam kutu tutulur, buyutulmez
+    keep, merged = merge([(100, 100, 128, 140, 0.9, 2, 1), (100, 100, 150, 140, 0.7, 2, 0)])
+    assert keep == [1]
+    assert merged == [[100, 100, 150, 140]]
+
+
+def test_cut_box_of_other_class_is_not_merged():
+    keep, _ = merge([(100, 100, 128, 140, 0.9, 1, 1), (100, 100, 150, 140, 0.7, 2, 0)])
+    assert keep == [0, 1]
+
+
+def test_all_cut_boxes_are_score_weighted():
+    keep, merged = merge([(100, 100, 130, 140, 0.75, 0, 1), (104, 100, 150, 140, 0.25, 0, 1)])
+    assert keep == [0]
+    assert merged == [[101, 100, 135, 140]]
+
+
+def test_duplicates_suppressed_by_iou():
+    keep, merged = merge([(10, 10, 50, 50, 0.6, 0, 0), (11, 11, 51, 51, 0.9, 0, 0)])
+    assert keep == [1]
+    assert merged == [[11, 11, 51, 51]]
+
+
+def test_seam_boxes_ignore_image_border():
+    boxes = np.array(
+        [[0, 10, 20, 30], [1270, 10, 1280, 30], [500, 500, 520, 520]], np.float32
+    )
+    # Sol ust kare: sol / ust kenar goruntu kenari, sag / alt kenar dikis
+    assert seam_boxes(boxes, (0, 0, 1280, 1280), 3000, 2000).tolist() == [False, True, False]
+    # Tam goruntu: dikis yok
+    assert not seam_boxes(boxes, (0, 0, 3000, 2000), 3000, 2000).any()
@@ -0,0 +1,149 @@
+"""
+ScrewVision - Yuksek cozunurluklu goruntuler icin dilimli (tiled) inference
+Goruntu ortusen karelere bolunur, her kare model boyutuna letterbox'lanir ve
+tumu tek batch tensorunde calistirilir. Kare tespitleri goruntu koordinatlarina
+tasinir ve kareler arasi sinif bazli NMS ile birlestirilir; kare dikisinde kesilen
+kutular ayni siniftaki tam kutuya katilir. Istege bagli olarak tum goruntunun
+dusuk cozunurluklu gecisinde aday icermeyen kareler atlanir.
+"""
+
+from typing import List, Tuple
+
+import numpy as np
+
+from preprocess import letterbox_into
+
+
+def tile_origins(length: int, tile: int, overlap: float) -> List[int]:
+    """Bir eksende kare baslangiclari; son kare kenara hizalanir"""
+    if length <= tile:
+        return [0]
+    stride = max(1, int(tile * (1.0 - overlap)))
+    origins = list(range(0, length - tile, stride))
+    origins.append(length - tile)
+    return origins
+
+
+def tile_grid(
+    width: int, height: int, tile: int, overlap: float
+) -> List[Tuple[int, int, int, int]]:
+    """Goruntuyu kaplayan (x1, y1, x2, y2) kareleri, satir satir"""
+    return [
+        (x, y, min(x + tile, width), min(y + tile, height))
+        for y in tile_origins(height, tile, overlap)
+        for x in tile_origins(width, tile, overlap)
+    ]
+
+
+def tiles_with_candidates(
+    tiles: List[Tuple[int, int, int, int]], boxes: np.ndarray
+) -> List[int]:
+    """Dusuk cozunurluklu gecisin aday kutularindan en az biriyle kesisen kareler"""
+    if len(boxes) == 0:
+        return []
+    grid = np.asarray(tiles, dtype=np.float64)
+    hits = (
+        (boxes[None, :, 0] < grid[:, None, 2])
+        & (boxes[None, :, 2] > grid[:, None, 0])
+        & (boxes[None, :, 1] < grid[:, None, 3])
+        & (boxes[None, :, 3] > grid[:, None, 1])
+    )
+    return np.flatnonzero(hits.any(axis=1)).tolist()
+
+
+def fill_tile_batch(
+    image: np.ndarray,
+    tiles: List[Tuple[int, int, int, int]],
+    out: np.ndarray,
+    input_size: int,
+) -> List[tuple]:
+    """
+    Kareleri out[i] ([N, 3, S, S] float32) icine letterbox'la (kirpma kopyasiz gorunum)
+    Donus: kare basina (scale, pad_w, pad_h, tile_w, tile_h)
+    """
+    metas = []
+    for i, (x1, y1, x2, y2) in enumerate(tiles):
+        metas.append(letterbox_into(image[y1:y2, x1:x2], out[i : i + 1], input_size))
+    return metas
+
+
+def seam_boxes(
+    boxes: np.ndarray,
+    region: Tuple[int, int, int, int],
+    width: int,
+    height: int,
+    margin: float = 4.0,
+) -> np.ndarray:
+    """
+    Kare ici bir kenara (goruntu kenari olmayan, yani kare dikisine) margin pikselden
+    yakin kutular: nesne kare siniriyla kesilmis olabilir
+    """
+    x1, y1, x2, y2 = region
+    touching = np.zeros(len(boxes), dtype=bool)
+    if x1 > 0:
+        touching |= boxes[:, 0] <= x1 + margin
+    if y1 > 0:
+        touching |= boxes[:, 1] <= y1 + margin
+    if x2 < width:
+        touching |= boxes[:, 2] >= x2 - margin
+    if y2 < height:
+        touching |= boxes[:, 3] >= y2 - margin
+    return touching
+
+
+def merge_tile_boxes(
+    boxes: np.ndarray,
+    scores: np.ndarray,
+    class_ids: np.ndarray,
+    on_seam: np.ndarray,
+    iou_threshold: float = 0.45,
+    overlap_threshold: float = 0.6,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Kareler arasi sinif bazli greedy birlestirme
+
+    Ayni sinifta IoU > iou_threshold olan kutular ayni nesnenin kopyasidir (NMS).
+    Kare dikisine degen (on_seam) bir kutu icin ek olarak kesisim / kucuk kutunun
+    alani > overlap_threshold da eslesme sayilir: dikiste kesilen vidanin kutusu
+    komsu karedeki (veya tum goruntu gecisindeki) tam kutunun icinde kalir ama
+    IoU'su dusuktur. Dikise degmeyen kutular birbirini sadece IoU ile bastirir;
+    buyuk kutunun icindeki kucuk vida korunur.
+    Grupta dikise degmeyen kutu varsa en yuksek skorlusu tutulur; hepsi kesikse
+    koordinatlar skorla agirlikli ortalanir.
+    Donus: (tutulan indeksler - skora gore azalan, kutular)
+    """
+    if len(boxes) == 0:
+        return np.empty(0, dtype=np.int64), boxes
+
+    x1, y1, x2, y2 = boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3]
+    areas = np.maximum(x2 - x1, 0.0) * np.maximum(y2 - y1, 0.0)
+
+    order = np.argsort(-scores, kind="stable")
+    keep = []
+    merged = []
+    while order.size > 0:
+        i = order[0]
+        rest = order[1:]
+        inter_w = np.maximum(0.0, np.minimum(x2[i], x2[rest]) - np.maximum(x1[i], x1[rest]))
+        inter_h = np.maximum(0.0, np.minimum(y2[i], y2[rest]) - np.maximum(y1[i], y1[rest]))
+        inter = inter_w * inter_h
+        iou = inter / np.maximum(areas[i] + areas[rest] - inter, 1e-12)
+        ios = inter / np.maximum(np.minimum(areas[i], areas[rest]), 1e-12)
+        seam = on_seam[i] | on_seam[rest]
+        matched = (class_ids[rest] == class_ids[i]) & (
+            (iou > iou_threshold) | (seam & (ios > overlap_threshold))
+        )
+
+        group = np.concatenate(([i], rest[matched]))
+        whole = group[~on_seam[group]]
+        if len(whole):
+            # Skor sirasinda: ilk tam kutu en yuksek skorlu tam kutu
+            keep.append(whole[0])
+            merged.append(boxes[whole[0]])
+        else:
+            weights = scores[group].astype(np.float64)
+            keep.append(i)
+            merged.append((boxes[group] * weights[:, None]).sum(axis=0) / weights.sum())
+        order = rest[~matched]
+
+    return np.asarray(keep, dtype=np.int64), np.asarray(merged, dtype=boxes.dtype)
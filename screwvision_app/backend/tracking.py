@@ -0,0 +1,330 @@
+"""
+ScrewVision - Gercek zamanli akislar icin anahtar kare + izleme modu
+Dedektor sadece anahtar karelerde calisir (sabit aralik veya sahne degisimi).
+Aradaki karelerde kutular kucuk gri goruntu uzerinde seyrek optik akisla
+(Lucas-Kanade) tasinir; anahtar karede tespitler IoU ile izlere eslenir ve
+izler kararli kimliklerini korur.
+"""
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from preprocess import jpeg_dimensions
+
+# (faktor, bayrak) - buyukten kucuge
+_REDUCED_GRAY_FLAGS = (
+    (8, cv2.IMREAD_REDUCED_GRAYSCALE_8),
+    (4, cv2.IMREAD_REDUCED_GRAYSCALE_4),
+    (2, cv2.IMREAD_REDUCED_GRAYSCALE_2),
+)
+
+# Sahne degisimi icin karsilastirilan kucuk resim
+_THUMB_SIZE = (32, 24)
+
+_LK_PARAMS = dict(
+    winSize=(11, 11),
+    maxLevel=2,
+    criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 20, 0.03),
+)
+
+
+def decode_gray(data: bytes, long_side: int) -> tuple:
+    """
+    Kareyi izleme cozunurlugunde gri decode et (buyuk JPEG'ler DCT olceklemesiyle)
+    Donus: (gri goruntu - uzun kenari en fazla long_side, kaynak (w, h)) veya (None, None)
+    """
+    size = jpeg_dimensions(data)
+    flag = cv2.IMREAD_GRAYSCALE
+    if size is not None:
+        for factor, reduced in _REDUCED_GRAY_FLAGS:
+            if max(size) // factor >= long_side:
+                flag = reduced
+                break
+
+    gray = cv2.imdecode(np.frombuffer(data, np.uint8), flag)
+    if gray is None:
+        return None, None
+
+    if size is None:
+        size = (gray.shape[1], gray.shape[0])
+    elif (gray.shape[1] >= gray.shape[0]) != (size[0] >= size[1]):
+        # EXIF yonu uygulandiysa baslik boyutlari da doner
+        size = (size[1], size[0])
+
+    scale = min(1.0, long_side / max(size))
+    target = (max(1, round(size[0] * scale)), max(1, round(size[1] * scale)))
+    if (gray.shape[1], gray.shape[0]) != target:
+        gray = cv2.resize(gray, target, interpolation=cv2.INTER_AREA)
+    return gray, size
+
+
+def box_iou_matrix(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """[N, 4] ve [M, 4] xyxy kutular arasi IoU [N, M]"""
+    lt = np.maximum(a[:, None, :2], b[None, :, :2])
+    rb = np.minimum(a[:, None, 2:], b[None, :, 2:])
+    inter = np.prod(np.clip(rb - lt, 0, None), axis=2)
+    area_a = np.prod(a[:, 2:] - a[:, :2], axis=1)
+    area_b = np.prod(b[:, 2:] - b[:, :2], axis=1)
+    return inter / np.maximum(area_a[:, None] + area_b[None, :] - inter, 1e-9)
+
+
+class Track:
+    """Tek nesnenin izi: son tespit bilgisi + guncel kutu (goruntu koordinatlari)"""
+
+    __slots__ = ("track_id", "detection", "box", "misses", "visible")
+
+    def __init__(self, track_id: int, detection: Dict, box: np.ndarray):
+        self.track_id = track_id
+        self.detection = detection
+        self.box = box
+        self.misses = 0
+        self.visible = True
+
+    def as_detection(self) -> Dict:
+        x1, y1, x2, y2 = self.box.tolist()
+        return {
+            **self.detection,
+            "bbox": {"x1": int(x1), "y1": int(y1), "x2": int(x2), "y2": int(y2)},
+            "track_id": self.track_id,
+        }
+
+
+def detection_box(detection: Dict) -> np.ndarray:
+    b = detection["bbox"]
+    return np.array([b["x1"], b["y1"], b["x2"], b["y2"]], dtype=np.float64)
+
+
+class FrameTracker:
+    """
+    Tek istemcinin izleme durumu (bellek: bir gri kare + en fazla max_tracks iz)
+
+    Cagiran her kare icin sirayla: needs_keyframe() True ise dedektoru calistirip
+    keyframe(), degilse propagate(). Ayni izleyicinin kareleri lock altinda
+    sirayla islenmelidir.
+    """
+
+    def __init__(
+        self,
+        keyframe_interval: int = 10,
+        scene_threshold: float = 0.08,
+        track_size: int = 320,
+        max_tracks: int = 256,
+        iou_threshold: float = 0.3,
+        max_misses: int = 2,
+    ):
+        self.keyframe_interval = max(1, int(keyframe_interval))
+        self.scene_threshold = float(scene_threshold)
+        self.track_size = int(track_size)
+        self.max_tracks = int(max_tracks)
+        self.iou_threshold = float(iou_threshold)
+        self.max_misses = int(max_misses)
+        self.lock = asyncio.Lock()
+
+        self.tracks: List[Track] = []
+        self._next_id = 1
+        self._gray: Optional[np.ndarray] = None
+        self._thumb: Optional[np.ndarray] = None
+        self._size: Optional[Tuple[int, int]] = None
+        self._since_keyframe = 0
+        self._lost = False
+
+        self.frames = 0
+        self.keyframes = 0
+        self.last_used = time.monotonic()
+
+    def needs_keyframe(self, gray: np.ndarray, size: Tuple[int, int]) -> bool:
+        """Aralik doldu, boyut degisti, iz kaybedildi veya sahne degisti mi"""
+        self.last_used = time.monotonic()
+        if (
+            self._gray is None
+            or size != self._size
+            or self._lost
+            or self._since_keyframe + 1 >= self.keyframe_interval
+        ):
+            return True
+        if self.scene_threshold > 0:
+            diff = cv2.absdiff(self._thumbnail(gray), self._thumb)
+            return float(diff.mean()) / 255.0 > self.scene_threshold
+        return False
+
+    def keyframe(
+        self, gray: np.ndarray, size: Tuple[int, int], detections: List[Dict]
+    ) -> List[Dict]:
+        """Dedektor sonucunu izlere esle; eslesmeyen tespitler yeni kimlik alir"""
+        if size == self._size and self._gray is not None and self.tracks:
+            # Izleri once bu kareye tasi (hareket varsa IoU eslesmesi kolaylasir)
+            self._flow(gray)
+        else:
+            self.tracks = []
+
+        det_boxes = (
+            np.stack([detection_box(d) for d in detections])
+            if detections
+            else np.zeros((0, 4))
+        )
+        matched_tracks = set()
+        matched_dets = set()
+        if self.tracks and detections:
+            iou = box_iou_matrix(np.stack([t.box for t in self.tracks]), det_boxes)
+            # Greedy: en yuksek IoU'lu ciftten baslayarak
+            for flat in np.argsort(-iou, axis=None):
+                ti, di = divmod(int(flat), iou.shape[1])
+                if iou[ti, di] < self.iou_threshold:
+                    break
+                if ti in matched_tracks or di in matched_dets:
+                    continue
+                track = self.tracks[ti]
+                track.detection, track.box = detections[di], det_boxes[di]
+                track.misses, track.visible = 0, True
+                matched_tracks.add(ti)
+                matched_dets.add(di)
+
+        survivors = []
+        for i, track in enumerate(self.tracks):
+            if i in matched_tracks:
+                survivors.append(track)
+            elif track.misses < self.max_misses:
+                # Birkac anahtar kare boyunca kimlik saklanir, ama gosterilmez
+                track.misses += 1
+                track.visible = False
+                survivors.append(track)
+        for di, detection in enumerate(detections):
+            if di not in matched_dets:
+                survivors.append(Track(self._next_id, detection, det_boxes[di]))
+                self._next_id += 1
+
+        # Bellek siniri: gorunur ve guvenilir izler once
+        survivors.sort(key=lambda t: (not t.visible, -t.detection["confidence"]))
+        self.tracks = survivors[: self.max_tracks]
+
+        self._gray = gray
+        self._thumb = self._thumbnail(gray)
+        self._size = size
+        self._since_keyframe = 0
+        self._lost = False
+        self.frames += 1
+        self.keyframes += 1
+        return self.visible_detections()
+
+    def propagate(self, gray: np.ndarray) -> List[Dict]:
+        """Anahtar kare olmayan karede izleri optik akisla tasi"""
+        self._flow(gray)
+        self._gray = gray
+        self._since_keyframe += 1
+        self.frames += 1
+        return self.visible_detections()
+
+    def visible_detections(self) -> List[Dict]:
+        return [t.as_detection() for t in self.tracks if t.visible]
+
+    def _thumbnail(self, gray: np.ndarray) -> np.ndarray:
+        return cv2.resize(gray, _THUMB_SIZE, interpolation=cv2.INTER_AREA)
+
+    def _flow(self, gray: np.ndarray):
+        """
+        Gorunur izlerin kutu ici 3x3 noktalarini ileri-geri LK akisiyla takip et;
+        kutu noktalarin medyan kaymasiyla tasinir. Yeterli nokta kalmazsa iz
+        gizlenir ve sonraki kare anahtar kare olur.
+        """
+        tracks = [t for t in self.tracks if t.visible]
+        if not tracks:
+            return
+        scale = gray.shape[1] / self._size[0]
+
+        grid = np.linspace(0.2, 0.8, 3)
+        fx, fy = np.meshgrid(grid, grid)
+        offsets = np.stack([fx.ravel(), fy.ravel()], axis=1)  # [9, 2]
+        boxes = np.stack([t.box for t in tracks]) * scale
+        points = boxes[:, None, :2] + offsets[None] * (boxes[:, None, 2:] - boxes[:, None, :2])
+        points = points.reshape(-1, 1, 2).astype(np.float32)
+
+        forward, status, _ = cv2.calcOpticalFlowPyrLK(self._gray, gray, points, None, **_LK_PARAMS)
+        backward, status_back, _ = cv2.calcOpticalFlowPyrLK(
+            gray, self._gray, forward, None, **_LK_PARAMS
+        )
+        error = np.linalg.norm(points - backward, axis=2).ravel()
+        good = (status.ravel() == 1) & (status_back.ravel() == 1) & (error < 1.0)
+        shift = (forward - points).reshape(len(tracks), 9, 2)
+        good = good.reshape(len(tracks), 9)
+
+        width, height = self._size
+        for track, moves, ok in zip(tracks, shift, good):
+            if ok.sum() < 3:
+                track.visible = False
+                self._lost = True
+                continue
+            dx, dy = np.median(moves[ok], axis=0) / scale
+            box = track.box + (dx, dy, dx, dy)
+            box[0::2] = np.clip(box[0::2], 0, width)
+            box[1::2] = np.clip(box[1::2], 0, height)
+            track.box = box
+
+
+class TrackerRegistry:
+    """
+    Istemci (session) basina izleyiciler
+    Adet sinirli LRU; idle_seconds boyunca kare gelmeyen izleyiciler atilir
+    """
+
+    def __init__(self, capacity: int, idle_seconds: float, **tracker_settings):
+        self.capacity = max(1, int(capacity))
+        self.idle_seconds = float(idle_seconds)
+        self.tracker_settings = tracker_settings
+        self._trackers: "OrderedDict[str, FrameTracker]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evicted = 0
+
+    def new_tracker(self) -> FrameTracker:
+        return FrameTracker(**self.tracker_settings)
+
+    def get(self, session_id: str) -> FrameTracker:
+        """Session'in izleyicisi (yoksa olusturulur, en eskisi gerekirse atilir)"""
+        with self._lock:
+            self._evict_idle()
+            tracker = self._trackers.get(session_id)
+            if tracker is None:
+                tracker = self._trackers[session_id] = self.new_tracker()
+                while len(self._trackers) > self.capacity:
+                    self._trackers.popitem(last=False)
+                    self.evicted += 1
+            self._trackers.move_to_end(session_id)
+            tracker.last_used = time.monotonic()
+            return tracker
+
+    def drop(self, session_id: str) -> bool:
+        with self._lock:
+            return self._trackers.pop(session_id, None) is not None
+
+    def clear(self):
+        with self._lock:
+            self._trackers.clear()
+
+    def _evict_idle(self):
+        # LRU sirasi = son kullanim sirasi, en eskiden baslanir
+        deadline = time.monotonic() - self.idle_seconds
+        while self._trackers:
+            session_id, tracker = next(iter(self._trackers.items()))
+            if tracker.last_used >= deadline:
+                break
+            del self._trackers[session_id]
+            self.evicted += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            self._evict_idle()
+            trackers = list(self._trackers.values())
+        return {
+            "sessions": len(trackers),
+            "capacity": self.capacity,
+            "idle_seconds": self.idle_seconds,
+            "evicted": self.evicted,
+            "frames": sum(t.frames for t in trackers),
+            "keyframes": sum(t.keyframes for t in trackers),
+            "tracks": sum(len(t.tracks) for t in trackers),
+        }
@@ -0,0 +1,70 @@
+"""
+ScrewVision - Sinirli is parcacigi havuzu
+CPU agirlikli adimlari (decode, preprocess, session.run, postprocess) event
+loop'un disinda calistirir ve kapasite dolunca yeni istekleri hemen reddeder
+"""
+
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Callable
+
+
+class PoolSaturatedError(Exception):
+    """Kabul kuyrugu dolu - istemci daha sonra tekrar denemeli"""
+
+    def __init__(self, retry_after: int = 1):
+        super().__init__("Sunucu yogun, daha sonra tekrar deneyin")
+        self.retry_after = retry_after
+
+
+def default_worker_count() -> int:
+    """Varsayilan havuz boyutu: CPU cekirdek sayisi (en fazla 8)"""
+    return max(1, min(8, os.cpu_count() or 1))
+
+
+class InferencePool:
+    """
+    Thread havuzu + sinirli kabul kuyrugu
+
+    OpenCV ve ONNX Runtime GIL'i birakir, bu yuzden thread'ler gercek paralellik
+    saglar. admit() ayni anda en fazla max_pending istegi iceri alir; fazlasi
+    PoolSaturatedError ile hizlica geri cevrilir, boylece istekler birikmez.
+    """
+
+    def __init__(self, max_workers: int, max_pending: int, retry_after: int = 1):
+        self.max_workers = max(1, int(max_workers))
+        self.max_pending = max(self.max_workers, int(max_pending))
+        self.retry_after = retry_after
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="screwvision"
+        )
+
+        self._in_flight = 0
+        self.rejected = 0
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @asynccontextmanager
+    async def admit(self):
+        """Istegi kabul et ya da kapasite doluysa PoolSaturatedError firlat"""
+        if self._in_flight >= self.max_pending:
+            self.rejected += 1
+            raise PoolSaturatedError(self.retry_after)
+
+        self._in_flight += 1
+        try:
+            yield
+        finally:
+            self._in_flight -= 1
+
+    async def run(self, fn: Callable, *args):
+        """fn(*args) fonksiyonunu havuzda calistir ve sonucunu bekle"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, fn, *args)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
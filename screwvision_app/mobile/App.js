@@ -34,6 +34,9 @@ const CLASS_LABELS = {
   duz: 'Düz (SL)',
 };
 
+// Sunucudaki sınıf sırası (/ws/detect kısa formatı class_id gönderir)
+const CLASS_NAMES = ['allen', 'duz', 'phillips', 'pozidriv', 'torx'];
+
 const CLASS_EMOJIS = {
   phillips: '➕',
   pozidriv: '❄️',
@@ -77,6 +80,7 @@ export default function App() {
 
   const cameraRef = useRef(null);
   const detectionIntervalRef = useRef(null);
+  const socketRef = useRef(null);
   isDetectingRef = useRef(false);
 
   // Animasyonlar
@@ -230,42 +234,65 @@ export default function App() {
     return () => stopRealtimeDetection();
   }, [isCameraActive]);
 
+  // Canlı mod: kareler WebSocket üzerinden ham JPEG olarak gider.
+  // Sunucu sadece en yeni kareyi işler, bu yüzden yanıt beklemeden gönderebiliriz.
+  const openDetectionSocket = () => {
+    const socket = new WebSocket(apiUrl.replace(/^http/, 'ws') + '/ws/detect?confidence=0.25');
+
+    socket.onmessage = (event) => {
+      try {
+        const data = JSON.parse(event.data);
+        if (!data.det) return;
+        setRealtimeDetections(data.det.map(([classId, confidence, x1, y1, x2, y2]) => ({
+          class_id: classId,
+          class_name: CLASS_NAMES[classId],
+          confidence,
+          bbox: { x1, y1, x2, y2 },
+        })));
+        setImageSize({ width: data.w, height: data.h });
+      } catch (error) {
+        // Bozuk mesajı atla
+      }
+    };
+
+    socket.onclose = () => {
+      if (socketRef.current === socket) socketRef.current = null;
+    };
+
+    socketRef.current = socket;
+    return socket;
+  };
+
   const startRealtimeDetection = () => {
     if (detectionIntervalRef.current) return;
+    openDetectionSocket();
     detectionIntervalRef.current = setInterval(async () => {
       if (isDetectingRef.current || !cameraRef.current) return;
       try {
         isDetectingRef.current = true;
         setIsDetecting(true);
 
+        // Bağlantı koptuysa yeniden aç
+        const socket = socketRef.current || openDetectionSocket();
+        if (socket.readyState !== WebSocket.OPEN) return;
+
         const photo = await cameraRef.current.takePictureAsync({
           quality: 0.5,
-          base64: true,
           skipProcessing: true,
         });
 
-        if (!photo || !photo.base64) return;
+        if (!photo || !photo.uri) return;
 
-        const response = await fetch(apiUrl + '/detect/base64', {
-          method: 'POST',
-          headers: { 'Content-Type': 'application/json' },
-          body: JSON.stringify({ image: photo.base64, confidence: 0.25 }),
-        });
-
-        if (response.ok) {
-          const data = await response.json();
-          if (data.success) {
-            setRealtimeDetections(data.detections);
-            setImageSize({ width: photo.width, height: photo.height });
-          }
-        }
+        // Base64 yerine dosyanın ham baytları
+        const frame = await (await fetch(photo.uri)).arrayBuffer();
+        socket.send(frame);
       } catch (error) {
         // Sessizce geç - canlı tespit hatası kritik değil
       } finally {
         isDetectingRef.current = false;
         setIsDetecting(false);
       }
-    }, 1200);
+    }, 400);
   };
 
   const stopRealtimeDetection = () => {
@@ -273,6 +300,10 @@ export default function App() {
       clearInterval(detectionIntervalRef.current);
       detectionIntervalRef.current = null;
     }
+    if (socketRef.current) {
+      socketRef.current.close();
+      socketRef.current = null;
+    }
     setRealtimeDetections([]);
     isDetectingRef.current = false;
   };
@@ -0,0 +1,561 @@
+import argparse
+import csv
+import hashlib
+import itertools
+import json
+import multiprocessing as mp
+import os
+import queue
+import shutil
+import sqlite3
+import sys
+import time
+from collections import deque
+from datetime import datetime, timezone
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+backend_dir = os.path.join(current_dir, "screwvision_app", "backend")
+sys.path.insert(0, backend_dir)
+
+from process_pool import available_cores, split_cores  # noqa: E402
+
+SWEEP_DIR = os.path.join(current_dir, "screwVision_model", "runs", "sweep")
+INDEX_PATH = os.path.join(SWEEP_DIR, "index.sqlite")
+
+# Grid values fall back to these; train_model.train() supplies everything else
+TRAIN_DEFAULTS = {
+    "model": "yolov8n.pt", "imgsz": 640, "epochs": 100, "batch": 16, "device": "cpu",
+    "online_augment": False,
+}
+# export imgsz defaults to the training imgsz
+EXPORT_DEFAULTS = {"opset": 12, "dynamic": True}
+
+# Best epoch = ultralytics fitness (0.1 * mAP50 + 0.9 * mAP50-95)
+PRECISION_COL = "metrics/precision(B)"
+RECALL_COL = "metrics/recall(B)"
+MAP50_COL = "metrics/mAP50(B)"
+MAP50_95_COL = "metrics/mAP50-95(B)"
+
+# Served mAP is computed at MAP_CONFIDENCE; latency is timed at the server's default threshold
+MAP_CONFIDENCE = 0.001
+SERVE_CONFIDENCE = 0.25
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS trials (
+    key TEXT PRIMARY KEY,
+    train_key TEXT,
+    export_key TEXT,
+    sweep TEXT,
+    status TEXT,
+    error TEXT,
+    model TEXT,
+    imgsz INTEGER,
+    epochs INTEGER,
+    batch INTEGER,
+    opset INTEGER,
+    dynamic INTEGER,
+    train_settings TEXT,
+    export_settings TEXT,
+    epochs_run INTEGER,
+    best_epoch INTEGER,
+    train_seconds REAL,
+    precision REAL,
+    recall REAL,
+    map50 REAL,
+    map50_95 REAL,
+    onnx_path TEXT,
+    onnx_bytes INTEGER,
+    input_size INTEGER,
+    threads INTEGER,
+    served_map50 REAL,
+    served_map50_95 REAL,
+    latency_p50_ms REAL,
+    latency_p95_ms REAL,
+    infer_p50_ms REAL,
+    finished TEXT
+);
+CREATE TABLE IF NOT EXISTS epochs (
+    train_key TEXT,
+    epoch INTEGER,
+    metrics TEXT,
+    PRIMARY KEY (train_key, epoch)
+);
+"""
+
+
+def settings_key(settings):
+    """Stable short hash of a settings dict (trial / training run identity)"""
+    text = json.dumps(settings, sort_keys=True)
+    return hashlib.sha1(text.encode()).hexdigest()[:12]
+
+
+def expand_grid(grid, defaults):
+    """Cartesian product of grid values (scalars count as one value) over defaults"""
+    grid = {k: v if isinstance(v, list) else [v] for k, v in grid.items()}
+    keys = list(grid)
+    return [
+        {**defaults, **dict(zip(keys, values))}
+        for values in itertools.product(*(grid[k] for k in keys))
+    ]
+
+
+def plan_jobs(grid):
+    """
+    One job per training configuration, holding its export variants
+    A "weights" entry in the train grid reuses an existing .pt instead of training.
+    """
+    jobs = []
+    for train in expand_grid(grid.get("train", {}), TRAIN_DEFAULTS):
+        if "weights" in train:
+            # Only the weights identify an existing run
+            train = {"weights": os.path.abspath(train["weights"]), "imgsz": train["imgsz"]}
+        train_key = settings_key(train)
+        exports = []
+        for export in expand_grid(grid.get("export", {}), EXPORT_DEFAULTS):
+            export.setdefault("imgsz", train["imgsz"])
+            export_key = settings_key(export)
+            exports.append({"key": f"{train_key}-{export_key}", "export_key": export_key, "settings": export})
+        jobs.append({"train_key": train_key, "settings": train, "exports": exports})
+    return jobs
+
+
+class SweepIndex:
+    """SQLite index of trials (one row per train x export) and per-epoch results.csv rows"""
+
+    def __init__(self, path=INDEX_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.db = sqlite3.connect(path)
+        self.db.row_factory = sqlite3.Row
+        self.db.executescript(SCHEMA)
+        self.columns = [row["name"] for row in self.db.execute("PRAGMA table_info(trials)")]
+
+    def done_keys(self):
+        return {row["key"] for row in self.db.execute("SELECT key FROM trials WHERE status = 'done'")}
+
+    def record(self, trial):
+        row = {k: v for k, v in trial.items() if k in self.columns}
+        names = ", ".join(row)
+        marks = ", ".join("?" for _ in row)
+        with self.db:
+            self.db.execute(f"INSERT OR REPLACE INTO trials ({names}) VALUES ({marks})", list(row.values()))
+
+    def record_epochs(self, train_key, rows):
+        with self.db:
+            self.db.executemany(
+                "INSERT OR REPLACE INTO epochs (train_key, epoch, metrics) VALUES (?, ?, ?)",
+                [(train_key, int(r.get("epoch", i + 1)), json.dumps(r)) for i, r in enumerate(rows)],
+            )
+
+    def select(self, where=None, order="latency_p50_ms", descending=False):
+        query = "SELECT * FROM trials WHERE status = 'done'"
+        if where:
+            query += f" AND ({where})"
+        query += f" ORDER BY {order}{' DESC' if descending else ''}"
+        return list(self.db.execute(query))
+
+    def failed(self):
+        return list(self.db.execute("SELECT key, error FROM trials WHERE status = 'failed'"))
+
+
+def read_results_csv(path):
+    """ultralytics results.csv as a list of {column: float} (older versions pad headers)"""
+    if not os.path.exists(path):
+        return []
+    with open(path, newline="") as f:
+        return [
+            {k.strip(): float(v) for k, v in row.items() if k and v and v.strip()}
+            for row in csv.DictReader(f)
+        ]
+
+
+def summarize_results(rows):
+    """Best epoch (by fitness) of a results.csv"""
+    if not rows:
+        return {}
+    best = max(rows, key=lambda r: 0.1 * r.get(MAP50_COL, 0) + 0.9 * r.get(MAP50_95_COL, 0))
+    return {
+        "epochs_run": len(rows),
+        "best_epoch": int(best.get("epoch", rows.index(best) + 1)),
+        "precision": best.get(PRECISION_COL),
+        "recall": best.get(RECALL_COL),
+        "map50": best.get(MAP50_COL),
+        "map50_95": best.get(MAP50_95_COL),
+    }
+
+
+def train_or_reuse(job, threads):
+    """
+    (results.csv path, best.pt in the sweep run dir, training seconds)
+    Finished runs (done.json) are reused. Existing weights are copied in, so
+    exports never write next to the original .pt.
+    """
+    settings = job["settings"]
+    run_dir = os.path.join(SWEEP_DIR, "train", job["train_key"])
+    best_pt = os.path.join(run_dir, "weights", "best.pt")
+    if "weights" in settings:
+        if not os.path.exists(best_pt):
+            os.makedirs(os.path.dirname(best_pt), exist_ok=True)
+            shutil.copy2(settings["weights"], best_pt)
+        source_run = os.path.dirname(os.path.dirname(settings["weights"]))
+        return os.path.join(source_run, "results.csv"), best_pt, None
+
+    marker = os.path.join(run_dir, "done.json")
+    if os.path.exists(marker) and os.path.exists(best_pt):
+        with open(marker) as f:
+            return os.path.join(run_dir, "results.csv"), best_pt, json.load(f).get("train_seconds")
+
+    import train_model
+
+    extra = {k: v for k, v in settings.items() if k not in TRAIN_DEFAULTS}
+    started = time.perf_counter()
+    train_model.train(
+        model_path=settings["model"],
+        project=os.path.dirname(run_dir),
+        name=job["train_key"],
+        epochs=settings["epochs"],
+        imgsz=settings["imgsz"],
+        batch=settings["batch"],
+        device=settings["device"],
+        online_augment=settings["online_augment"],
+        workers=threads,
+        validate=False,
+        export=False,
+        **extra,
+    )
+    seconds = time.perf_counter() - started
+    with open(marker, "w") as f:
+        json.dump({"settings": settings, "train_seconds": seconds}, f)
+    return os.path.join(run_dir, "results.csv"), best_pt, seconds
+
+
+def export_variant(best_pt, export):
+    """ONNX for one export setting, kept as onnx/<export_key>.onnx in the sweep run dir"""
+    run_dir = os.path.dirname(os.path.dirname(best_pt))
+    onnx_path = os.path.join(run_dir, "onnx", f"{export['export_key']}.onnx")
+    if not os.path.exists(onnx_path):
+        import export_fix
+
+        # ultralytics writes next to the .pt; move it before the next variant overwrites it
+        exported = export_fix.export_onnx(best_pt, **export["settings"])
+        os.makedirs(os.path.dirname(onnx_path), exist_ok=True)
+        shutil.move(str(exported), onnx_path)
+    return onnx_path
+
+
+def measure_serving(onnx_path, input_size, limit, warmup):
+    """
+    Accuracy + latency through the backend's own path (eval_harness, valid split).
+    mAP uses a 0.001 threshold; latency is timed in a separate pass that runs only
+    the serving path at the serving threshold.
+    """
+    sys.path.insert(0, os.path.join(backend_dir, "benchmarks"))
+    import eval_harness
+    from metrics import split_image_paths
+
+    backend = eval_harness.main
+    _, runner = backend.build_session(onnx_path)
+    runner.warmup(input_size, (1,), repeat=warmup)
+    image_paths = split_image_paths(eval_harness.DATA_DIR, "valid", limit)
+    result = eval_harness.evaluate_split(
+        runner, image_paths, MAP_CONFIDENCE, SERVE_CONFIDENCE, input_size
+    )
+    latency = eval_harness.measure_latency(runner, image_paths, SERVE_CONFIDENCE, input_size)
+    return {
+        "served_map50": result["map50"],
+        "served_map50_95": result["map50_95"],
+        "latency_p50_ms": latency["total"]["p50"],
+        "latency_p95_ms": latency["total"]["p95"],
+        "infer_p50_ms": latency["infer"]["p50"],
+    }
+
+
+def run_job(job, cores, results, options):
+    """
+    Worker process: pin to the core slice, train (or reuse), then export and
+    measure every pending export variant. Each trial is sent back on results.
+    """
+    threads = len(cores)
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cores)
+    # Before torch / onnxruntime are imported
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "SCREWVISION_ORT_INTRA_OP_THREADS"):
+        os.environ[var] = str(threads)
+
+    settings = job["settings"]
+    base = {
+        "train_key": job["train_key"],
+        "sweep": options["sweep"],
+        # Export-only sweeps are labelled with the source run name
+        "model": settings.get("model") or os.path.basename(
+            os.path.dirname(os.path.dirname(settings["weights"]))
+        ),
+        "epochs": settings.get("epochs"),
+        "batch": settings.get("batch"),
+        "train_settings": json.dumps(settings, sort_keys=True),
+        "threads": threads,
+    }
+
+    def send(export, **fields):
+        fields.setdefault("finished", datetime.now(timezone.utc).isoformat(timespec="seconds"))
+        results.put({
+            "type": "trial",
+            **base,
+            "key": export["key"],
+            "export_key": export["export_key"],
+            "imgsz": export["settings"]["imgsz"],
+            "opset": export["settings"].get("opset"),
+            "dynamic": int(bool(export["settings"].get("dynamic"))),
+            "export_settings": json.dumps(export["settings"], sort_keys=True),
+            **fields,
+        })
+
+    try:
+        results_csv, best_pt, train_seconds = train_or_reuse(job, threads)
+    except Exception as e:
+        for export in job["exports"]:
+            send(export, status="failed", error=f"train: {e}")
+        return
+
+    rows = read_results_csv(results_csv)
+    results.put({"type": "epochs", "train_key": job["train_key"], "rows": rows})
+    summary = {**summarize_results(rows), "train_seconds": train_seconds}
+
+    for export in job["exports"]:
+        try:
+            onnx_path = export_variant(best_pt, export)
+            serving = measure_serving(
+                onnx_path, export["settings"]["imgsz"], options["eval_limit"], options["warmup"]
+            )
+        except Exception as e:
+            send(export, status="failed", error=str(e), **summary)
+            continue
+        send(
+            export,
+            status="done",
+            error=None,
+            onnx_path=onnx_path,
+            onnx_bytes=os.path.getsize(onnx_path),
+            input_size=export["settings"]["imgsz"],
+            **summary,
+            **serving,
+        )
+
+
+def run_sweep(jobs, slots, index, options):
+    """Keep up to len(slots) jobs running, each on its own core slice"""
+    ctx = mp.get_context("spawn")
+    results = ctx.Queue()
+    pending = deque(jobs)
+    free = list(range(len(slots)))
+    running = {}  # slot -> (process, job, reported keys)
+    done = failed = 0
+
+    def collect(block):
+        nonlocal done, failed
+        while True:
+            try:
+                message = results.get(timeout=1) if block else results.get_nowait()
+            except queue.Empty:
+                return
+            block = False
+            if message.pop("type") == "epochs":
+                index.record_epochs(message["train_key"], message["rows"])
+                continue
+            index.record(message)
+            for _, job, reported in running.values():
+                if job["train_key"] == message["train_key"]:
+                    reported.add(message["key"])
+            if message["status"] == "done":
+                done += 1
+                print(
+                    f"[done] {message['key']} {message['model']} imgsz={message['imgsz']} "
+                    f"opset={message['opset']}: mAP50-95 {message['served_map50_95']:.4f}, "
+                    f"p50 {message['latency_p50_ms']:.1f} ms, {message['onnx_bytes'] / 1e6:.1f} MB"
+                )
+            else:
+                failed += 1
+                print(f"[failed] {message['key']}: {message['error']}")
+
+    while pending or running:
+        while pending and free:
+            slot = free.pop(0)
+            job = pending.popleft()
+            process = ctx.Process(target=run_job, args=(job, slots[slot], results, options))
+            process.start()
+            running[slot] = (process, job, set())
+            print(
+                f"[start] train {job['train_key']} ({len(job['exports'])} exports) "
+                f"on cores {slots[slot][0]}-{slots[slot][-1]}"
+            )
+
+        collect(block=True)
+        for slot, (process, job, reported) in list(running.items()):
+            if process.is_alive():
+                continue
+            process.join()
+            collect(block=False)
+            # Trials the worker never reported (crash, OOM kill)
+            for export in job["exports"]:
+                if export["key"] not in reported:
+                    failed += 1
+                    index.record({
+                        "key": export["key"],
+                        "train_key": job["train_key"],
+                        "export_key": export["export_key"],
+                        "sweep": options["sweep"],
+                        "status": "failed",
+                        "error": f"worker exited with code {process.exitcode}",
+                    })
+            del running[slot]
+            free.append(slot)
+    return done, failed
+
+
+def pareto_front(rows, accuracy="served_map50_95", latency="latency_p50_ms"):
+    """Rows not beaten by any faster row on accuracy (rows sorted by latency)"""
+    front, best = [], float("-inf")
+    for row in sorted(rows, key=lambda r: r[latency]):
+        if row[accuracy] is not None and row[accuracy] > best:
+            front.append(row)
+            best = row[accuracy]
+    return front
+
+
+def print_trials(rows, front_keys):
+    print(
+        f"{'':1} {'key':25} {'model':14} {'imgsz':>5} {'opset':>5} {'dyn':>3} {'MB':>6} "
+        f"{'train mAP':>9} {'mAP50':>6} {'mAP50-95':>8} {'p50 ms':>7} {'p95 ms':>7}"
+    )
+    for r in rows:
+        print(
+            f"{'*' if r['key'] in front_keys else ' ':1} {r['key']:25} "
+            f"{os.path.basename(r['model'] or '')[:14]:14} {r['imgsz']:>5} {r['opset'] or '':>5} "
+            f"{'y' if r['dynamic'] else 'n':>3} {r['onnx_bytes'] / 1e6:6.1f} "
+            f"{r['map50_95'] if r['map50_95'] is not None else float('nan'):9.4f} "
+            f"{r['served_map50']:6.4f} {r['served_map50_95']:8.4f} "
+            f"{r['latency_p50_ms']:7.2f} {r['latency_p95_ms']:7.2f}"
+        )
+
+
+def cmd_run(args):
+    grid = {"train": {}, "export": {}}
+    if args.grid:
+        with open(args.grid) as f:
+            loaded = json.load(f)
+        grid["train"].update(loaded.get("train", {}))
+        grid["export"].update(loaded.get("export", {}))
+    for section, key in (
+        ("train", "model"), ("train", "imgsz"), ("train", "epochs"), ("train", "batch"),
+        ("train", "device"), ("train", "online_augment"), ("train", "weights"),
+        ("export", "opset"), ("export", "dynamic"),
+    ):
+        value = getattr(args, key)
+        if value is not None:
+            grid[section][key] = value
+
+    index = SweepIndex(args.index)
+    jobs = plan_jobs(grid)
+    total = sum(len(job["exports"]) for job in jobs)
+    if not args.force:
+        done_keys = index.done_keys()
+        for job in jobs:
+            job["exports"] = [e for e in job["exports"] if e["key"] not in done_keys]
+        jobs = [job for job in jobs if job["exports"]]
+    todo = sum(len(job["exports"]) for job in jobs)
+    print(f"Trials: {total} in grid, {total - todo} already in the index, {todo} to run ({len(jobs)} trainings)")
+
+    if args.dry_run:
+        for job in jobs:
+            print(f"  train {job['train_key']}: {json.dumps(job['settings'], sort_keys=True)}")
+            for export in job["exports"]:
+                print(f"    export {export['key']}: {json.dumps(export['settings'], sort_keys=True)}")
+        return
+    if not jobs:
+        print("Nothing to do.")
+        return
+
+    slots = split_cores(available_cores(), min(args.jobs, len(jobs)))
+    options = {
+        "sweep": args.name or (os.path.splitext(os.path.basename(args.grid))[0] if args.grid else "cli"),
+        "eval_limit": args.eval_limit,
+        "warmup": args.warmup,
+    }
+    print(f"Running {len(slots)} at a time, {len(slots[0])} cores each")
+
+    started = time.perf_counter()
+    done, failed = run_sweep(jobs, slots, index, options)
+    print(f"\nSweep finished in {(time.perf_counter() - started) / 60:.1f} min: {done} done, {failed} failed")
+    print(f"Index: {args.index} (python sweep.py report)")
+
+
+def cmd_report(args):
+    index = SweepIndex(args.index)
+    try:
+        rows = index.select(args.where, args.sort, descending="map" in args.sort)
+    except sqlite3.OperationalError as e:
+        print(f"Error: {e}")
+        exit(1)
+    front_keys = {r["key"] for r in pareto_front(rows)}
+    shown = rows if args.all else [r for r in rows if r["key"] in front_keys]
+    print(f"{len(rows)} finished trials, {len(front_keys)} on the accuracy / latency front (*)\n")
+    if shown:
+        print_trials(shown, front_keys)
+
+    failed = index.failed()
+    if failed:
+        print(f"\n{len(failed)} failed trials (rerun with the same grid to retry):")
+        for row in failed:
+            print(f"  {row['key']}: {row['error']}")
+
+    if args.csv:
+        with open(args.csv, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(index.columns)
+            writer.writerows([tuple(r) for r in rows])
+        print(f"\nWrote {len(rows)} rows to {args.csv}")
+
+
+def parse_bool(value):
+    return value.lower() in ("1", "true", "yes", "y")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Training / ONNX export sweep with a results index")
+    parser.add_argument("--index", default=INDEX_PATH, help="SQLite results index")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Train, export and measure every grid point not in the index")
+    run.add_argument("--grid", help='JSON: {"train": {"imgsz": [320, 640], ...}, "export": {"opset": [12, 17]}}')
+    run.add_argument("--name", help="Sweep label stored with each trial (default: grid file name)")
+    run.add_argument("--model", nargs="+", help="Starting weights, e.g. yolov8n.pt yolov8s.pt")
+    run.add_argument("--imgsz", type=int, nargs="+")
+    run.add_argument("--epochs", type=int, nargs="+")
+    run.add_argument("--batch", type=int, nargs="+")
+    run.add_argument("--device", nargs="+")
+    run.add_argument("--online-augment", type=parse_bool, nargs="+",
+                     help="On-the-fly augmentation (screwVision_data/augment_stream.py), e.g. false true")
+    run.add_argument("--weights", nargs="+", help="Existing best.pt files: export-only sweep, no training")
+    run.add_argument("--opset", type=int, nargs="+")
+    run.add_argument("--dynamic", type=parse_bool, nargs="+")
+    run.add_argument("--jobs", type=int, default=max(1, len(available_cores()) // 4),
+                     help="Trainings at a time; cores are split evenly between them")
+    run.add_argument("--eval-limit", type=int, default=100, help="Valid images for served mAP / latency (0 = all)")
+    run.add_argument("--warmup", type=int, default=5)
+    run.add_argument("--dry-run", action="store_true", help="List the trials that would run")
+    run.add_argument("--force", action="store_true", help="Run trials that are already in the index")
+    run.set_defaults(func=cmd_run)
+
+    report = commands.add_parser("report", help="Accuracy / latency front from the index")
+    report.add_argument("--all", action="store_true", help="Every finished trial, not just the front")
+    report.add_argument("--where", help="SQL filter, e.g. \"imgsz <= 416 AND opset = 12\"")
+    report.add_argument("--sort", default="latency_p50_ms",
+                        choices=["latency_p50_ms", "served_map50_95", "onnx_bytes", "map50_95"])
+    report.add_argument("--csv", help="Also write the selected rows to a CSV file")
+    report.set_defaults(func=cmd_report)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,55 @@
 
 from ultralytics import YOLO
 import os
+import sys
 
 # Define paths
 model_path = "yolov8n.pt" # Start from pretrained 'nano' model
 current_dir = os.path.dirname(os.path.abspath(__file__))
-data_path = os.path.join(current_dir, "screwVision_data", "data.yaml")
+source_data_path = os.path.join(current_dir, "screwVision_data", "data.yaml")
+# augment_dataset.py writes its copies to screwVision_data/augmented/ together with a
+# data.yaml listing originals + copies; that is the production training set.
+augmented_data_path = os.path.join(current_dir, "screwVision_data", "augmented", "data.yaml")
+# Explicit dataset yaml (e.g. source_data_path to train on the originals only)
+data_override = os.environ.get("SCREWVISION_TRAIN_DATA", "")
 project_dir = os.path.join(current_dir, "screwVision_model", "runs", "train")
 name = "screwvision_v2_augmented"
 
-def train():
+# On-the-fly augmentation (opt-in): the get_augmentations() variants are generated by
+# the dataloader workers each epoch instead of being read from files written by
+# augment_dataset.py. Set SCREWVISION_ONLINE_AUGMENT=1 to enable; by default training
+# uses data.yaml as-is.
+online_augment = os.environ.get("SCREWVISION_ONLINE_AUGMENT", "0") == "1"
+
+def resolve_data_path():
+    """SCREWVISION_TRAIN_DATA, else augmented/data.yaml if augment_dataset.py has run, else data.yaml"""
+    if data_override:
+        return data_override
+    if os.path.exists(augmented_data_path):
+        return augmented_data_path
+    print(f"Warning: {augmented_data_path} not found, training on the original images only "
+          f"(run screwVision_data/augment_dataset.py first)")
+    return source_data_path
+
+def train(
+    model_path=model_path,
+    project=project_dir,
+    name=name,
+    epochs=100,
+    imgsz=640,
+    batch=16,
+    device='mps',
+    workers=8,
+    validate=True,
+    export=True,
+    online_augment=online_augment,
+    **overrides,
+):
+    """
+    Train one configuration; the defaults are the production run.
+    sweep.py calls this with other settings (overrides go straight to model.train).
+    Returns the run directory (weights/, results.csv).
+    """
     # Load a model
     model = YOLO(model_path)  # load a pretrained model (recommended for training)
 
@@ -25,34 +65,52 @@ def train():
     #   Note: YOLOv8 applies robust online augmentation by default (Mosaic, MixUp). 
     #   Since we added explicit geometric variances offline, standard online aug is fine.
     
-    results = model.train(
-        data=data_path,
-        epochs=100,
-        imgsz=640,
+    trainer = None
+    if online_augment:
+        sys.path.insert(0, os.path.join(current_dir, "screwVision_data"))
+        from augment_stream import detection_trainer, write_sources_data_yaml
+        train_data = write_sources_data_yaml()
+        trainer = detection_trainer()
+    else:
+        train_data = resolve_data_path()
+    print(f"Training data: {train_data}")
+
+    settings = dict(
+        trainer=trainer,
+        data=train_data,
+        epochs=epochs,
+        imgsz=imgsz,
         patience=20,
-        batch=16, # Conservative batch size for CPU/local training to avoid OOM
-        device='mps', # Use Apple Silicon GPU
-        project=project_dir,
+        batch=batch, # Default 16: conservative batch size for CPU/local training to avoid OOM
+        device=device, # Default 'mps': Apple Silicon GPU
+        project=project,
         name=name,
         exist_ok=True,
         pretrained=True,
         optimizer='auto',
         verbose=True,
         seed=42, # For reproducibility
+        workers=workers, # Dataloader processes; with online augmentation they also run the albumentations pipelines
         plots=True # Save plot results
     )
+    settings.update(overrides)
+    results = model.train(**settings)
     
     print("Training Completed.")
-    print(f"Results saved to {project_dir}/{name}")
+    print(f"Results saved to {project}/{name}")
     
     # Validation
-    metrics = model.val()
-    print("Validation Metrics:", metrics.box.map)
+    if validate:
+        metrics = model.val()
+        print("Validation Metrics:", metrics.box.map)
     
     # Export to ONNX
-    print("Exporting to ONNX...")
-    success = model.export(format='onnx', dynamic=False) # dynamic=False for better compatibility with mobile/opencv
-    print(f"Export Success: {success}")
+    if export:
+        print("Exporting to ONNX...")
+        success = model.export(format='onnx', dynamic=True) # dynamic=True so the backend can batch concurrent requests
+        print(f"Export Success: {success}")
+
+    return os.path.join(project, name)
 
 if __name__ == '__main__':
     train()